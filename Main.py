@@ -12,27 +12,44 @@ import streamlit as st
 from queue import Queue
 from dotenv import load_dotenv
 
-# Internal imports
-from core.connectivity import check_network_connection, verify_openai_key
-from core.price_emitter import price_emitter
-from core.event_processor import process_event
+# Internal imports (the pipeline and agent frameworks are imported on first use)
+from config.settings import load_settings
+from core.startup import run_once, start_connectivity_checks
 from ui.dashboard import streamlit_app
 from config.constants import INPUT_QUEUE, OUTPUT_QUEUE
 
 
-def initialize_system():
-    """Initialize system components and verify requirements"""
+def initialize_system(settings):
+    """
+    Initialize system components and verify requirements
+
+    Connectivity checks run in the background (or are answered from a
+    recent successful check) unless "startup.connectivity_checks" is
+    "blocking", so startup does not wait on the network.
+    """
     # Load environment variables
     load_dotenv()
 
-    try:
-        # Verify connectivity and API keys
-        check_network_connection()
-        verify_openai_key()
-        return True
-    except Exception as e:
-        st.error(f"Initialization failed: {str(e)}")
-        return False
+    # Verify connectivity and API keys
+    start_connectivity_checks(settings)
+
+
+def start_pipeline(settings):
+    """
+    Start the pipeline in the background: sharded across processes, the
+    asyncio runtime on one thread, or the emitter and processor threads
+    """
+    if settings.get('sharding', {}).get('enabled'):
+        from core.sharding import run_sharded
+        threading.Thread(target=run_sharded, kwargs={"settings": settings}, daemon=True).start()
+    elif settings.get('pipeline', {}).get('engine') == 'async':
+        from core.async_pipeline import run_pipeline
+        threading.Thread(target=run_pipeline, kwargs={"settings": settings}, daemon=True).start()
+    else:
+        from core.price_emitter import price_emitter
+        from core.event_processor import process_event
+        threading.Thread(target=price_emitter, daemon=True).start()
+        threading.Thread(target=process_event, daemon=True).start()
 
 
 def main():
@@ -40,13 +57,17 @@ def main():
     # Initialize queues for inter-thread communication
     global INPUT_QUEUE, OUTPUT_QUEUE
 
-    if not initialize_system():
+    # Streamlit re-runs this script on every dashboard refresh; initialization
+    # and the background pipeline only happen on the first run in a process
+    settings = load_settings()
+    try:
+        run_once("initialize", initialize_system, settings)
+    except Exception as e:
+        st.error(f"Initialization failed: {str(e)}")
         st.stop()
 
     try:
-        # Start background threads
-        threading.Thread(target=price_emitter, daemon=True).start()
-        threading.Thread(target=process_event, daemon=True).start()
+        run_once("pipeline", start_pipeline, settings)
 
         # Start Streamlit app
         streamlit_app()
@@ -3,17 +3,26 @@ Agent Factory - Creates and configures AI agents
 """
 
 import os
+import uuid
 import yaml
 import logging
+import threading
 from crewai import Agent
+from crewai.llms.providers.openai.completion import OpenAICompletion
 from langchain_openai import ChatOpenAI
+from openai import AsyncOpenAI
+from pydantic import PrivateAttr
 from config.constants import API_REQUEST_TIMEOUT
+from agents.rate_limiter import get_scheduler
 
 # Set up logging
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# API-reported usage of the calling thread's current crew LLM call
+_call_usage = threading.local()
+
 
 def load_agent_configs():
     """Load agent configurations from YAML file"""
@@ -25,32 +34,125 @@ def load_agent_configs():
         return {}
 
 
-def create_llm():
-    """Create and configure the language model"""
+def create_llm(model="gpt-3.5-turbo", temperature=0.3, http_client=None, callbacks=None,
+               http_async_client=None):
+    """
+    Create and configure the language model
+
+    Args:
+        model (str): Model name
+        temperature (float): Sampling temperature
+        http_client (httpx.Client): Optional shared HTTP client so that
+            connections are pooled across LLM instances
+        callbacks (list): Optional LangChain callback handlers
+        http_async_client (httpx.AsyncClient): Optional HTTP client used for
+            async requests (``ainvoke``)
+    """
+    # With client-side scheduling the HTTP transport retries failed requests
+    # itself; SDK retries on top would bypass the rate limiter
+    max_retries = 0 if get_scheduler() is not None else 2
+
     try:
         llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
+            model=model,
             openai_api_key=os.environ["OPENAI_API_KEY"],
-            temperature=0.3,
-            request_timeout=API_REQUEST_TIMEOUT
+            base_url=os.environ.get("OPENAI_BASE_URL"),
+            temperature=temperature,
+            request_timeout=API_REQUEST_TIMEOUT,
+            max_retries=max_retries,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            callbacks=callbacks
+        )
+        return llm
+    except Exception as e:
+        logger.error(f"LLM initialization failed: {str(e)}")
+        raise
+
+
+class CrewLLM(OpenAICompletion):
+    """
+    CrewAI's native OpenAI LLM, reporting each call to metrics handlers
+
+    CrewAI agents only accept CrewAI LLMs, which ignore LangChain
+    callbacks; handlers given here get ``on_crew_call_start``,
+    ``on_crew_call_end`` and ``on_crew_call_error`` instead.
+    """
+
+    _handlers: list = PrivateAttr(default_factory=list)
+
+    def call(self, messages, *args, **kwargs):
+        call_id = uuid.uuid4()
+        for handler in self._handlers:
+            handler.on_crew_call_start(call_id, messages, self.model)
+        _call_usage.value = None
+        try:
+            result = super().call(messages, *args, **kwargs)
+        except Exception:
+            for handler in self._handlers:
+                handler.on_crew_call_error(call_id)
+            raise
+        for handler in self._handlers:
+            handler.on_crew_call_end(call_id, result if isinstance(result, str) else '',
+                                     _call_usage.value)
+        return result
+
+    def _build_async_client(self):
+        # The shared HTTP client is synchronous; async calls get their own
+        params = self._get_client_params()
+        params.pop('http_client', None)
+        return AsyncOpenAI(**params)
+
+    def _track_token_usage_internal(self, usage_data):
+        super()._track_token_usage_internal(usage_data)
+        _call_usage.value = usage_data
+
+
+def create_crew_llm(model="gpt-3.5-turbo", temperature=0.3, http_client=None, callbacks=None):
+    """
+    Create the language model of a CrewAI agent
+
+    Args:
+        model (str): Model name
+        temperature (float): Sampling temperature
+        http_client (httpx.Client): Optional shared HTTP client so that
+            connections are pooled (and rate limited) across LLM instances
+        callbacks (list): Optional metrics handlers (see ``CrewLLM``)
+    """
+    max_retries = 0 if get_scheduler() is not None else 2
+
+    try:
+        llm = CrewLLM(
+            model=model,
+            api_key=os.environ["OPENAI_API_KEY"],
+            base_url=os.environ.get("OPENAI_BASE_URL"),
+            temperature=temperature,
+            timeout=API_REQUEST_TIMEOUT,
+            max_retries=max_retries,
+            client_params={"http_client": http_client} if http_client is not None else None,
         )
+        llm._handlers = list(callbacks or [])
         return llm
     except Exception as e:
         logger.error(f"LLM initialization failed: {str(e)}")
         raise
 
 
-def create_pricing_analyst():
+def create_pricing_analyst(configs=None, llm=None):
     """
     Create and configure the Pricing Intelligence Analyst agent
 
+    Args:
+        configs (dict): Agent configurations (loaded from disk if omitted)
+        llm: CrewAI language model to use (a new one is created if omitted)
+
     Returns:
         Agent: Configured pricing analyst agent
     """
-    configs = load_agent_configs()
+    configs = load_agent_configs() if configs is None else configs
     analyst_config = configs.get('pricing_analyst', {})
 
-    llm = create_llm()
+    llm = llm or create_crew_llm()
 
     return Agent(
         role=analyst_config.get('role', "Pricing Intelligence Analyst"),
@@ -62,17 +164,21 @@ def create_pricing_analyst():
     )
 
 
-def create_notification_manager():
+def create_notification_manager(configs=None, llm=None):
     """
     Create and configure the Notification Manager agent
 
+    Args:
+        configs (dict): Agent configurations (loaded from disk if omitted)
+        llm: CrewAI language model to use (a new one is created if omitted)
+
     Returns:
         Agent: Configured notification manager agent
     """
-    configs = load_agent_configs()
+    configs = load_agent_configs() if configs is None else configs
     manager_config = configs.get('notification_manager', {})
 
-    llm = create_llm()
+    llm = llm or create_crew_llm()
 
     return Agent(
         role=manager_config.get('role', "Notification Manager"),
@@ -81,4 +187,4 @@ def create_notification_manager():
         verbose=manager_config.get('verbose', True),
         llm=llm,
         allow_delegation=manager_config.get('allow_delegation', False),
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,93 @@
+"""
+Async Agent - Single-shot LLM calls for the asyncio pipeline
+
+CrewAI crews run synchronously and occupy a thread for the whole LLM round
+trip. For the async pipeline each agent is reduced to its persona (role,
+goal and backstory from agents.yaml) and one ``ainvoke`` call per prompt, so
+many requests can be in flight on a single event loop. The system message
+follows the prompt mode (full persona, or one line in compact mode).
+"""
+
+import time
+import logging
+from langchain_core.messages import HumanMessage, SystemMessage
+from agents.agent_factory import create_llm
+from agents.prompting import (
+    count_message_tokens, count_tokens, get_prompt_settings, record_task_usage, system_prompt
+)
+from agents.registry import get_agent_configs
+from core.metrics import ERRORS_TOTAL, LLM_REQUESTS_TOTAL, LLM_SECONDS, LLM_TOKENS_TOTAL
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def final_answer(text):
+    """Strip a ReAct-style preamble, keeping only the text after 'Final Answer:'"""
+    marker = "Final Answer:"
+    if marker in text:
+        text = text.rsplit(marker, 1)[1]
+    return text.strip()
+
+
+class AsyncAgent:
+    """
+    Agent persona bound to an LLM client with async HTTP
+
+    Args:
+        name (str): Agent configuration name in agents.yaml
+        http_async_client (httpx.AsyncClient): Pooled client owned by the
+            event loop that will call ``run``
+        configs (dict): Agent configurations (shared registry copy if omitted)
+    """
+
+    def __init__(self, name, http_async_client=None, configs=None):
+        configs = get_agent_configs() if configs is None else configs
+        config = configs.get(name, {})
+        self.name = name
+        self.model = config.get('model', "gpt-3.5-turbo")
+        self.system_prompt = system_prompt(name, config)
+        self.llm = create_llm(
+            model=self.model,
+            temperature=config.get('temperature', 0.3),
+            http_async_client=http_async_client,
+        )
+
+    async def run(self, prompt, task=None, max_tokens=None):
+        """
+        Send one prompt to the LLM
+
+        Args:
+            prompt (str): Filled task template
+            task (str): Task name for token accounting (defaults to the agent name)
+            max_tokens (int): Completion token cap (None for no cap)
+
+        Returns:
+            str: The agent's answer
+
+        Raises:
+            Exception: Any error raised by the LLM client
+        """
+        messages = [SystemMessage(content=self.system_prompt), HumanMessage(content=prompt)]
+        count = get_prompt_settings().get('count_tokens', True)
+        prompt_tokens = count_message_tokens(messages, self.model) if count else None
+        kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+        start = time.perf_counter()
+        try:
+            message = await self.llm.ainvoke(messages, **kwargs)
+        except Exception:
+            ERRORS_TOTAL.inc(stage="llm")
+            raise
+        elapsed = time.perf_counter() - start
+        LLM_SECONDS.observe(elapsed, agent=self.name)
+        LLM_REQUESTS_TOTAL.inc(agent=self.name)
+        record_task_usage(task or self.name, prompt_tokens,
+                          count_tokens(message.content, self.model) if count else None, elapsed)
+
+        usage = (getattr(message, 'response_metadata', None) or {}).get('token_usage') or {}
+        for token_type in ('prompt_tokens', 'completion_tokens'):
+            if usage.get(token_type):
+                LLM_TOKENS_TOTAL.inc(usage[token_type], agent=self.name, type=token_type.split('_')[0])
+        return final_answer(str(message.content))
@@ -0,0 +1,127 @@
+"""
+LLM Instrumentation - Per-agent LLM timing and token accounting
+
+A LangChain callback handler attached to every LLM client records request
+latency and token usage, both as reported by the API per agent and counted
+locally per task. CrewAI's native LLMs do not run LangChain callbacks, so
+the crew LLMs report their calls to the same handler (``on_crew_call_*``).
+Because one LLM client is shared by several agents, the agent and task
+currently being served are tracked per context (CrewAI makes its LLM calls
+on its own threads, which inherit the caller's context): a crew run starts
+with its first agent, and multi-agent crews switch it with
+``set_llm_agent``.
+"""
+
+import time
+import threading
+import contextvars
+from langchain_core.callbacks import BaseCallbackHandler
+from agents.prompting import count_message_tokens, count_tokens, get_prompt_settings, record_task_usage
+from core.metrics import ERRORS_TOTAL, LLM_REQUESTS_TOTAL, LLM_TOKENS_TOTAL
+
+# Agent, task and per-agent LLM seconds of the current crew run; mutated in
+# place so that threads running with a copy of the context share it
+_accounting = contextvars.ContextVar('llm_accounting', default=None)
+
+
+def _current():
+    accounting = _accounting.get()
+    if accounting is None:
+        accounting = {"agent": 'unknown', "task": 'unknown', "llm_seconds": None}
+        _accounting.set(accounting)
+    return accounting
+
+
+def begin_crew_accounting(agent, task=None):
+    """Start collecting LLM time for a crew run of ``task`` in the calling context"""
+    _accounting.set({"agent": agent, "task": task or agent, "llm_seconds": {}})
+
+
+def set_llm_agent(agent):
+    """Attribute subsequent LLM calls in the calling context to ``agent``"""
+    _current()["agent"] = agent
+
+
+def end_crew_accounting():
+    """
+    Stop collecting and return the LLM time of the current crew run
+
+    Returns:
+        dict: Agent name -> seconds spent waiting on the LLM
+    """
+    accounting = _current()
+    llm_seconds = accounting["llm_seconds"] or {}
+    accounting["llm_seconds"] = {}
+    return llm_seconds
+
+
+def _model_name(kwargs):
+    params = kwargs.get('invocation_params') or {}
+    return params.get('model') or params.get('model_name') or "gpt-3.5-turbo"
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Records LLM request latency, request counts and token usage"""
+
+    def __init__(self):
+        self._starts = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, count_prompt, model):
+        prompt_tokens = count_prompt() if get_prompt_settings().get('count_tokens', True) else None
+        with self._lock:
+            self._starts[run_id] = (time.perf_counter(), prompt_tokens, model)
+
+    def _finish(self, run_id):
+        with self._lock:
+            start, prompt_tokens, model = self._starts.pop(run_id, (None, None, None))
+        return (time.perf_counter() - start if start is not None else 0.0), prompt_tokens, model
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        model = _model_name(kwargs)
+        self._start(run_id, lambda: sum(count_tokens(prompt, model) for prompt in prompts), model)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        model = _model_name(kwargs)
+        self._start(run_id, lambda: sum(count_message_tokens(batch, model) for batch in messages), model)
+
+    def _record(self, run_id, completion_texts, usage):
+        elapsed, prompt_tokens, model = self._finish(run_id)
+        completion_tokens = None
+        if prompt_tokens is not None:
+            completion_tokens = sum(count_tokens(text, model) for text in completion_texts)
+        accounting = _current()
+        record_task_usage(accounting["task"], prompt_tokens, completion_tokens, elapsed)
+
+        agent = accounting["agent"]
+        llm_seconds = accounting["llm_seconds"]
+        if llm_seconds is not None:
+            llm_seconds[agent] = llm_seconds.get(agent, 0.0) + elapsed
+
+        LLM_REQUESTS_TOTAL.inc(agent=agent)
+        usage = usage or {}
+        for token_type in ('prompt_tokens', 'completion_tokens'):
+            if usage.get(token_type):
+                LLM_TOKENS_TOTAL.inc(usage[token_type], agent=agent, type=token_type.split('_')[0])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._record(run_id, [generation.text for generations in response.generations
+                              for generation in generations],
+                     (response.llm_output or {}).get('token_usage'))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+        ERRORS_TOTAL.inc(stage="llm")
+
+    def on_crew_call_start(self, call_id, messages, model):
+        """A CrewAI LLM call started (``messages`` is a string or message dicts)"""
+        messages = [messages] if isinstance(messages, str) else messages
+        self._start(call_id, lambda: count_message_tokens(messages, model), model)
+
+    def on_crew_call_end(self, call_id, text, usage):
+        """A CrewAI LLM call returned ``text``; ``usage`` is the API-reported token usage"""
+        self._record(call_id, [text], usage)
+
+    def on_crew_call_error(self, call_id):
+        """A CrewAI LLM call failed"""
+        self.on_llm_error(None, run_id=call_id)
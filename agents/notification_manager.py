@@ -3,10 +3,7 @@ Notification Manager Agent - Generates clear communications for internal teams
 """
 
 import logging
-from crewai import Agent
-from langchain_openai import ChatOpenAI
-import os
-from config.constants import API_REQUEST_TIMEOUT
+from agents.registry import get_agent
 
 # Set up logging
 logging.basicConfig(level=logging.INFO,
@@ -16,38 +13,20 @@ logger = logging.getLogger(__name__)
 
 def create_notification_manager():
     """
-    Creates and configures a Notification Manager agent specialized in
+    Returns the Notification Manager agent specialized in
     generating clear, actionable notifications for internal teams.
 
+    The agent is configured from config/agents.yaml and cached per thread,
+    sharing its LLM client with every other agent on the same model.
+
     Returns:
         Agent: Configured notification manager agent
     """
     try:
-        # Initialize LLM
-        llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            openai_api_key=os.environ["OPENAI_API_KEY"],
-            temperature=0.3,
-            request_timeout=API_REQUEST_TIMEOUT
-        )
-
-        # Create the agent
-        notification_manager = Agent(
-            role="Notification Manager",
-            goal="Generate clear, actionable communications for internal teams",
-            backstory=(
-                "Specialist in business communications with expertise in crafting "
-                "concise yet comprehensive messages that effectively convey critical "
-                "information and recommended actions to relevant stakeholders."
-            ),
-            verbose=True,
-            llm=llm,
-            allow_delegation=False,
-        )
-
-        logger.info("Notification Manager agent created successfully")
+        notification_manager = get_agent("notification_manager")
+        logger.debug("Notification Manager agent ready")
         return notification_manager
 
     except Exception as e:
         logger.error(f"Failed to create Notification Manager agent: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -3,10 +3,7 @@ Pricing Intelligence Analyst Agent - Analyzes competitor price changes
 """
 
 import logging
-from crewai import Agent
-from langchain_openai import ChatOpenAI
-import os
-from config.constants import API_REQUEST_TIMEOUT
+from agents.registry import get_agent
 
 # Set up logging
 logging.basicConfig(level=logging.INFO,
@@ -16,39 +13,20 @@ logger = logging.getLogger(__name__)
 
 def create_pricing_analyst():
     """
-    Creates and configures a Pricing Intelligence Analyst agent specialized in
+    Returns the Pricing Intelligence Analyst agent specialized in
     analyzing competitor price changes and making actionable recommendations.
 
+    The agent is configured from config/agents.yaml and cached per thread,
+    sharing its LLM client with every other agent on the same model.
+
     Returns:
         Agent: Configured pricing analyst agent
     """
     try:
-        # Initialize LLM
-        llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            openai_api_key=os.environ["OPENAI_API_KEY"],
-            temperature=0.3,
-            request_timeout=API_REQUEST_TIMEOUT
-        )
-
-        # Create the agent
-        pricing_analyst = Agent(
-            role="Pricing Intelligence Analyst",
-            goal="Analyze competitor price changes and recommend strategic actions",
-            backstory=(
-                "Expert AI trained in market dynamics, competitive analysis, and pricing "
-                "strategies across various product categories. Capable of identifying "
-                "significant price movements and determining their potential impact on "
-                "market position and sales performance."
-            ),
-            verbose=True,
-            llm=llm,
-            allow_delegation=False,
-        )
-
-        logger.info("Pricing Intelligence Analyst agent created successfully")
+        pricing_analyst = get_agent("pricing_analyst")
+        logger.debug("Pricing Intelligence Analyst agent ready")
         return pricing_analyst
 
     except Exception as e:
         logger.error(f"Failed to create Pricing Intelligence Analyst agent: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,274 @@
+"""
+Prompting - Prompt modes and local token counting
+
+In "verbose" mode the agents run as CrewAI crews with the full personas
+from agents.yaml and the templates from prompts.yaml. In "compact" mode each
+task is sent as one chat request instead: a one-line system message, the
+terse template from the ``compact`` section of prompts.yaml (which asks for
+JSON), and a per-task ``max_tokens`` cap, without the crew's ReAct
+scaffolding.
+
+Tokens are counted locally with tiktoken when its encoding is available
+(cached on disk or downloadable) and estimated from word and punctuation
+runs otherwise, so accounting works offline and never waits on the network
+after the first attempt.
+
+The "prompts" settings are live: with a config service open, an edited mode,
+token cap or logging switch applies to the next request.
+"""
+
+import re
+import logging
+import threading
+from core.metrics import LLM_TASK_SECONDS, LLM_TASK_TOKENS_TOTAL
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PROMPT_MODES = ("verbose", "compact")
+
+# Templates that have a compact variant
+TEMPLATE_NAMES = ('pricing_analysis_template', 'batch_analysis_template',
+                  'notification_template', 'notification_event_template')
+
+DEFAULT_PROMPT_SETTINGS = {
+    "mode": "verbose",
+    "verbose_logging": True,
+    "count_tokens": True,
+    "max_tokens": {},
+}
+
+# Chat format overhead (per message, and for priming the reply)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+_lock = threading.Lock()
+_prompt_settings = None
+_watched_service = None
+_encodings = {}
+_encoding_locks = {}
+
+
+def _prompt_settings_from(settings):
+    """Validated prompt settings from the "prompts" section of the settings"""
+    prompt_settings = dict(DEFAULT_PROMPT_SETTINGS, **(settings or {}).get('prompts', {}))
+    if prompt_settings['mode'] not in PROMPT_MODES:
+        logger.error(f"Unknown prompt mode {prompt_settings['mode']!r}; using verbose prompts")
+        prompt_settings['mode'] = "verbose"
+    return prompt_settings
+
+
+def _reload_prompt_settings(snapshot, changed):
+    """Config service subscriber: swap in the edited "prompts" settings"""
+    global _prompt_settings
+    prompt_settings = _prompt_settings_from(snapshot.settings)
+    with _lock:
+        previous, _prompt_settings = _prompt_settings, prompt_settings
+    if previous is None or previous['mode'] != prompt_settings['mode']:
+        logger.info(f"Prompt mode: {prompt_settings['mode']}")
+
+
+def configure_prompts(settings):
+    """
+    Set the process-wide prompt settings from the "prompts" section
+
+    The first call wins, so that every worker uses the same mode; after
+    that the settings only change when the config service reloads them.
+
+    Returns:
+        dict: Prompt settings in effect
+    """
+    global _prompt_settings, _watched_service
+    from config.service import get_config_service
+
+    prompt_settings = _prompt_settings_from(settings)
+    service = get_config_service()
+    with _lock:
+        if _prompt_settings is None:
+            _prompt_settings = prompt_settings
+            logger.info(f"Prompt mode: {prompt_settings['mode']}")
+        subscribe = service is not None and service is not _watched_service
+        if subscribe:
+            _watched_service = service
+        result = _prompt_settings
+    if subscribe:
+        service.subscribe(_reload_prompt_settings, "settings.prompts")
+    return result
+
+
+def get_prompt_settings():
+    """Return the configured prompt settings (defaults if not configured)"""
+    return _prompt_settings or DEFAULT_PROMPT_SETTINGS
+
+
+def compact_mode():
+    """Whether compact prompts are in use"""
+    return get_prompt_settings()['mode'] == "compact"
+
+
+def max_tokens_for(task):
+    """Completion token cap of a task in compact mode (None for no cap)"""
+    if not compact_mode():
+        return None
+    return get_prompt_settings().get('max_tokens', {}).get(task)
+
+
+def select_templates(prompts):
+    """
+    Pick the templates for the current prompt mode
+
+    Args:
+        prompts (dict): Contents of prompts.yaml
+
+    Returns:
+        dict: Template name -> template (compact variants where available
+        in compact mode)
+    """
+    templates = {name: prompts.get(name, '') for name in TEMPLATE_NAMES}
+    if compact_mode():
+        templates.update({name: template for name, template in (prompts.get('compact') or {}).items()
+                          if name in templates and template})
+    return templates
+
+
+def system_prompt(name, config):
+    """
+    System message of an agent for the current prompt mode
+
+    Args:
+        name (str): Agent configuration name
+        config (dict): The agent's section of agents.yaml
+    """
+    if compact_mode():
+        return config.get('compact_system') or f"You are a {config.get('role', name)}."
+    return (f"You are a {config.get('role', name)}. {config.get('backstory', '')}\n"
+            f"Your goal: {config.get('goal', '')}")
+
+
+def get_encoding(model):
+    """
+    Return the tiktoken encoding of a model, or None if it is unavailable
+
+    The outcome is cached per model, so a missing encoding (no tiktoken, or
+    no network to fetch it) is only tried once; concurrent first callers
+    wait on a per-model lock for that attempt instead of repeating it.
+    """
+    with _lock:
+        if model in _encodings:
+            return _encodings[model]
+        model_lock = _encoding_locks.setdefault(model, threading.Lock())
+    with model_lock:
+        with _lock:
+            if model in _encodings:
+                return _encodings[model]
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken encoding for {model} unavailable, estimating tokens: {str(e)}")
+            encoding = None
+        with _lock:
+            _encodings[model] = encoding
+    return encoding
+
+
+def estimate_tokens(text):
+    """Approximate BPE token count: one per short word or symbol, more for long words"""
+    return sum(1 + (len(word) - 1) // 6 for word in _WORD_PATTERN.findall(text))
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """Count the tokens of a text for a model"""
+    text = str(text or '')
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages, model="gpt-3.5-turbo"):
+    """
+    Count the prompt tokens of a chat request
+
+    Args:
+        messages (list): LangChain messages, {"content": ...} dicts or strings
+    """
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        if isinstance(message, dict):
+            content = message.get('content', '')
+        else:
+            content = getattr(message, 'content', message)
+        total += TOKENS_PER_MESSAGE + count_tokens(content, model)
+    return total
+
+
+def record_task_usage(task, prompt_tokens, completion_tokens, seconds):
+    """
+    Record the locally counted tokens (None if not counted) and the latency
+    of one LLM request
+    """
+    if prompt_tokens is not None:
+        LLM_TASK_TOKENS_TOTAL.inc(prompt_tokens, task=task, type="prompt")
+    if completion_tokens is not None:
+        LLM_TASK_TOKENS_TOTAL.inc(completion_tokens, task=task, type="completion")
+    LLM_TASK_SECONDS.observe(seconds, task=task)
+
+
+def token_report():
+    """
+    Summarize the locally counted token usage and latency per task
+
+    Returns:
+        dict: Task -> requests, mean prompt/completion tokens and mean
+        latency in ms
+    """
+    tokens = {}
+    for key, value in LLM_TASK_TOKENS_TOTAL.samples().items():
+        labels = dict(key)
+        tokens[(labels.get('task'), labels.get('type'))] = value
+    report = {}
+    for key, series in LLM_TASK_SECONDS.samples().items():
+        task = dict(key).get('task')
+        requests = series['count']
+        if not requests:
+            continue
+        report[task] = {
+            "requests": requests,
+            "prompt_tokens": round(tokens.get((task, "prompt"), 0) / requests, 1),
+            "completion_tokens": round(tokens.get((task, "completion"), 0) / requests, 1),
+            "latency_ms": round(series['sum'] / requests * 1000, 1),
+        }
+    return report
+
+
+def savings_report(baseline, current):
+    """
+    Compare two token reports per task
+
+    Returns:
+        dict: Task -> tokens and latency saved per request, absolute and in
+        percent of the baseline
+    """
+    savings = {}
+    for task, before in baseline.items():
+        after = current.get(task)
+        if after is None:
+            continue
+        tokens_before = before['prompt_tokens'] + before['completion_tokens']
+        tokens_after = after['prompt_tokens'] + after['completion_tokens']
+        savings[task] = {
+            "tokens_saved": round(tokens_before - tokens_after, 1),
+            "tokens_saved_pct": round((1 - tokens_after / tokens_before) * 100, 1) if tokens_before else 0.0,
+            "latency_saved_ms": round(before['latency_ms'] - after['latency_ms'], 1),
+            "latency_saved_pct": (round((1 - after['latency_ms'] / before['latency_ms']) * 100, 1)
+                                  if before['latency_ms'] else 0.0),
+        }
+    return savings
@@ -0,0 +1,417 @@
+"""
+LLM Rate Limiter - Client-side scheduling of requests to the LLM API
+
+Every LLM request goes through an HTTP transport that, per model:
+
+- waits for capacity in two token buckets (requests/min and tokens/min),
+  serving waiting requests in priority order (larger price drops first),
+- retries 429s, 5xx responses and connection errors with exponential
+  backoff and full jitter, never sooner than the server's Retry-After, and
+- adapts to the server: a 429 pauses the model for every caller and halves
+  its refill rate, which recovers gradually as requests succeed.
+
+A request that still fails after the last retry is returned (or raised) to
+the LLM client, so the caller can dead-letter the event.
+"""
+
+import json
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+import httpx
+from config.settings import load_settings
+from core.metrics import LLM_RETRIES_TOTAL, RATE_LIMIT_WAIT_SECONDS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limited, or a transient server error
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# How often async waiters re-check a limiter they cannot be notified by
+_ASYNC_POLL_INTERVAL = 0.05
+
+_priority = contextvars.ContextVar('llm_priority', default=0.0)
+_scheduler = None
+_configured = False
+_scheduler_lock = threading.Lock()
+
+
+@contextmanager
+def llm_priority(priority):
+    """Serve LLM requests made inside the block with ``priority`` (higher first)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Continuously refilled token bucket (not thread-safe; guarded by the limiter)
+
+    Args:
+        per_minute (float): Refill rate
+        burst_seconds (float): Capacity, in seconds of refill; a small
+            burst spreads requests evenly over the minute
+    """
+
+    def __init__(self, per_minute, burst_seconds=1.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount, now, scale=1.0):
+        """Seconds until ``amount`` tokens are available (0.0 if they are now)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate * scale)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / (self.rate * scale)
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class ModelLimiter:
+    """
+    Request and token budgets of one model, shared by all threads and loops
+
+    Waiting requests are granted strictly in priority order, then FIFO.
+
+    Args:
+        model (str): Model name (for metrics)
+        requests_per_minute (float): Request budget (None for unlimited)
+        tokens_per_minute (float): Token budget (None for unlimited)
+        burst_seconds (float): Bucket capacity in seconds of refill
+        min_rate_scale (float): Lowest fraction of the budgets that repeated
+            429s can throttle the limiter down to
+        recovery (float): Fraction of the budgets regained per success
+    """
+
+    def __init__(self, model, requests_per_minute=None, tokens_per_minute=None,
+                 burst_seconds=1.0, min_rate_scale=0.1, recovery=0.05):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self.min_rate_scale = min_rate_scale
+        self.recovery = recovery
+        self.rate_scale = 1.0
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+        self._granted = threading.Condition(self._lock)
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _try_grant(self, ticket, tokens):
+        """
+        Grant ``ticket`` if it is first in line and the budgets allow it
+
+        Returns:
+            float or None: 0.0 if granted, else seconds until it might be,
+            or None if a higher-priority request is ahead
+        """
+        if self._waiters[0] != ticket:
+            return None
+        now = time.monotonic()
+        wait = self.paused_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now, self.rate_scale))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now, self.rate_scale))
+        if wait > 0:
+            return wait
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        heapq.heappop(self._waiters)
+        self._granted.notify_all()
+        return 0.0
+
+    def _withdraw(self, ticket):
+        self._waiters.remove(ticket)
+        heapq.heapify(self._waiters)
+        self._granted.notify_all()
+
+    def acquire(self, tokens=0, priority=0.0):
+        """Block until a request of ``tokens`` estimated tokens may be sent"""
+        start = time.monotonic()
+        with self._lock:
+            ticket = (-priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    wait = self._try_grant(ticket, tokens)
+                    if wait == 0.0:
+                        break
+                    self._granted.wait(wait)
+            except BaseException:
+                self._withdraw(ticket)
+                raise
+        RATE_LIMIT_WAIT_SECONDS.observe(time.monotonic() - start, model=self.model)
+
+    async def acquire_async(self, tokens=0, priority=0.0):
+        """Wait without blocking the event loop until a request may be sent"""
+        start = time.monotonic()
+        with self._lock:
+            ticket = (-priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_grant(ticket, tokens)
+                if wait == 0.0:
+                    break
+                await asyncio.sleep(_ASYNC_POLL_INTERVAL if wait is None else min(wait, 1.0))
+        except BaseException:
+            with self._lock:
+                self._withdraw(ticket)
+            raise
+        RATE_LIMIT_WAIT_SECONDS.observe(time.monotonic() - start, model=self.model)
+
+    def record_rate_limited(self, pause):
+        """Pause the model for ``pause`` seconds and halve its budgets"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self.rate_scale = max(self.min_rate_scale, self.rate_scale / 2)
+
+    def record_success(self):
+        """Regain part of the budgets lost to earlier 429s"""
+        if self.rate_scale < 1.0:
+            with self._lock:
+                self.rate_scale = min(1.0, self.rate_scale + self.recovery)
+
+
+def retry_after(response):
+    """Seconds the server asked us to wait (``retry-after-ms`` or ``Retry-After``), or None"""
+    for header, unit in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = response.headers.get(header)
+        if value is not None:
+            try:
+                return max(0.0, float(value) * unit)
+            except ValueError:
+                pass
+    return None
+
+
+class LLMScheduler:
+    """
+    Per-model limiters plus the retry policy
+
+    Args:
+        limits (dict): The "rate_limits" settings
+    """
+
+    def __init__(self, limits):
+        self.default_limits = limits.get('default', {})
+        self.model_limits = limits.get('models', {})
+        self.completion_tokens = limits.get('completion_tokens', 256)
+        self.max_retries = max(0, int(limits.get('max_retries', 5)))
+        self.backoff_base = limits.get('backoff_base', 0.5)
+        self.backoff_max = limits.get('backoff_max', 30.0)
+        self.burst_seconds = limits.get('burst_seconds', 1.0)
+        self.min_rate_scale = limits.get('min_rate_scale', 0.1)
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, model):
+        """Return the limiter of a model, creating it on first use"""
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                limits = self.model_limits.get(model, self.default_limits)
+                limiter = ModelLimiter(model, limits.get('requests_per_minute'),
+                                       limits.get('tokens_per_minute'), self.burst_seconds,
+                                       self.min_rate_scale)
+                self._limiters[model] = limiter
+            return limiter
+
+    def backoff(self, attempt, server_delay=None):
+        """Exponential backoff with full jitter, at least ``server_delay`` seconds"""
+        delay = random.uniform(0.0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, server_delay or 0.0)
+
+    def request_cost(self, request):
+        """
+        Model and estimated token cost of a completion request
+
+        Prompt tokens are estimated at four characters per token, plus the
+        request's completion cap for the reply: ``max_completion_tokens``
+        (what current OpenAI clients send), ``max_tokens``, or else
+        ``completion_tokens``.
+
+        Returns:
+            tuple: (model, tokens), or (None, 0) for requests that are not
+            completions (they bypass the limiter)
+        """
+        if request.method != "POST" or not request.url.path.endswith("/completions"):
+            return None, 0
+        try:
+            body = json.loads(request.content or b"{}")
+        except ValueError:
+            return None, 0
+        prompt = body.get('messages', body.get('prompt', ''))
+        completion = (body.get('max_completion_tokens') or body.get('max_tokens')
+                      or self.completion_tokens)
+        return body.get('model', 'default'), len(json.dumps(prompt)) // 4 + int(completion)
+
+    def should_retry(self, limiter, response, attempt):
+        """
+        Decide whether to retry after ``response``, updating the limiter
+
+        Returns:
+            float or None: Seconds to wait before retrying, or None to return
+            the response to the caller
+        """
+        if response.status_code not in RETRY_STATUSES:
+            limiter.record_success()
+            return None
+        server_delay = retry_after(response)
+        if response.status_code == 429:
+            limiter.record_rate_limited(server_delay or self.backoff(attempt))
+        if attempt >= self.max_retries:
+            logger.warning(f"LLM request to {limiter.model} failed with status "
+                           f"{response.status_code} after {attempt + 1} attempts")
+            return None
+        LLM_RETRIES_TOTAL.inc(model=limiter.model, reason=str(response.status_code))
+        return self.backoff(attempt, server_delay)
+
+    def should_retry_error(self, limiter, error, attempt):
+        """Seconds to wait before retrying after a connection error, or None to raise"""
+        if attempt >= self.max_retries:
+            return None
+        LLM_RETRIES_TOTAL.inc(model=limiter.model, reason=type(error).__name__)
+        return self.backoff(attempt)
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """
+    httpx transport that schedules and retries LLM requests
+
+    Args:
+        transport (httpx.BaseTransport): Transport that sends the requests
+        scheduler (LLMScheduler): Shared scheduler
+    """
+
+    def __init__(self, transport, scheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    def handle_request(self, request):
+        request.read()
+        model, tokens = self.scheduler.request_cost(request)
+        if model is None:
+            return self.transport.handle_request(request)
+
+        limiter = self.scheduler.limiter(model)
+        priority = _priority.get()
+        attempt = 0
+        while True:
+            limiter.acquire(tokens, priority)
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                delay = self.scheduler.should_retry_error(limiter, e, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self.scheduler.should_retry(limiter, response, attempt)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of ``RateLimitedTransport`` for ``httpx.AsyncClient``"""
+
+    def __init__(self, transport, scheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request):
+        await request.aread()
+        model, tokens = self.scheduler.request_cost(request)
+        if model is None:
+            return await self.transport.handle_async_request(request)
+
+        limiter = self.scheduler.limiter(model)
+        priority = _priority.get()
+        attempt = 0
+        while True:
+            await limiter.acquire_async(tokens, priority)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                delay = self.scheduler.should_retry_error(limiter, e, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self.scheduler.should_retry(limiter, response, attempt)
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def configure_scheduler(settings):
+    """
+    Create the process-wide LLM scheduler from the "rate_limits" settings
+
+    Only the first call in a process configures it; later calls return
+    the existing scheduler.
+
+    Returns:
+        LLMScheduler or None: None when rate limiting is disabled
+    """
+    global _scheduler, _configured
+    with _scheduler_lock:
+        if not _configured:
+            limits = (settings or {}).get('rate_limits', {})
+            _scheduler = LLMScheduler(limits) if limits.get('enabled', False) else None
+            _configured = True
+        return _scheduler
+
+
+def get_scheduler():
+    """Return the process-wide LLM scheduler (configured from settings.json if not yet configured)"""
+    if _configured:
+        return _scheduler
+    return configure_scheduler(load_settings())
+
+
+def make_transport(limits, scheduler=None):
+    """
+    Build the transport for the shared sync HTTP client
+
+    Returns:
+        httpx.BaseTransport: Pooled transport, rate limited when a scheduler is given
+    """
+    transport = httpx.HTTPTransport(limits=limits)
+    return transport if scheduler is None else RateLimitedTransport(transport, scheduler)
+
+
+def make_async_transport(limits, scheduler=None):
+    """Async counterpart of ``make_transport``"""
+    transport = httpx.AsyncHTTPTransport(limits=limits)
+    return transport if scheduler is None else AsyncRateLimitedTransport(transport, scheduler)
@@ -0,0 +1,302 @@
+"""
+Agent Registry - Shared LLM clients, cached agents and reusable crews
+
+Agent configurations come from the current configuration snapshot, one LLM
+client is kept per model configuration (all sharing a pooled HTTP client;
+agents get CrewAI LLMs, compact requests LangChain chat models),
+and agents and crews are cached per thread because CrewAI agents hold
+per-execution state. In compact prompt mode the crews are replaced by single
+chat requests. When agents.yaml or the "prompts" settings are reloaded
+everything is rebuilt; when only prompts.yaml is, just the crews are.
+"""
+
+import copy
+import logging
+import threading
+import httpx
+from crewai import Crew, Process, Task
+from langchain_core.messages import HumanMessage, SystemMessage
+from config.constants import (
+    API_REQUEST_TIMEOUT,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS
+)
+from agents.instrumentation import LLMMetricsHandler
+from agents.prompting import compact_mode, get_prompt_settings, max_tokens_for, system_prompt
+from agents.rate_limiter import get_scheduler, make_transport
+from agents.agent_factory import (
+    create_crew_llm, create_llm, create_pricing_analyst, create_notification_manager
+)
+from config.service import current_config, get_config_service
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Agent builders by configuration name
+AGENT_BUILDERS = {
+    "pricing_analyst": create_pricing_analyst,
+    "notification_manager": create_notification_manager,
+}
+
+_lock = threading.Lock()
+_metrics_handler = LLMMetricsHandler()
+_agent_configs = None
+_http_client = None
+_llms = {}
+_crew_llms = {}
+_generations = {"agents": 0, "crews": 0}
+_watched_service = None
+_local = threading.local()
+
+
+def _thread_cache(name):
+    """Return a per-thread cache dict, cleared whenever that cache is reset"""
+    caches = getattr(_local, 'caches', None)
+    if caches is None:
+        caches = _local.caches = {}
+    generation, cache = caches.get(name, (None, None))
+    if generation != _generations[name]:
+        cache = {}
+        caches[name] = (_generations[name], cache)
+    return cache
+
+
+def _watch_config():
+    """Subscribe to reloads of the agents and prompts; caller holds the lock"""
+    global _watched_service
+    service = get_config_service()
+    if service is None or service is _watched_service:
+        return
+    _watched_service = service
+    # The prompt settings decide the crew type, token caps and agent verbosity
+    service.subscribe(lambda snapshot, changed: reset_registry(), "agents", "settings.prompts")
+    service.subscribe(lambda snapshot, changed: reset_crews(), "prompts")
+
+
+def get_agent_configs():
+    """
+    Return agent configurations from the current configuration snapshot
+
+    Verbose agent and crew logging is switched off everywhere when the
+    "prompts.verbose_logging" setting is false.
+    """
+    global _agent_configs
+    with _lock:
+        if _agent_configs is None:
+            _watch_config()
+            configs = copy.deepcopy(current_config().agents)
+            if not get_prompt_settings().get('verbose_logging', True):
+                for section in configs.values():
+                    if isinstance(section, dict):
+                        section['verbose'] = False
+            _agent_configs = configs
+        return _agent_configs
+
+
+def get_http_client():
+    """
+    Return the process-wide pooled HTTP client used by all LLMs
+
+    Requests are scheduled and retried by the LLM rate limiter when
+    "rate_limits" is enabled.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            limits = httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            )
+            _http_client = httpx.Client(
+                timeout=API_REQUEST_TIMEOUT,
+                transport=make_transport(limits, get_scheduler()),
+            )
+        return _http_client
+
+
+def get_llm(model="gpt-3.5-turbo", temperature=0.3):
+    """
+    Return the shared LLM client for a model configuration
+
+    LangChain chat models are safe to share between threads, so a single
+    instance is kept per (model, temperature) pair.
+    """
+    key = (model, float(temperature))
+    with _lock:
+        llm = _llms.get(key)
+    if llm is None:
+        llm = create_llm(model=model, temperature=temperature, http_client=get_http_client(),
+                         callbacks=[_metrics_handler])
+        with _lock:
+            llm = _llms.setdefault(key, llm)
+            logger.info(f"LLM client ready for {model} (temperature {temperature})")
+    return llm
+
+
+def get_crew_llm(model="gpt-3.5-turbo", temperature=0.3):
+    """
+    Return the shared CrewAI LLM for a model configuration
+
+    CrewAI agents reject LangChain chat models, so agents get CrewAI LLMs
+    that send through the same pooled HTTP client and report to the same
+    metrics handler.
+    """
+    key = (model, float(temperature))
+    with _lock:
+        llm = _crew_llms.get(key)
+    if llm is None:
+        llm = create_crew_llm(model=model, temperature=temperature, http_client=get_http_client(),
+                              callbacks=[_metrics_handler])
+        with _lock:
+            llm = _crew_llms.setdefault(key, llm)
+    return llm
+
+
+def get_agent(name):
+    """
+    Return the calling thread's cached agent for a configuration name
+
+    Raises:
+        KeyError: If no builder exists for the agent name
+    """
+    agents = _thread_cache('agents')
+
+    if name not in agents:
+        configs = get_agent_configs()
+        agent_config = configs.get(name, {})
+        llm = get_crew_llm(agent_config.get('model', "gpt-3.5-turbo"),
+                           agent_config.get('temperature', 0.3))
+        agents[name] = AGENT_BUILDERS[name](configs=configs, llm=llm)
+    return agents[name]
+
+
+class CompactCrew:
+    """
+    Stand-in for a one-task crew in compact prompt mode
+
+    ``kickoff`` fills the task template and sends it as a single chat
+    request with a one-line system message, instead of running the agent's
+    ReAct loop.
+
+    Args:
+        llm: Shared LLM client
+        system (str): System message
+        template (str): Task template with ``{placeholders}``
+        max_tokens (int): Completion token cap (None for no cap)
+    """
+
+    def __init__(self, llm, system, template, max_tokens=None):
+        self.llm = llm
+        self.system = system
+        self.template = template
+        self.max_tokens = max_tokens
+
+    def kickoff(self, inputs=None):
+        messages = [SystemMessage(content=self.system),
+                    HumanMessage(content=self.template.format(**(inputs or {})))]
+        kwargs = {"max_tokens": self.max_tokens} if self.max_tokens else {}
+        return str(self.llm.invoke(messages, **kwargs).content).strip()
+
+
+def _get_single_task_crew(key, agent_name, description, expected_output, task):
+    """Return the calling thread's cached one-task crew for an agent"""
+    crews = _thread_cache('crews')
+
+    if key not in crews and compact_mode():
+        agent_config = get_agent_configs().get(agent_name, {})
+        llm = get_llm(agent_config.get('model', "gpt-3.5-turbo"), agent_config.get('temperature', 0.3))
+        crews[key] = CompactCrew(llm, system_prompt(agent_name, agent_config), description,
+                                 max_tokens_for(task))
+    elif key not in crews:
+        agent = get_agent(agent_name)
+        crew_config = get_agent_configs().get('crew', {})
+        task = Task(
+            description=description,
+            agent=agent,
+            expected_output=expected_output,
+        )
+        crews[key] = Crew(
+            agents=[agent],
+            tasks=[task],
+            verbose=crew_config.get('verbose', True),
+            process=Process.sequential,
+        )
+    return crews[key]
+
+
+def get_analysis_crew(pricing_template):
+    """
+    Return the calling thread's reusable analysis crew
+
+    The crew runs only the pricing analyst, which replies with a bare
+    ALERT or IGNORE verdict; notifications are produced separately by the
+    notification crew for ALERT events only. The task description keeps its
+    ``{placeholders}`` and is re-parameterised per event through
+    ``crew.kickoff(inputs=...)``.
+    """
+    return _get_single_task_crew(
+        ('analysis', pricing_template),
+        "pricing_analyst",
+        pricing_template,
+        "ALERT or IGNORE decision",
+        "analysis",
+    )
+
+
+def get_batch_analysis_crew(batch_template):
+    """
+    Return the calling thread's reusable batch analysis crew
+
+    The crew runs only the pricing analyst, which returns one JSON verdict
+    per event in the batch.
+    """
+    return _get_single_task_crew(
+        ('batch_analysis', batch_template),
+        "pricing_analyst",
+        batch_template,
+        "JSON array of per-event ALERT or IGNORE decisions",
+        "batch_analysis",
+    )
+
+
+def get_notification_crew(event_template, notification_template):
+    """
+    Return the calling thread's reusable notification crew
+
+    Used for events already decided as ALERT; the event details are
+    interpolated into ``event_template`` ahead of the notification prompt.
+    """
+    return _get_single_task_crew(
+        ('notification', event_template, notification_template),
+        "notification_manager",
+        f"{event_template}\n{notification_template}",
+        "Clear notification message with key details",
+        "notification",
+    )
+
+
+def reset_crews():
+    """
+    Drop the cached crews (after a prompt change)
+
+    Every thread rebuilds its crews, but keeps its agents, on next use.
+    """
+    with _lock:
+        _generations["crews"] += 1
+
+
+def reset_registry():
+    """
+    Drop cached configurations, LLM clients, agents and crews
+
+    Every thread rebuilds its agents and crews on next use.
+    """
+    global _agent_configs
+    with _lock:
+        _agent_configs = None
+        _llms.clear()
+        _crew_llms.clear()
+        for name in _generations:
+            _generations[name] += 1
+    logger.info("Agent registry reset")
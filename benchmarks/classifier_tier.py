@@ -0,0 +1,99 @@
+"""
+Classifier Tier Benchmark - Escalation rate and latency of the local tier
+
+Labels synthetic price events (run through the price history and the rule
+pre-filter, like in the pipeline) with a simulated analyst that alerts on
+drops past the threshold and is unsure near it, trains the decision
+classifier on part of them and evaluates it on the rest: accuracy, the
+escalation rate and local accuracy per confidence threshold, and the time
+per local decision compared with the mean analyst round trip.
+
+Usage:
+    python -m benchmarks.classifier_tier --events 20000
+    python -m benchmarks.classifier_tier --noise 0.01 --confidence 0.95
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+from config.service import current_config
+from core.decision_classifier import evaluate_model, extract_features, split_examples, train_model
+from core.feed import generate_catalog, synthetic_events
+from core.price_history import PriceHistory
+from core.rules import RULE_IGNORE, evaluate_event
+
+
+def simulated_analyst(features, noise, rng):
+    """ALERT/IGNORE label: certain far from the threshold, a coin flip near it"""
+    z = features["threshold_gap"] / noise + 1.5 * features["new_low"] - 0.5
+    return 1 if rng.random() < 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z)))) else 0
+
+
+def build_examples(args):
+    """
+    Generate (features, label) pairs for the events the analyst would see
+
+    Returns:
+        list: Examples in event order
+    """
+    config = current_config()
+    rng = random.Random(args.seed)
+    history = PriceHistory()
+    examples = []
+    catalog = generate_catalog(args.catalog_size, args.seed)
+    for _, event in synthetic_events(catalog, args.seed, count=args.events):
+        signal = history.observe(event)
+        if not signal.significant or evaluate_event(event)[0] == RULE_IGNORE:
+            continue
+        event['price_signal'] = signal.features()
+        features = extract_features(event, config)
+        if features is not None:
+            examples.append((features, simulated_analyst(features, args.noise, rng)))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local decision classifier against a simulated analyst")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=0.005,
+                        help="Width of the analyst's uncertain band around the threshold")
+    parser.add_argument("--confidence", type=float, default=0.9, help="Confidence threshold to report latency for")
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Mean analyst round trip in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    examples = build_examples(args)
+    training, holdout = split_examples(examples, 0.2, args.seed)
+    config = current_config()
+    basis = {"price_drop_threshold": config.price_drop_threshold, "categories": sorted(config.categories)}
+    start = time.perf_counter()
+    model = train_model(training, basis)
+    training_s = time.perf_counter() - start
+
+    timings = []
+    escalated = 0
+    for features, _ in holdout:
+        begin = time.perf_counter_ns()
+        p = model.predict_proba(features)
+        timings.append(time.perf_counter_ns() - begin)
+        escalated += max(p, 1 - p) < args.confidence
+    timings.sort()
+    escalation_rate = escalated / len(holdout) if holdout else 0.0
+    report = {
+        "examples": len(examples),
+        "training_s": round(training_s, 3),
+        "evaluation": evaluate_model(model, holdout),
+        "local_decision_us": {"p50": round(timings[len(timings) // 2] / 1000, 2),
+                              "p99": round(timings[int(len(timings) * 0.99)] / 1000, 2)},
+        # Expected analyst time per event with the tier in front of it
+        "mean_decision_ms": {"llm_only": round(args.llm_latency * 1000, 1),
+                             "tiered": round(escalation_rate * args.llm_latency * 1000, 1)},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
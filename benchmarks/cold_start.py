@@ -0,0 +1,113 @@
+"""
+Cold Start Benchmark - Time from process start to a ready pipeline
+
+Each scenario runs in a fresh interpreter and is timed from spawning the
+process until it reports readiness, so interpreter start-up and imports are
+included. Reports the median and maximum over several runs.
+
+Scenarios:
+    processor_ready   process_event consuming the input queue (agent
+                      frameworks are imported lazily / in the background)
+    eager_ready       the same, but importing the agent frameworks first,
+                      as the application did before startup became lazy
+    agent_frameworks  importing the agent registry (CrewAI, LangChain) alone
+    dashboard_imports importing the Streamlit dashboard
+
+Usage:
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --scenarios processor_ready --output cold.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+READY_MARKER = "COLD_START_READY"
+
+_PROCESSOR_READY = f"""
+import copy, threading
+from config.settings import load_settings
+from core.event_processor import process_event
+settings = copy.deepcopy(load_settings())
+settings.setdefault('metrics', {{}})['enabled'] = False
+settings.setdefault('startup', {{}})['preload_agents'] = False
+stop, ready = threading.Event(), threading.Event()
+thread = threading.Thread(target=process_event, args=(stop, settings, ready), daemon=True)
+thread.start()
+ready.wait()
+print("{READY_MARKER}", flush=True)
+stop.set()
+thread.join()
+"""
+
+SCENARIOS = {
+    "processor_ready": _PROCESSOR_READY,
+    "eager_ready": "import agents.registry\n" + _PROCESSOR_READY,
+    "agent_frameworks": f"import agents.registry\nprint('{READY_MARKER}', flush=True)\n",
+    "dashboard_imports": f"import ui.dashboard\nprint('{READY_MARKER}', flush=True)\n",
+}
+
+
+def time_scenario(code, timeout=120.0):
+    """
+    Run a scenario in a fresh interpreter
+
+    Returns:
+        float: Seconds from spawning the process until it printed the marker
+
+    Raises:
+        RuntimeError: If the process exits without becoming ready
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    try:
+        for line in process.stdout:
+            if line.strip() == READY_MARKER:
+                return time.perf_counter() - start
+        raise RuntimeError(f"Scenario exited with status {process.wait()} before becoming ready")
+    finally:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run_benchmark(scenarios, runs):
+    """
+    Time each scenario ``runs`` times
+
+    Returns:
+        dict: Median and maximum seconds per scenario
+    """
+    report = {}
+    for name in scenarios:
+        samples = [time_scenario(SCENARIOS[name]) for _ in range(runs)]
+        report[name] = {
+            "median_s": round(statistics.median(samples), 3),
+            "max_s": round(max(samples), 3),
+            "runs": runs,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of the pricing pipeline")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.scenarios, max(1, args.runs))
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
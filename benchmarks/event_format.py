@@ -0,0 +1,104 @@
+"""
+Event Format Benchmark - Dict events versus compact PriceEvents
+
+Compares the previous per-event dict with a formatted timestamp string
+against ``PriceEvent`` with an epoch-ns timestamp: construction cost,
+memory per retained event, and serialization (JSON per event versus the
+binary batch encoding) cost and size.
+
+Usage:
+    python -m benchmarks.event_format --events 200000
+"""
+
+import json
+import time
+import pickle
+import argparse
+import tracemalloc
+from datetime import datetime
+from core.events import TIMESTAMP_FORMAT, PriceEvent, decode_batch, encode_batch
+from core.feed import generate_catalog
+
+
+def make_dict_event(product, competitor_price):
+    return {
+        "product_id": product["id"],
+        "product_name": product["name"],
+        "category": product["category"],
+        "our_price": product["our_price"],
+        "competitor_price": competitor_price,
+        "timestamp": datetime.now().strftime(TIMESTAMP_FORMAT),
+        "emitted_ns": time.time_ns(),
+    }
+
+
+def make_price_event(product, competitor_price):
+    return PriceEvent(product["id"], product["name"], product["category"],
+                      product["our_price"], competitor_price, time.time_ns())
+
+
+def measure(factory, catalog, count, batch_size):
+    """
+    Build ``count`` events with ``factory`` and serialize them
+
+    Returns:
+        dict: Construction rate, bytes of memory per event, and the
+        serialization rates and encoded size per event
+    """
+    size = len(catalog)
+    tracemalloc.start()
+    start = time.perf_counter()
+    events = [factory(catalog[i % size], round(catalog[i % size]["our_price"] * 0.9, 2))
+              for i in range(count)]
+    build_s = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    batches = [events[i:i + batch_size] for i in range(0, count, batch_size)]
+    start = time.perf_counter()
+    if isinstance(events[0], PriceEvent):
+        encoded = [encode_batch(batch) for batch in batches]
+        encode_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for data in encoded:
+            decode_batch(data)
+    else:
+        encoded = [pickle.dumps(batch) for batch in batches]
+        encode_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for data in encoded:
+            pickle.loads(data)
+    decode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for event in events:
+        json.dumps(dict(event))
+    json_s = time.perf_counter() - start
+
+    return {
+        "build_eps": round(count / build_s),
+        "memory_bytes_per_event": round(memory / count),
+        "batch_encode_eps": round(count / encode_s),
+        "batch_decode_eps": round(count / decode_s),
+        "batch_bytes_per_event": round(sum(len(data) for data in encoded) / count, 1),
+        "json_eps": round(count / json_s),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dict events versus compact PriceEvents")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--catalog-size", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    catalog = generate_catalog(args.catalog_size)
+    report = {
+        "dict (pickled batches)": measure(make_dict_event, catalog, args.events, args.batch_size),
+        "PriceEvent (binary batches)": measure(make_price_event, catalog, args.events, args.batch_size),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Mock Alert Servers - Local stand-ins for the webhook and SMTP alert outputs
+
+A webhook receiver that records every JSON POST (optionally failing a
+fraction of them with a chosen HTTP status after a delay) and a minimal
+SMTP server that records every message it accepts (optionally answering
+a fraction of transactions with a transient 451), so alert delivery can be
+exercised offline.
+
+Usage:
+    python -m benchmarks.mock_alert_server --webhook-port 8766 --smtp-port 8025
+    python -m benchmarks.mock_alert_server --error-rate 0.2 --latency 0.1
+"""
+
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class _StandIn:
+    """Shared failure injection and recording"""
+
+    def _init_stand_in(self, latency=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.received = []
+        self.stats = {"requests": 0, "errors": 0, "connections": 0}
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def should_fail(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.stats["errors"] += 1
+            return failed
+
+    def record(self, item):
+        with self._lock:
+            self.received.append(item)
+
+
+class MockWebhookHandler(BaseHTTPRequestHandler):
+    """Records JSON POST bodies"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if server.latency:
+            time.sleep(server.latency)
+        if server.should_fail():
+            status, payload = server.error_status, b'{"error": "mock failure"}'
+        else:
+            try:
+                server.record(json.loads(body))
+                status, payload = 200, b'{"ok": true}'
+            except json.JSONDecodeError:
+                status, payload = 400, b'{"error": "invalid JSON"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockWebhookServer(_StandIn, ThreadingHTTPServer):
+    """Threaded webhook receiver"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, error_status=503, seed=None):
+        ThreadingHTTPServer.__init__(self, address, MockWebhookHandler)
+        self._init_stand_in(latency, error_rate, seed)
+        self.error_status = error_status
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/alerts"
+
+
+class MockSmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: HELO/EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.count("connections")
+        self.reply("220 mock ESMTP ready")
+        envelope = {"from": None, "to": []}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self.reply("250 mock")
+            elif verb == "MAIL":
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.should_fail():
+                    self.reply("451 Mock transient failure")
+                    continue
+                envelope = {"from": command[10:].strip(), "to": []}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(command[8:].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data.decode('utf-8', 'replace'))
+                server.record(dict(envelope, message="".join(lines)))
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class MockSmtpServer(_StandIn, socketserver.ThreadingTCPServer):
+    """Threaded SMTP receiver"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, seed=None):
+        socketserver.ThreadingTCPServer.__init__(self, address, MockSmtpHandler)
+        self._init_stand_in(latency, error_rate, seed)
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+def start_mock_webhook(host="127.0.0.1", port=0, **kwargs):
+    """
+    Start a mock webhook receiver on a background thread
+
+    Returns:
+        MockWebhookServer: Running server (call ``shutdown()`` to stop it)
+    """
+    server = MockWebhookServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Mock webhook listening on {server.url}")
+    return server
+
+
+def start_mock_smtp(host="127.0.0.1", port=0, **kwargs):
+    """
+    Start a mock SMTP server on a background thread
+
+    Returns:
+        MockSmtpServer: Running server (call ``shutdown()`` to stop it)
+    """
+    server = MockSmtpServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Mock SMTP server listening on {server.host}:{server.port}")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local webhook and SMTP stand-ins for alert delivery")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--webhook-port", type=int, default=8766)
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay per delivery in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of failed deliveries")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of failed webhook posts")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    webhook = start_mock_webhook(args.host, args.webhook_port, latency=args.latency,
+                                 error_rate=args.error_rate, error_status=args.error_status, seed=args.seed)
+    smtp = start_mock_smtp(args.host, args.smtp_port, latency=args.latency,
+                           error_rate=args.error_rate, seed=args.seed)
+    try:
+        while True:
+            time.sleep(5)
+            logger.info(f"Webhook: {webhook.stats}, SMTP: {smtp.stats}")
+    except KeyboardInterrupt:
+        webhook.shutdown()
+        smtp.shutdown()
+
+
+if __name__ == "__main__":
+    main()
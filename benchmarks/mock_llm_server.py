@@ -0,0 +1,274 @@
+"""
+Mock LLM Server - Local stand-in for the OpenAI chat completions API
+
+Answers ``POST /v1/chat/completions`` with a canned ReAct-style final answer
+after a configurable delay (and ``GET /v1/models`` immediately), so the pipeline can be exercised offline.
+Latency can follow a fixed, uniform, exponential or lognormal distribution,
+a fraction of requests can be failed with a chosen HTTP status (e.g. 429),
+and a requests-per-minute limit can be enforced with 429 responses to
+emulate the API's rate limiting. A per-token delay emulates the provider's
+cost of longer prompts and replies; prompts without the crew's ReAct
+instructions get a bare (JSON, where asked for) answer.
+
+Usage:
+    python -m benchmarks.mock_llm_server --port 8765 --latency 0.5
+    python -m benchmarks.mock_llm_server --latency 0.5 --latency-dist lognormal --error-rate 0.1 --error-status 429
+    python -m benchmarks.mock_llm_server --latency 0.2 --rate-limit 600
+    python -m benchmarks.mock_llm_server --latency 0.1 --token-latency 0.2
+"""
+
+import re
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the chat completions endpoint"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status):
+        body = json.dumps({"error": {
+            "message": "Rate limit reached" if status == 429 else "Mock server error",
+            "type": "rate_limit_error" if status == 429 else "server_error",
+            "code": status,
+        }}).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, completion_id, model, content):
+        """Send the answer as server-sent events, as for ``stream=true`` requests"""
+        created = int(time.time())
+
+        def chunk(delta, finish_reason=None):
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        body = (chunk({"role": "assistant", "content": ""})
+                + chunk({"content": content})
+                + chunk({}, "stop")
+                + "data: [DONE]\n\n").encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # Health checks and API key verification (model listing)
+        if self.path.rstrip('/').endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "gpt-3.5-turbo", "object": "model", "created": 0, "owned_by": "mock"},
+            ]})
+        else:
+            self._send_json(200, {"status": "ok"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip('/').endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        server = self.server
+        if not server.admit():
+            server.count_error()
+            self._send_error(429)
+            return
+
+        time.sleep(server.sample_latency())
+
+        if server.error_rate and server.rng.random() < server.error_rate:
+            server.count_error()
+            self._send_error(server.error_status)
+            return
+
+        prompt = json.dumps(request.get("messages", []))
+        batch_ids = re.findall(r"\bid=(\d+) \|", prompt)
+        if batch_ids:
+            answer = json.dumps([
+                {"id": int(i), "decision": "ALERT" if server.rng.random() < server.alert_ratio else "IGNORE"}
+                for i in dict.fromkeys(batch_ids)
+            ])
+        elif "ALERT" in prompt and "IGNORE" in prompt:
+            answer = "ALERT" if server.rng.random() < server.alert_ratio else "IGNORE"
+            if '\\"decision\\"' in prompt:
+                answer = json.dumps({"decision": answer})
+        elif '\\"sales\\"' in prompt:
+            answer = json.dumps({"sales": "Competitor undercut detected.", "product": "Review pricing.",
+                                 "actions": ["Review price"]})
+        else:
+            answer = "ALERT: competitor undercut detected. Sales and Product teams should review pricing."
+
+        if "Final Answer" in prompt:
+            content = f"Thought: I now know the final answer\nFinal Answer: {answer}"
+        else:
+            content = answer
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        time.sleep(server.token_latency * (prompt_tokens + completion_tokens) / 1000)
+
+        if request.get("stream"):
+            self._send_stream(f"chatcmpl-mock-{server.next_id()}", request.get("model", "mock"), content)
+            return
+
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{server.next_id()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the mock behaviour settings"""
+
+    daemon_threads = True
+    # Accept bursts of concurrent connections from async clients
+    request_queue_size = 1024
+
+    def __init__(self, address, latency=0.5, alert_ratio=0.5, seed=None,
+                 latency_dist="fixed", error_rate=0.0, error_status=500, rate_limit=None,
+                 token_latency=0.0):
+        super().__init__(address, MockLLMHandler)
+        self.latency = latency
+        self.token_latency = token_latency
+        self.latency_dist = latency_dist
+        self.alert_ratio = alert_ratio
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._window = (0, 0)
+
+    def admit(self):
+        """Count a request against the per-second share of ``rate_limit`` (requests/min)"""
+        if not self.rate_limit:
+            return True
+        second = int(time.monotonic())
+        with self._lock:
+            start, count = self._window
+            if start != second:
+                start, count = second, 0
+            self._window = (start, count + 1)
+            return count < max(1.0, self.rate_limit / 60.0)
+
+    def sample_latency(self):
+        """Draw a response delay (seconds) with mean ``latency``"""
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_dist == "uniform":
+            return self.rng.uniform(0.0, 2 * self.latency)
+        if self.latency_dist == "exponential":
+            return self.rng.expovariate(1.0 / self.latency)
+        if self.latency_dist == "lognormal":
+            sigma = 0.5
+            return self.rng.lognormvariate(math.log(self.latency) - sigma ** 2 / 2, sigma)
+        return self.latency
+
+    def next_id(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            return self.stats["requests"]
+
+    def count_error(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["errors"] += 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(host="127.0.0.1", port=0, **kwargs):
+    """
+    Start a mock server on a background thread
+
+    Returns:
+        MockLLMServer: Running server (call ``shutdown()`` to stop it)
+    """
+    server = MockLLMServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Mock LLM server listening on {server.base_url}")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Response delay in seconds")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--alert-ratio", type=float, default=0.5, help="Fraction of ALERT decisions")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of failed requests")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of failed requests")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Requests per minute before answering 429")
+    parser.add_argument("--token-latency", type=float, default=0.0,
+                        help="Extra delay in seconds per 1000 prompt and completion tokens")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), latency=args.latency,
+                           alert_ratio=args.alert_ratio, seed=args.seed,
+                           latency_dist=args.latency_dist, error_rate=args.error_rate,
+                           error_status=args.error_status, rate_limit=args.rate_limit,
+                           token_latency=args.token_latency)
+    logger.info(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Pipeline Benchmark - End-to-end throughput and latency against a mock LLM
+
+Runs the feed engine -> process_event -> OUTPUT_QUEUE path fully offline,
+with the agents pointed at the local mock LLM server, and reports
+throughput, end-to-end alert latency percentiles, queue depths and memory.
+Everything the pipeline writes (event log, dead letters, alert file, ...)
+goes to a temporary directory, never to the configured data/ paths.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --events 500 --rate 200 --latency 0.2 --workers 8
+    python -m benchmarks.pipeline_benchmark --output run.json --baseline previous.json
+    python -m benchmarks.pipeline_benchmark --mock-rate-limit 600 --rpm 540
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+from queue import Empty
+from benchmarks.mock_llm_server import start_mock_server, LATENCY_DISTRIBUTIONS
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0.0 if empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def isolate_outputs(settings, directory):
+    """Point every file the pipeline writes or learns from into ``directory``"""
+    settings.setdefault('event_log', {})['path'] = os.path.join(directory, "event_log")
+    settings.setdefault('dead_letter', {})['path'] = os.path.join(directory, "dead_letter.jsonl")
+    settings.setdefault('classifier', {})['model_path'] = os.path.join(directory, "decision_model.json")
+    settings.setdefault('startup', {})['check_cache_path'] = os.path.join(directory, "connectivity_check.json")
+    settings.setdefault('sharding', {})['path'] = os.path.join(directory, "shards")
+    outputs = settings.setdefault('alerts', {}).setdefault('outputs', {})
+    outputs.setdefault('file', {})['path'] = os.path.join(directory, "alerts.jsonl")
+    metrics = settings.setdefault('metrics', {})
+    if metrics.get('dump_path'):
+        metrics['dump_path'] = os.path.join(directory, "metrics.json")
+    return settings
+
+
+def run_benchmark(args):
+    """
+    Run one benchmark and return its report
+
+    Returns:
+        dict: Throughput, latency percentiles (ms), queue depths and memory
+    """
+    with tempfile.TemporaryDirectory(prefix="pipeline-benchmark-") as directory:
+        return _run_benchmark(args, directory)
+
+
+def _run_benchmark(args, directory):
+    server = start_mock_server(latency=args.latency, latency_dist=args.latency_dist,
+                               alert_ratio=args.alert_ratio, error_rate=args.error_rate,
+                               error_status=args.error_status, seed=args.seed,
+                               rate_limit=args.mock_rate_limit, token_latency=args.token_latency)
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+
+    # Import after the environment points at the mock server
+    from agents.prompting import token_report
+    from config.constants import INPUT_QUEUE, OUTPUT_QUEUE
+    from core.event_log import get_event_log
+    from core.event_processor import load_settings, process_event
+    from core.feed import FeedEngine, generate_catalog, synthetic_events
+    from core.metrics import DEAD_LETTERS_TOTAL, EVENTS_UNCHANGED_TOTAL, LLM_RETRIES_TOTAL
+
+    settings = isolate_outputs(copy.deepcopy(load_settings()), directory)
+    processing = settings.setdefault('processing', {})
+    processing['workers'] = args.workers
+    processing['batch_analysis'] = args.batch_analysis
+    processing['stats_interval'] = 3600
+    settings.setdefault('cache', {})['enabled'] = not args.no_cache
+    rate_limits = settings.setdefault('rate_limits', {})
+    rate_limits['enabled'] = not args.no_rate_limit
+    if args.rpm:
+        rate_limits['models'] = {}
+        rate_limits['default'] = {"requests_per_minute": args.rpm}
+    settings.setdefault('price_history', {})['enabled'] = not args.no_price_history
+    settings.setdefault('prompts', {})['mode'] = args.prompt_mode
+
+    catalog = generate_catalog(args.catalog_size, args.seed)
+    source = synthetic_events(catalog, args.seed, count=args.events)
+    feed = FeedEngine(source, INPUT_QUEUE, rate=args.rate)
+
+    latencies = []
+    depths = {"input": [], "output": []}
+    stop_processor = threading.Event()
+    stop_monitor = threading.Event()
+
+    def collect_alerts():
+        while not stop_monitor.is_set() or not OUTPUT_QUEUE.empty():
+            try:
+                alert = OUTPUT_QUEUE.get(timeout=0.1)
+            except Empty:
+                continue
+            if 'emitted_ns' in alert:
+                latencies.append((time.time_ns() - alert['emitted_ns']) / 1e6)
+
+    def sample_depths():
+        while not stop_monitor.is_set():
+            depths["input"].append(INPUT_QUEUE.qsize())
+            depths["output"].append(OUTPUT_QUEUE.qsize())
+            time.sleep(0.1)
+
+    processor = threading.Thread(target=process_event, args=(stop_processor, settings), daemon=True)
+    monitors = [threading.Thread(target=collect_alerts, daemon=True),
+                threading.Thread(target=sample_depths, daemon=True)]
+    for thread in monitors:
+        thread.start()
+
+    start = time.perf_counter()
+    processor.start()
+    feed_stats = feed.run()
+
+    # Let the processor drain its input, then shut it down gracefully
+    while not INPUT_QUEUE.empty():
+        time.sleep(0.05)
+    stop_processor.set()
+    processor.join()
+    elapsed = time.perf_counter() - start
+    event_log = get_event_log()
+    if event_log is not None:
+        event_log.close()
+
+    stop_monitor.set()
+    for thread in monitors:
+        thread.join()
+    server.shutdown()
+
+    return {
+        "events": feed_stats["emitted"],
+        "feed_rate": round(feed_stats["achieved_rate"], 2),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_eps": round(feed_stats["emitted"] / elapsed, 2) if elapsed else 0.0,
+        "alerts": len(latencies),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "queue_depth": {
+            "input_max": max(depths["input"], default=0),
+            "input_mean": round(sum(depths["input"]) / len(depths["input"]), 1) if depths["input"] else 0.0,
+            "output_max": max(depths["output"], default=0),
+        },
+        "llm_requests": server.stats["requests"],
+        "llm_errors": server.stats["errors"],
+        "llm_retries": sum(LLM_RETRIES_TOTAL.samples().values()),
+        "dead_letters": sum(DEAD_LETTERS_TOTAL.samples().values()),
+        "unchanged_events": sum(EVENTS_UNCHANGED_TOTAL.samples().values()),
+        "tokens": token_report(),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Compare a report against a baseline report
+
+    Returns:
+        list: Human readable regression descriptions (empty if none)
+    """
+    regressions = []
+    if report["throughput_eps"] < baseline["throughput_eps"] * (1 - tolerance):
+        regressions.append(f"throughput {report['throughput_eps']} < baseline {baseline['throughput_eps']}")
+    for key in ("p50", "p95", "p99"):
+        current, previous = report["latency_ms"][key], baseline["latency_ms"][key]
+        if previous and current > previous * (1 + tolerance):
+            regressions.append(f"latency {key} {current} ms > baseline {previous} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against a mock LLM")
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=None, help="Feed rate in events/sec (default: unlimited)")
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-analysis", action="store_true")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the decision cache")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean mock LLM latency in seconds")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--alert-ratio", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--mock-rate-limit", type=float, default=None,
+                        help="Requests/min the mock serves before answering 429")
+    parser.add_argument("--rpm", type=float, default=None, help="Client-side requests/min limit")
+    parser.add_argument("--no-rate-limit", action="store_true", help="Disable client-side rate limiting")
+    parser.add_argument("--token-latency", type=float, default=0.0,
+                        help="Mock LLM delay in seconds per 1000 tokens")
+    parser.add_argument("--prompt-mode", choices=("verbose", "compact"), default="verbose")
+    parser.add_argument("--no-price-history", action="store_true",
+                        help="Disable the price history (and unchanged-event suppression)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="Fail if worse than this earlier JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed regression fraction")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Prompt Savings Benchmark - Verbose vs compact prompts against the mock LLM
+
+Runs the pipeline benchmark once per prompt mode, each in its own process
+(the prompt mode is process-wide), with the mock charging latency per token,
+and reports the locally counted tokens and latency per task for both modes
+and what compact prompts saved.
+
+Usage:
+    python -m benchmarks.prompt_savings --events 200 --token-latency 0.05
+    python -m benchmarks.prompt_savings --batch-analysis --output savings.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from agents.prompting import savings_report
+
+
+def run_mode(mode, args):
+    """
+    Run the pipeline benchmark in a subprocess with one prompt mode
+
+    Returns:
+        dict: The pipeline benchmark's report
+    """
+    path = os.path.join(tempfile.mkdtemp(), f"{mode}.json")
+    command = [sys.executable, "-m", "benchmarks.pipeline_benchmark", "--prompt-mode", mode,
+               "--events", str(args.events), "--latency", str(args.latency),
+               "--token-latency", str(args.token_latency), "--workers", str(args.workers),
+               "--seed", str(args.seed), "--output", path]
+    if args.batch_analysis:
+        command.append("--batch-analysis")
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token and latency savings of compact prompts")
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-analysis", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean mock LLM base latency in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.05,
+                        help="Mock LLM delay in seconds per 1000 tokens")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    reports = {mode: run_mode(mode, args) for mode in ("verbose", "compact")}
+    result = {
+        "tokens": {mode: report["tokens"] for mode, report in reports.items()},
+        "savings": savings_report(reports["verbose"]["tokens"], reports["compact"]["tokens"]),
+        "throughput_eps": {mode: report["throughput_eps"] for mode, report in reports.items()},
+        "alerts": {mode: report["alerts"] for mode, report in reports.items()},
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
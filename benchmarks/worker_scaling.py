@@ -0,0 +1,75 @@
+"""
+Worker Scaling Benchmark - Events/sec versus analysis worker count
+
+Runs the agent analysis worker pool against the local mock LLM server and
+reports the achieved throughput for each worker count.
+
+Usage:
+    python -m benchmarks.worker_scaling --events 40 --workers 1 2 4 8 --latency 0.2
+"""
+
+import os
+import time
+import argparse
+import threading
+from benchmarks.mock_llm_server import start_mock_server
+
+
+def run_once(num_workers, num_events, products):
+    """Push ``num_events`` through a fresh pool and return events/sec"""
+    from core.event_processor import make_event_handler
+    from core.worker_pool import WorkerPool
+
+    done = threading.Semaphore(0)
+
+    def handler_factory():
+        handle = make_event_handler()
+
+        def counted(batch):
+            handle(batch)
+            for _ in batch:
+                done.release()
+
+        return counted
+
+    pool = WorkerPool(handler_factory, num_workers=num_workers, queue_size=num_events,
+                      name="bench-worker").start()
+    start = time.perf_counter()
+    for i in range(num_events):
+        pool.submit({
+            "product_id": i % products,
+            "product_name": f"Product {i % products}",
+            "category": "electronics",
+            "our_price": 100.0,
+            "competitor_price": 90.0,
+            "timestamp": "",
+        })
+    for _ in range(num_events):
+        done.acquire()
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return num_events / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure events/sec versus worker count")
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--products", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock LLM latency in seconds")
+    args = parser.parse_args()
+
+    server = start_mock_server(latency=args.latency, alert_ratio=0.5, seed=42)
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+
+    print(f"{'workers':>8} {'events/sec':>12}")
+    for workers in args.workers:
+        rate = run_once(workers, args.events, args.products)
+        print(f"{workers:>8} {rate:>12.2f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,20 @@ System constants for the AI Pricing Monitor
 
 from queue import Queue
 
-# Communication queues
-INPUT_QUEUE = Queue()
-OUTPUT_QUEUE = Queue()
+# Communication queues (hand-off only; bounded so producers feel back-pressure)
+INPUT_QUEUE_SIZE = 10000
+OUTPUT_QUEUE_SIZE = 1000
+INPUT_QUEUE = Queue(maxsize=INPUT_QUEUE_SIZE)
+OUTPUT_QUEUE = Queue(maxsize=OUTPUT_QUEUE_SIZE)
 
-# Monitored product categories
-DESIRED_CATEGORIES = ["electronics", "appliances", "smart home"]
+# Dashboard history sizes (the ring buffers live in core.event_store)
+EVENT_HISTORY_SIZE = 1000
+ALERT_HISTORY_SIZE = 500
 
-# Alert thresholds
-PRICE_DROP_THRESHOLD = 0.05  # 5%
+# Monitored categories, alert thresholds, the rule pre-filter and the emitter
+# timings are configured in settings.json ("monitoring" and "simulation") and
+# read through config.service.current_config(), so they can change without a
+# restart
 
 # Sample products (in production, this would come from a database)
 PRODUCTS = [
@@ -23,9 +28,5 @@ PRODUCTS = [
 
 # API request configuration
 API_REQUEST_TIMEOUT = 30  # seconds
-
-# Price emitter configuration
-MIN_EMITTER_DELAY = 0.5  # seconds
-MAX_EMITTER_DELAY = 1.5  # seconds
-PRICE_VARIATION_MIN = 0.8  # 80% of our price
-PRICE_VARIATION_MAX = 1.1  # 110% of our price
\ No newline at end of file
+HTTP_MAX_CONNECTIONS = 32  # pooled connections shared by all LLM clients
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 16
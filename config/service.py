@@ -0,0 +1,343 @@
+"""
+Config Service - Hot-reloadable configuration snapshots
+
+settings.json, agents.yaml and prompts.yaml are compiled into one immutable
+``ConfigSnapshot`` holding the parsed files plus the values the hot paths
+need in ready-to-use form (normalized category set, thresholds, emitter
+timings). Workers read ``current_config()``, a single attribute load with
+no lock, and keep one snapshot for the duration of a batch.
+
+A watcher thread polls the files' mtime and size; when one changes and its
+contents hash differently, the file is re-parsed, a new snapshot is swapped
+in atomically and only the subscribers of what changed (a settings section,
+the agents or the prompts) are notified, so for instance editing the alert
+outputs does not flush the decision cache. A file that fails to parse is
+logged and the previous snapshot stays in effect. Sections outside
+``LIVE_SECTIONS`` (queue sizes, worker counts, ...) are sized at startup and
+still need a restart.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import yaml
+from config.settings import SETTINGS_PATH, freeze, reload_settings, load_settings
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+AGENTS_PATH = 'config/agents.yaml'
+PROMPTS_PATH = 'config/prompts.yaml'
+
+# Settings sections that running workers pick up from the current snapshot
+LIVE_SECTIONS = ("monitoring", "simulation", "classifier", "prompts")
+
+# Used when settings.json lacks a key
+DEFAULT_MONITORING = {
+    "categories": ["electronics", "appliances", "smart home"],
+    "price_drop_threshold": 0.05,
+    "rule_prefilter": True,
+    "rule_ambiguity_margin": 0.01,
+}
+DEFAULT_SIMULATION = {
+    "min_delay": 0.5,
+    "max_delay": 1.5,
+    "price_variation_min": 0.8,
+    "price_variation_max": 1.1,
+}
+
+
+class ConfigSnapshot:
+    """
+    Immutable, precompiled view of the configuration files
+
+    Attributes:
+        version (int): Increases with every reload
+        settings (FrozenDict): Parsed settings.json
+        agents (FrozenDict): Parsed agents.yaml
+        prompts (FrozenDict): Parsed prompts.yaml
+        fingerprints (FrozenDict): Content hash per file ("settings",
+            "agents", "prompts")
+        category_names (tuple): Monitored categories as configured
+        categories (frozenset): Normalized monitored categories
+        price_drop_threshold (float): Alert threshold as a fraction
+        rule_prefilter (bool): Whether the rule pre-filter runs
+        rule_margin (float): Ambiguity band below the threshold
+        emitter_delay (tuple): (min, max) seconds between simulated events
+        price_variation (tuple): (min, max) simulated competitor/our price ratio
+        decision_version (str): Hash of everything a cached agent decision
+            depends on (prompts, agents, monitoring settings, prompt mode)
+    """
+
+    __slots__ = ('version', 'settings', 'agents', 'prompts', 'fingerprints', 'category_names',
+                 'categories', 'price_drop_threshold', 'rule_prefilter', 'rule_margin',
+                 'emitter_delay', 'price_variation', 'decision_version')
+
+    def __init__(self, version, settings, agents, prompts, fingerprints):
+        monitoring = dict(DEFAULT_MONITORING, **settings.get('monitoring', {}))
+        simulation = dict(DEFAULT_SIMULATION, **settings.get('simulation', {}))
+        decision_digest = hashlib.sha1()
+        for part in (fingerprints.get("prompts", ''), fingerprints.get("agents", ''),
+                     json.dumps(settings.get('monitoring', {}), sort_keys=True),
+                     str(settings.get('prompts', {}).get('mode', ''))):
+            decision_digest.update(part.encode('utf-8'))
+
+        values = {
+            'version': version,
+            'settings': settings,
+            'agents': agents,
+            'prompts': prompts,
+            'fingerprints': freeze(fingerprints),
+            'category_names': tuple(monitoring['categories']),
+            'categories': frozenset(str(c).strip().lower() for c in monitoring['categories']),
+            'price_drop_threshold': float(monitoring['price_drop_threshold']),
+            'rule_prefilter': bool(monitoring['rule_prefilter']),
+            'rule_margin': float(monitoring['rule_ambiguity_margin']),
+            'emitter_delay': (float(simulation['min_delay']), float(simulation['max_delay'])),
+            'price_variation': (float(simulation['price_variation_min']),
+                                float(simulation['price_variation_max'])),
+            'decision_version': decision_digest.hexdigest()[:12],
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is immutable")
+
+    __delattr__ = __setattr__
+
+
+def fingerprint_files(paths):
+    """
+    Hash the contents of a set of files
+
+    Missing files contribute a fixed marker so that creating or deleting a
+    file also changes the fingerprint.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(path.encode('utf-8'))
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b'<missing>')
+    return digest.hexdigest()[:12]
+
+
+def _stat(path):
+    """(mtime, size) of a file, or None if it cannot be read"""
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def _parse(path):
+    """Parse a JSON or YAML configuration file into a frozen mapping"""
+    with open(path, 'r') as f:
+        data = json.load(f) if path.endswith('.json') else yaml.safe_load(f)
+    return freeze(data or {})
+
+
+def _changed_keys(kind, old, new):
+    """Change keys of one file: ``settings.<section>`` per changed section, else the file kind"""
+    if kind != "settings":
+        return {kind}
+    return {f"settings.{section}" for section in set(old) | set(new) if old.get(section) != new.get(section)}
+
+
+class ConfigService:
+    """
+    Watches the configuration files and swaps in new snapshots
+
+    Args:
+        settings (dict): Initial settings (settings.json is read if omitted);
+            CLI or benchmark overrides stay in effect until the file changes
+        poll_interval (float): Seconds between mtime checks
+        settings_path (str): Path of settings.json
+        agents_path (str): Path of agents.yaml
+        prompts_path (str): Path of prompts.yaml
+    """
+
+    def __init__(self, settings=None, poll_interval=2.0, settings_path=SETTINGS_PATH,
+                 agents_path=AGENTS_PATH, prompts_path=PROMPTS_PATH):
+        self.poll_interval = poll_interval
+        self.files = {"settings": settings_path, "agents": agents_path, "prompts": prompts_path}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"checks": 0, "reloads": 0, "errors": 0}
+
+        self._stamps = {kind: _stat(path) for kind, path in self.files.items()}
+        fingerprints = {kind: fingerprint_files([path]) for kind, path in self.files.items()}
+        data = {}
+        for kind, path in self.files.items():
+            if kind == "settings" and settings is not None:
+                data[kind] = freeze(settings)
+                continue
+            try:
+                data[kind] = _parse(path)
+            except Exception as e:
+                logger.error(f"Failed to load {path}: {str(e)}")
+                data[kind] = freeze({})
+        self.snapshot = ConfigSnapshot(1, data["settings"], data["agents"], data["prompts"],
+                                       fingerprints)
+
+    def subscribe(self, callback, *keys):
+        """
+        Call ``callback(snapshot, changed)`` after a reload that changed any
+        of ``keys``
+
+        Keys are "agents", "prompts", "settings" (any section) or
+        "settings.<section>". Callbacks run on the watcher thread.
+        """
+        with self._lock:
+            self._subscribers.append((callback, keys))
+
+    def check(self):
+        """
+        Reload the files that changed since the last check
+
+        Returns:
+            set: Change keys of the new snapshot (empty if nothing changed)
+        """
+        self.stats["checks"] += 1
+        current = self.snapshot
+        data = {"settings": current.settings, "agents": current.agents, "prompts": current.prompts}
+        fingerprints = dict(current.fingerprints)
+        changed = set()
+        for kind, path in self.files.items():
+            stamp = _stat(path)
+            if stamp == self._stamps[kind]:
+                continue
+            self._stamps[kind] = stamp
+            fingerprint = fingerprint_files([path])
+            if fingerprint == fingerprints[kind]:
+                continue
+            try:
+                parsed = _parse(path)
+            except Exception as e:
+                # Keep the last good snapshot; the next write changes the stamp again
+                self.stats["errors"] += 1
+                logger.error(f"Ignoring invalid {path}: {str(e)}")
+                continue
+            fingerprints[kind] = fingerprint
+            changed |= _changed_keys(kind, data[kind], parsed)
+            data[kind] = parsed
+            if kind == "settings":
+                reload_settings(path)
+        if not changed:
+            return changed
+
+        self.snapshot = ConfigSnapshot(current.version + 1, data["settings"], data["agents"],
+                                       data["prompts"], fingerprints)
+        self.stats["reloads"] += 1
+        logger.info(f"Configuration reloaded (version {self.snapshot.version}): {', '.join(sorted(changed))}")
+        restart = sorted(key for key in changed
+                         if key.startswith("settings.") and key[len("settings."):] not in LIVE_SECTIONS)
+        if restart:
+            logger.warning(f"Changed settings take effect after a restart: {', '.join(restart)}")
+        self._notify(changed)
+        return changed
+
+    def _notify(self, changed):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, keys in subscribers:
+            if not any(key in changed or any(c.startswith(key + ".") for c in changed) for key in keys):
+                continue
+            try:
+                callback(self.snapshot, changed)
+            except Exception as e:
+                logger.error(f"Configuration subscriber failed: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Configuration check failed: {str(e)}")
+
+    def start(self):
+        """Start polling the files on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+            logger.info(f"Watching configuration files every {self.poll_interval}s")
+        return self
+
+    def close(self):
+        """Stop polling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1.0)
+            self._thread = None
+
+    def get_stats(self):
+        """Counters plus the current snapshot version"""
+        return dict(self.stats, version=self.snapshot.version)
+
+
+_lock = threading.Lock()
+_service = None
+_static_snapshot = None
+
+
+def open_config_service(settings=None):
+    """
+    Create the process-wide config service (first call wins)
+
+    The files are only watched when "hot_reload.enabled" is true; otherwise
+    the snapshot built from ``settings`` stays in effect.
+
+    Returns:
+        ConfigService: The shared service
+    """
+    global _service
+    with _lock:
+        if _service is None:
+            settings = load_settings() if settings is None else settings
+            hot_reload = settings.get('hot_reload', {})
+            _service = ConfigService(settings, hot_reload.get('poll_interval', 2.0))
+            if hot_reload.get('enabled', False):
+                _service.start()
+        return _service
+
+
+def get_config_service():
+    """Return the process-wide config service, or None if not opened"""
+    return _service
+
+
+def current_config():
+    """
+    Return the current configuration snapshot
+
+    Without an open service, a snapshot of the files on disk is built once
+    and never reloaded.
+    """
+    service = _service
+    if service is not None:
+        return service.snapshot
+    global _static_snapshot
+    if _static_snapshot is None:
+        with _lock:
+            if _static_snapshot is None:
+                _static_snapshot = ConfigService(load_settings()).snapshot
+    return _static_snapshot
+
+
+def close_config_service():
+    """Stop watching the files and drop the process-wide service"""
+    global _service
+    with _lock:
+        service, _service = _service, None
+    if service is not None:
+        service.close()
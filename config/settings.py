@@ -0,0 +1,94 @@
+"""
+Shared Settings - config/settings.json loaded once per process
+
+Every module used to re-read and re-parse settings.json on its own. The
+file is now loaded on first use into a read-only mapping that all callers
+share; code that needs to adjust settings (benchmarks, CLI overrides,
+per-shard copies) takes a mutable copy with ``copy.deepcopy``.
+"""
+
+import json
+import logging
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SETTINGS_PATH = 'config/settings.json'
+
+_lock = threading.Lock()
+_settings = {}
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict
+
+    Still a ``dict`` (so ``json.dumps``, ``st.json`` and ``isinstance`` checks
+    keep working) but every mutating method raises TypeError. ``deepcopy``
+    returns plain, mutable dicts and lists.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Settings are read-only; use copy.deepcopy() for a mutable copy")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Recursively convert a frozen value back to plain dicts and lists"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def load_settings(path=SETTINGS_PATH):
+    """
+    Load application settings, parsing the file only once per process
+
+    Returns:
+        FrozenDict: Shared read-only settings (empty if the file cannot be
+            read; a failed load is retried on the next call)
+    """
+    settings = _settings.get(path)
+    if settings is not None:
+        return settings
+    with _lock:
+        if path not in _settings:
+            try:
+                with open(path, 'r') as f:
+                    _settings[path] = freeze(json.load(f))
+            except Exception as e:
+                logger.error(f"Failed to load settings: {str(e)}")
+                return FrozenDict()
+        return _settings[path]
+
+
+def reload_settings(path=SETTINGS_PATH):
+    """Drop the cached settings so the next ``load_settings`` re-reads the file"""
+    with _lock:
+        _settings.pop(path, None)
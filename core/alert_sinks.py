@@ -0,0 +1,525 @@
+"""
+Alert Sinks - Deduplicated, batched delivery of alerts to external outputs
+
+Alerts published by the processor are handed to an ``AlertDispatcher``,
+which delivers them from its own asyncio event loop thread so that the
+processing workers never wait on the network:
+
+    emit_alert -> submit (bounded inbox) -> dedupe -> digest -> outputs
+
+Repeat alerts for a product within the dedupe window are dropped unless the
+competitor price fell further. The remaining alerts are collected into
+digests (one message per ``digest_max_alerts`` alerts or ``digest_max_wait``
+seconds) and sent to every configured output -- a JSONL file, a webhook over
+a pooled ``httpx.AsyncClient``, or SMTP over a reused connection -- with
+jittered exponential backoff on transient failures. Digests that still fail
+are dead-lettered.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import smtplib
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from email.message import EmailMessage
+from core.dead_letter import get_dead_letter_queue
+from core.metrics import (
+    ALERTS_DEDUPLICATED_TOTAL, ALERT_DELIVERIES_TOTAL, ALERT_DELIVERY_SECONDS
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying a webhook delivery on
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class AlertDeduper:
+    """
+    Per-product dedupe window
+
+    An alert is admitted if its product has not alerted within ``window``
+    seconds, or if its competitor price is below the one last admitted.
+
+    Args:
+        window (float): Dedupe window in seconds (0 admits every alert)
+        max_products (int): Products remembered before the oldest is forgotten
+    """
+
+    def __init__(self, window=300.0, max_products=100000):
+        self.window = window
+        self.max_products = max(1, int(max_products))
+        # Product -> (expiry, competitor price), in expiry order
+        self._seen = OrderedDict()
+
+    def admit(self, alert, now=None):
+        """Whether the alert should be delivered (records it if so)"""
+        if not self.window:
+            return True
+        now = time.monotonic() if now is None else now
+        while self._seen:
+            key, (expires, _) = next(iter(self._seen.items()))
+            if expires > now and len(self._seen) <= self.max_products:
+                break
+            del self._seen[key]
+
+        key = alert.get('product_id')
+        price = _price(alert.get('competitor_price'))
+        entry = self._seen.get(key)
+        if entry is not None and not price < entry[1]:
+            return False
+        self._seen[key] = (now + self.window, price)
+        self._seen.move_to_end(key)
+        return True
+
+
+def _price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+def format_digest(alerts):
+    """
+    Build one digest message from a list of alerts
+
+    Returns:
+        dict: subject, text (plain-text body), created_at and the alerts as
+        plain dicts
+    """
+    lines = []
+    for alert in alerts:
+        our_price = _price(alert.get('our_price'))
+        competitor_price = _price(alert.get('competitor_price'))
+        drop = (our_price - competitor_price) / our_price * 100 if 0 < our_price < float('inf') else 0.0
+        lines.append(f"- {alert.get('product_name')} ({alert.get('category')}): competitor "
+                     f"${alert.get('competitor_price')} vs our ${alert.get('our_price')} ({drop:.1f}% below)")
+        details = str(alert.get('alert_details') or '').strip()
+        if details:
+            lines.extend(f"    {line}" for line in details.splitlines())
+    names = ", ".join(str(alert.get('product_name')) for alert in alerts[:3])
+    if len(alerts) > 3:
+        names += f" and {len(alerts) - 3} more"
+    plural = "s" if len(alerts) > 1 else ""
+    return {
+        "subject": f"[Pricing Monitor] {len(alerts)} price alert{plural}: {names}",
+        "text": "\n".join(lines),
+        "created_at": datetime.now().isoformat(),
+        "alerts": [dict(alert) for alert in alerts],
+    }
+
+
+class FileSink:
+    """
+    Appends each digest as one JSON line
+
+    Args:
+        path (str): JSONL file
+    """
+
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def _write(self, line):
+        with open(self.path, 'a') as f:
+            f.write(line)
+
+    async def send(self, digest):
+        await asyncio.to_thread(self._write, json.dumps(digest, default=str) + "\n")
+
+    async def close(self):
+        pass
+
+
+class WebhookSink:
+    """
+    POSTs each digest as JSON over a pooled HTTP client
+
+    Args:
+        url (str): Webhook URL
+        headers (dict): Extra request headers (e.g. authorization)
+        timeout (float): Request timeout in seconds
+        max_connections (int): Pooled connections to the webhook
+    """
+
+    name = "webhook"
+
+    def __init__(self, url, headers=None, timeout=10.0, max_connections=4):
+        self.url = url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+
+    async def send(self, digest):
+        import httpx
+
+        # Created on first use so that it belongs to the dispatcher's loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections))
+        response = await self._client.post(self.url, content=json.dumps(digest, default=str),
+                                           headers={"Content-Type": "application/json", **self.headers})
+        response.raise_for_status()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class SmtpSink:
+    """
+    Mails each digest over one reused SMTP connection
+
+    smtplib is blocking, so the connection is driven from a worker thread
+    and serialized with a lock; it is reopened when the server drops it.
+
+    Args:
+        host (str): SMTP server
+        port (int): SMTP port
+        sender (str): From address
+        recipients (list): To addresses
+        username (str): Login user (None to skip login)
+        password (str): Login password
+        starttls (bool): Upgrade the connection with STARTTLS
+        timeout (float): Socket timeout in seconds
+    """
+
+    name = "smtp"
+
+    def __init__(self, host="localhost", port=25, sender="pricing-monitor@localhost", recipients=(),
+                 username=None, password=None, starttls=False, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password or '')
+        return smtp
+
+    def _send(self, message):
+        with self._lock:
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = self._connect()
+                self._smtp.send_message(message)
+            except smtplib.SMTPResponseException:
+                # smtplib has already reset the transaction; the connection is usable
+                raise
+            except OSError:
+                self._drop_connection()
+                raise
+
+    def _drop_connection(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except OSError:
+                pass
+            self._smtp = None
+
+    async def send(self, digest):
+        message = EmailMessage()
+        message["Subject"] = digest["subject"]
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.recipients)
+        message.set_content(digest["text"])
+        await asyncio.to_thread(self._send, message)
+
+    def _quit(self):
+        with self._lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._smtp = None
+
+    async def close(self):
+        await asyncio.to_thread(self._quit)
+
+
+def is_retryable(error):
+    """Whether a delivery error is transient (network errors, 429/5xx, SMTP 4xx)"""
+    import httpx
+
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return status in RETRY_STATUSES
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    return isinstance(error, (OSError, smtplib.SMTPException, asyncio.TimeoutError, httpx.TransportError))
+
+
+class AlertDispatcher:
+    """
+    Delivers alerts to the outputs from a background event loop
+
+    ``submit`` only appends to a bounded inbox and wakes the loop, so it
+    never blocks; once the inbox is full the oldest undelivered alert is
+    dropped.
+
+    Args:
+        sinks (list): Outputs with async ``send(digest)`` and ``close()``
+        dedupe_window (float): Per-product dedupe window in seconds
+        digest_max_alerts (int): Alerts per digest before it is sent
+        digest_max_wait (float): Seconds a digest waits for more alerts
+        queue_size (int): Alerts held in the inbox
+        max_in_flight (int): Concurrent deliveries per output
+        max_retries (int): Retries of a failed delivery
+        backoff_base (float): First retry delay in seconds
+        backoff_max (float): Longest retry delay in seconds
+    """
+
+    def __init__(self, sinks, dedupe_window=300.0, digest_max_alerts=20, digest_max_wait=10.0,
+                 queue_size=1000, max_in_flight=4, max_retries=5, backoff_base=0.5, backoff_max=30.0):
+        self.sinks = list(sinks)
+        self.deduper = AlertDeduper(dedupe_window)
+        self.digest_max_alerts = max(1, int(digest_max_alerts))
+        self.digest_max_wait = digest_max_wait
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._inbox = deque(maxlen=max(1, int(queue_size)))
+        self._loop = None
+        self._wakeup = None
+        self._closing = False
+        self._thread = None
+        self._started = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {"submitted": 0, "dropped": 0, "deduplicated": 0, "digests": 0,
+                      "delivered": 0, "retries": 0, "failed": 0}
+
+    def start(self):
+        """Start the delivery thread; returns self"""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()),
+                                        name="alert-dispatcher", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def submit(self, alert):
+        """Queue an alert for delivery without blocking"""
+        if len(self._inbox) == self._inbox.maxlen:
+            self._count("dropped")
+            logger.warning("Alert inbox full; dropping oldest undelivered alert")
+        self._inbox.append(alert)
+        self._count("submitted")
+        if self._loop is not None and not self._closing:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def close(self, timeout=30.0):
+        """Send what is pending, wait for in-flight deliveries and stop"""
+        if self._thread is None:
+            return
+        self._closing = True
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Alert dispatcher did not finish delivering within the timeout")
+
+    def get_stats(self):
+        """Delivery counters plus alerts waiting in the inbox"""
+        with self._stats_lock:
+            return dict(self.stats, pending=len(self._inbox))
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        semaphores = {id(sink): asyncio.Semaphore(self.max_in_flight) for sink in self.sinks}
+        deliveries = set()
+        digest = []
+        deadline = None
+        self._started.set()
+
+        def flush():
+            nonlocal digest, deadline
+            message = format_digest(digest)
+            self._count("digests")
+            for sink in self.sinks:
+                task = asyncio.create_task(self._deliver(sink, message, semaphores[id(sink)]))
+                deliveries.add(task)
+                task.add_done_callback(deliveries.discard)
+            digest, deadline = [], None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while self._inbox:
+                alert = self._inbox.popleft()
+                if not self.deduper.admit(alert):
+                    self._count("deduplicated")
+                    ALERTS_DEDUPLICATED_TOTAL.inc()
+                    continue
+                digest.append(alert)
+                if deadline is None:
+                    deadline = time.monotonic() + self.digest_max_wait
+                if len(digest) >= self.digest_max_alerts:
+                    flush()
+            if digest and (self._closing or time.monotonic() >= deadline):
+                flush()
+            if self._closing and not self._inbox:
+                break
+
+        if deliveries:
+            await asyncio.gather(*deliveries, return_exceptions=True)
+        for sink in self.sinks:
+            try:
+                await sink.close()
+            except Exception as e:
+                logger.error(f"Failed to close {sink.name} alert output: {str(e)}")
+
+    async def _deliver(self, sink, digest, semaphore):
+        start = time.perf_counter()
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await sink.send(digest)
+                    break
+                except Exception as e:
+                    if attempt < self.max_retries and is_retryable(e):
+                        self._count("retries")
+                        ALERT_DELIVERIES_TOTAL.inc(sink=sink.name, outcome="retried")
+                        delay = random.uniform(0.0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                        logger.warning(f"{sink.name} alert delivery failed ({str(e)}); "
+                                       f"retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    self._fail(sink, digest, e, attempt + 1)
+                    return
+        self._count("delivered")
+        ALERT_DELIVERIES_TOTAL.inc(sink=sink.name, outcome="delivered")
+        ALERT_DELIVERY_SECONDS.observe(time.perf_counter() - start, sink=sink.name)
+
+    def _fail(self, sink, digest, error, attempts):
+        self._count("failed")
+        ALERT_DELIVERIES_TOTAL.inc(sink=sink.name, outcome="failed")
+        logger.error(f"{sink.name} alert delivery failed after {attempts} attempts: {str(error)}")
+        dead_letters = get_dead_letter_queue()
+        if dead_letters is not None:
+            for alert in digest["alerts"]:
+                dead_letters.put(alert, error, stage=f"delivery:{sink.name}")
+
+
+def make_sinks(outputs):
+    """
+    Build the enabled outputs from the "alerts.outputs" settings
+
+    Returns:
+        list: Output instances
+    """
+    sinks = []
+    file_settings = outputs.get('file', {})
+    if file_settings.get('enabled', False):
+        sinks.append(FileSink(file_settings.get('path', 'data/alerts.jsonl')))
+
+    webhook = outputs.get('webhook', {})
+    if webhook.get('enabled', False):
+        if webhook.get('url'):
+            sinks.append(WebhookSink(webhook['url'], webhook.get('headers'),
+                                     webhook.get('timeout', 10.0), webhook.get('max_connections', 4)))
+        else:
+            logger.error("Webhook alert output enabled without a url")
+
+    smtp = outputs.get('smtp', {})
+    if smtp.get('enabled', False):
+        if smtp.get('recipients'):
+            sinks.append(SmtpSink(smtp.get('host', 'localhost'), smtp.get('port', 25),
+                                  smtp.get('sender', 'pricing-monitor@localhost'), smtp['recipients'],
+                                  smtp.get('username'), os.environ.get(smtp.get('password_env') or '', None),
+                                  smtp.get('starttls', False), smtp.get('timeout', 10.0)))
+        else:
+            logger.error("SMTP alert output enabled without recipients")
+    return sinks
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def open_alert_dispatcher(settings):
+    """
+    Return the process-wide alert dispatcher, starting it on first use
+
+    Args:
+        settings (dict): Application settings (uses the "alerts" section)
+
+    Returns:
+        AlertDispatcher or None: The dispatcher, or None if alert delivery is
+        disabled or no output is configured
+    """
+    global _dispatcher
+    alert_settings = (settings or {}).get('alerts', {})
+    if not alert_settings.get('enabled', False):
+        return None
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            sinks = make_sinks(alert_settings.get('outputs', {}))
+            if not sinks:
+                return None
+            _dispatcher = AlertDispatcher(
+                sinks,
+                dedupe_window=alert_settings.get('dedupe_window', 300.0),
+                digest_max_alerts=alert_settings.get('digest_max_alerts', 20),
+                digest_max_wait=alert_settings.get('digest_max_wait', 10.0),
+                queue_size=alert_settings.get('queue_size', 1000),
+                max_in_flight=alert_settings.get('max_in_flight', 4),
+                max_retries=alert_settings.get('max_retries', 5),
+                backoff_base=alert_settings.get('backoff_base', 0.5),
+                backoff_max=alert_settings.get('backoff_max', 30.0),
+            ).start()
+            logger.info(f"Delivering alerts to {', '.join(sink.name for sink in sinks)}")
+        return _dispatcher
+
+
+def get_alert_dispatcher():
+    """Return the process-wide alert dispatcher if it is running, else None"""
+    return _dispatcher
+
+
+def close_alert_dispatcher(timeout=30.0):
+    """Flush and stop the process-wide alert dispatcher, if one is running"""
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.close(timeout)
@@ -0,0 +1,578 @@
+"""
+Async Pipeline - Asyncio runtime for the price monitoring pipeline
+
+Runs the pipeline as stages connected by bounded channels on one event loop:
+
+    source -> dedupe -> [coalesce] -> rules -> llm -> notify -> sinks
+
+Each stage runs a configurable number of concurrent workers; a full channel
+suspends the upstream stage (back-pressure). LLM calls are made with async
+HTTP, so thousands of requests can be in flight without one OS thread each.
+The runtime needs no Streamlit and can run headless.
+
+Usage:
+    python -m core.async_pipeline --duration 60
+    python -m core.async_pipeline --events 10000
+"""
+
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from queue import Empty
+import httpx
+from config.constants import INPUT_QUEUE, PRODUCTS, API_REQUEST_TIMEOUT
+from config.service import close_config_service, current_config, open_config_service
+from config.settings import load_settings
+from agents.prompting import configure_prompts, max_tokens_for, select_templates
+from agents.rate_limiter import configure_scheduler, llm_priority, make_async_transport
+from core.batch_analysis import parse_verdict
+from core.alert_sinks import open_alert_dispatcher, close_alert_dispatcher
+from core.coalescing import make_coalescer
+from core.decision_classifier import get_classifier, open_classifier
+from core.event_log import open_event_log
+from core.event_store import EVENT_HISTORY
+from core.dead_letter import open_dead_letter_queue
+from core.event_processor import (
+    load_prompts, make_decision_cache, build_crew_inputs, event_priority, dead_letter_event,
+    commit_decision, apply_decision, apply_cached_decision, collapse_event, filter_unchanged
+)
+from core.feed import synthetic_events
+from core.metrics import ERRORS_TOTAL, EVENTS_TOTAL, start_metrics_exporter
+from core.price_emitter import load_products, make_feed_source
+from core.price_history import PriceHistory, make_price_history
+from core.rules import RULE_IGNORE, evaluate_event
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Marks the end of a channel; passed on once every upstream worker is done
+_CLOSED = object()
+
+# Default stage configuration (overridden by the "pipeline" settings)
+DEFAULT_STAGES = {
+    "dedupe": {"enabled": True, "concurrency": 1},
+    "rules": {"concurrency": 1},
+    "llm": {"concurrency": 256, "timeout": 60.0},
+    "notify": {"concurrency": 32, "timeout": 60.0},
+    "sinks": {"concurrency": 1},
+}
+
+
+class Stage:
+    """
+    One pipeline stage
+
+    Args:
+        name (str): Stage name (used in logs, stats and error metrics)
+        handler (coroutine function): Called with each item; returns an
+            iterable of items for the next stage, or None to drop the item
+        concurrency (int): Number of concurrent workers
+        timeout (float): Optional per-item time limit in seconds
+        on_error (callable): Called with the item, the exception and the
+            stage name when the handler fails or times out
+    """
+
+    def __init__(self, name, handler, concurrency=1, timeout=None, on_error=None):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.on_error = on_error
+        self.stats = {"in": 0, "out": 0, "errors": 0}
+
+    async def _worker(self, inbox, outbox):
+        while True:
+            item = await inbox.get()
+            if item is _CLOSED:
+                # Leave the marker for this stage's other workers
+                inbox.put_nowait(_CLOSED)
+                return
+            self.stats["in"] += 1
+            try:
+                if self.timeout:
+                    results = await asyncio.wait_for(self.handler(item), self.timeout)
+                else:
+                    results = await self.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Pipeline stage {self.name} error: {str(e) or type(e).__name__}")
+                if self.on_error is not None:
+                    self.on_error(item, e, self.name)
+                else:
+                    ERRORS_TOTAL.inc(stage=self.name)
+                continue
+            for result in results or ():
+                self.stats["out"] += 1
+                if outbox is not None:
+                    await outbox.put(result)
+
+    async def run(self, inbox, outbox):
+        """Run all workers until the inbox is closed, then close the outbox"""
+        await asyncio.gather(*(self._worker(inbox, outbox) for _ in range(self.concurrency)))
+        if outbox is not None:
+            await outbox.put(_CLOSED)
+
+
+class CoalesceStage(Stage):
+    """
+    Stage that holds events per product and releases one per window
+
+    Args:
+        name (str): Stage name
+        coalescer (Coalescer): Per-product coalescing window
+    """
+
+    def __init__(self, name, coalescer):
+        super().__init__(name, None)
+        self.coalescer = coalescer
+
+    async def run(self, inbox, outbox):
+        """Release expired windows as they fall due; flush everything on close"""
+        closed = False
+        while not closed:
+            deadline = self.coalescer.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = await asyncio.wait_for(inbox.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _CLOSED:
+                closed = True
+                released = self.coalescer.flush()
+            else:
+                if item is not None:
+                    self.stats["in"] += 1
+                    self.coalescer.add(item)
+                released = self.coalescer.due()
+            for event in released:
+                self.stats["out"] += 1
+                await outbox.put(event)
+        await outbox.put(_CLOSED)
+
+
+class AsyncPipeline:
+    """
+    Stages connected by bounded channels, fed from an async iterator
+
+    Args:
+        source: Async iterable of items for the first stage
+        stages (list): Stage instances in pipeline order
+        channel_size (int): Capacity of each channel between stages
+        stopping (threading.Event): Set by ``stop``; pass the same event to
+            a source that can wait for input indefinitely so it returns
+            once the pipeline is stopping
+    """
+
+    def __init__(self, source, stages, channel_size=1024, stopping=None):
+        self.source = source
+        self.stages = stages
+        self.channel_size = channel_size
+        self.channels = []
+        self._stopping = stopping if stopping is not None else threading.Event()
+        self._tasks = []
+        self.stats = {"emitted": 0}
+
+    async def _pump(self, channel):
+        async for item in self.source:
+            if self._stopping.is_set():
+                break
+            self.stats["emitted"] += 1
+            await channel.put(item)
+        await channel.put(_CLOSED)
+
+    async def run(self):
+        """
+        Run until the source is exhausted (or ``stop`` is called) and every
+        stage has drained; cancelling this coroutine cancels all stages
+        """
+        self.channels = [asyncio.Queue(maxsize=self.channel_size) for _ in self.stages]
+        outboxes = self.channels[1:] + [None]
+        self._tasks = [asyncio.ensure_future(self._pump(self.channels[0]))]
+        self._tasks += [asyncio.ensure_future(stage.run(inbox, outbox))
+                        for stage, inbox, outbox in zip(self.stages, self.channels, outboxes)]
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    def stop(self, drain=True):
+        """
+        Stop the pipeline (call from the event loop thread)
+
+        Args:
+            drain (bool): Let in-flight items finish; otherwise cancel every
+                stage immediately
+        """
+        self._stopping.set()
+        if not drain:
+            for task in self._tasks:
+                task.cancel()
+
+    def get_stats(self):
+        """Per-stage counters and current channel depths"""
+        stats = dict(self.stats)
+        for stage, channel in zip(self.stages, self.channels or [None] * len(self.stages)):
+            stats[stage.name] = dict(stage.stats, queued=channel.qsize() if channel is not None else 0)
+        return stats
+
+
+class PricingStages:
+    """
+    Stage handlers of the price monitoring pipeline
+
+    Args:
+        cache (DecisionCache): Optional decision cache
+        catalog (ProductCatalog): Optional catalog for the rule stage
+        sinks (list): Extra callables invoked with every published alert
+        http_async_client (httpx.AsyncClient): Pooled client for the agents
+        history (PriceHistory): Price history used by the dedupe stage;
+            without one, only exact repeats of the last price are dropped
+    """
+
+    def __init__(self, cache=None, catalog=None, sinks=None, http_async_client=None, history=None):
+        # LangChain is only imported once a pipeline is actually built
+        from agents.async_agent import AsyncAgent
+
+        self.http_async_client = http_async_client
+        self.load_templates(load_prompts())
+        self.analyst = AsyncAgent("pricing_analyst", http_async_client)
+        self.notifier = AsyncAgent("notification_manager", http_async_client)
+        self.cache = cache
+        self.catalog = catalog
+        self.sinks = list(sinks or [])
+        self.history = history if history is not None else PriceHistory(window=1, change_threshold=0.0)
+
+    def load_templates(self, prompts):
+        """Select the prompt templates (compact variants in compact prompt mode)"""
+        templates = select_templates(prompts)
+        self.pricing_template = templates['pricing_analysis_template']
+        self.notification_prompt = "\n".join([templates['notification_event_template'],
+                                              templates['notification_template']])
+
+    def reload(self, snapshot, changed):
+        """
+        Pick up edited prompts and agent personas from a new configuration
+        snapshot; in-flight requests finish with the previous ones
+        """
+        from agents.async_agent import AsyncAgent
+
+        # The prompt mode picks the templates and the agents' system messages
+        if "prompts" in changed or "settings.prompts" in changed:
+            self.load_templates(snapshot.prompts)
+        if "agents" in changed or "settings.prompts" in changed:
+            self.analyst = AsyncAgent("pricing_analyst", self.http_async_client, snapshot.agents)
+            self.notifier = AsyncAgent("notification_manager", self.http_async_client, snapshot.agents)
+
+    def fail(self, item, error, stage):
+        """Dead-letter the event of an item whose stage handler failed or timed out"""
+        event = item[0] if isinstance(item, tuple) else item
+        dead_letter_event(event, error, stage=stage)
+
+    async def dedupe(self, event):
+        """Drop events whose competitor price did not change significantly"""
+        return filter_unchanged([event], self.history) or None
+
+    async def rules(self, event):
+        """Decide clear-cut cases without the agents (unless the pre-filter is off)"""
+        if not current_config().rule_prefilter:
+            return [event]
+        verdict, reason = evaluate_event(event, catalog=self.catalog)
+        if verdict == RULE_IGNORE:
+            commit_decision(event, verdict, reason)
+            return None
+        return [event]
+
+    async def analyze(self, event):
+        """
+        Decide an event with the local classifier or, if it is not
+        confident, the pricing analyst; only ALERT events continue
+        """
+        if apply_cached_decision(event, self.cache) is not None:
+            return None
+        classifier = get_classifier()
+        decision = classifier.classify(event) if classifier is not None else None
+        if decision is None:
+            decision = await self.ask_analyst(event)
+            if decision is None:
+                return None
+        if decision != "ALERT":
+            apply_decision(event, decision, cache=self.cache)
+            return None
+        return [event]
+
+    async def ask_analyst(self, event):
+        """Get the pricing analyst's verdict (None if the request failed)"""
+        try:
+            with llm_priority(event_priority(event)):
+                result = await self.analyst.run(self.pricing_template.format(**build_crew_inputs(event)),
+                                                "analysis", max_tokens_for("analysis"))
+        except Exception as e:
+            dead_letter_event(event, e)
+            return None
+        try:
+            decision = parse_verdict(result)
+            event["decided_by"] = "llm"
+        except ValueError as e:
+            ERRORS_TOTAL.inc(stage="verdict_parse")
+            logger.warning(f"{str(e)}; treating {event['product_name']} as ALERT")
+            decision = "ALERT"
+        return decision
+
+    async def notify(self, event):
+        """Write the notification for an ALERT event"""
+        try:
+            with llm_priority(event_priority(event)):
+                details = await self.notifier.run(self.notification_prompt.format(**build_crew_inputs(event)),
+                                                  "notification", max_tokens_for("notification"))
+        except Exception as e:
+            dead_letter_event(event, e, stage="notification")
+            return None
+        return [(event, details)]
+
+    async def publish(self, item):
+        """Publish an alert to the output queue, history and extra sinks"""
+        event, details = item
+        apply_decision(event, "ALERT", details, self.cache)
+        for sink in self.sinks:
+            sink(event)
+        return None
+
+
+async def event_source(settings, max_events=None, poll_timeout=1.0, stopping=None):
+    """
+    Yield price events for the pipeline
+
+    Events left undecided by an earlier run are replayed from the event log
+    first. With simulation enabled, events come from the configured
+    simulation mode, paced with ``asyncio.sleep``; otherwise they are read
+    from the shared input queue fed by other producers.
+
+    Args:
+        settings (dict): Application settings
+        max_events (int): Stop after this many new events
+        poll_timeout (float): Input queue poll timeout in seconds
+        stopping (threading.Event): Return as soon as this is set instead of
+            waiting for the next event
+    """
+    stopping = stopping if stopping is not None else threading.Event()
+    event_log = open_event_log(settings)
+    if event_log is not None:
+        pending = event_log.pending_events()
+        if pending:
+            logger.info(f"Replaying {len(pending)} uncommitted events from the event log")
+        for event in pending:
+            if stopping.is_set():
+                return
+            yield event
+
+    simulation = settings.get('simulation', {})
+    loop = asyncio.get_running_loop()
+
+    if not simulation.get('enabled', True):
+        emitted = 0
+        while max_events is None or emitted < max_events:
+            try:
+                event = await loop.run_in_executor(None, INPUT_QUEUE.get, True, poll_timeout)
+            except Empty:
+                if stopping.is_set():
+                    return
+                continue
+            EVENTS_TOTAL.inc()
+            emitted += 1
+            yield event
+        return
+
+    mode = simulation.get('mode', 'random')
+    products = load_products(settings)
+    if mode in ('synthetic', 'replay'):
+        source = make_feed_source(simulation, products if products is not PRODUCTS else None)
+        rate = simulation.get('rate')
+        speed = simulation.get('replay_speed')
+    else:
+        source = synthetic_events(products, None, *current_config().price_variation)
+        rate = speed = None
+
+    start = loop.time()
+    first_time = None
+    emitted = 0
+    for original_time, event in source:
+        if max_events is not None and emitted >= max_events:
+            break
+
+        # Pace like the feed engine, but without blocking the loop
+        if mode not in ('synthetic', 'replay'):
+            delay = random.uniform(*current_config().emitter_delay)
+        elif rate:
+            delay = start + emitted / rate - loop.time()
+        elif speed and original_time is not None:
+            if first_time is None:
+                first_time = original_time
+            delay = start + (original_time - first_time) / speed - loop.time()
+        else:
+            delay = 0
+        if delay > 0.001:
+            # Sleep in poll_timeout steps so a stop is noticed during long replay gaps
+            wake = loop.time() + delay
+            while not stopping.is_set() and wake - loop.time() > 0.001:
+                await asyncio.sleep(min(wake - loop.time(), poll_timeout))
+        elif emitted % 256 == 0:
+            await asyncio.sleep(0)
+        if stopping.is_set():
+            return
+
+        event["emitted_ns"] = time.time_ns()
+        EVENT_HISTORY.append(event)
+        if event_log is not None:
+            event_log.append_event(event)
+        EVENTS_TOTAL.inc()
+        emitted += 1
+        yield event
+
+
+def build_pipeline(settings, stages_handlers, max_events=None):
+    """
+    Assemble the pipeline stages from the "pipeline" settings
+
+    Args:
+        settings (dict): Application settings
+        stages_handlers (PricingStages): Stage handlers
+        max_events (int): Stop the source after this many new events
+
+    Returns:
+        AsyncPipeline: Pipeline ready to ``run``
+    """
+    pipeline_settings = settings.get('pipeline', {})
+    stage_settings = {name: dict(defaults, **pipeline_settings.get('stages', {}).get(name, {}))
+                      for name, defaults in DEFAULT_STAGES.items()}
+    poll_timeout = settings.get('processing', {}).get('poll_timeout', 1.0)
+
+    def stage(name, handler):
+        config = stage_settings[name]
+        return Stage(name, handler, config.get('concurrency', 1), config.get('timeout'),
+                     on_error=stages_handlers.fail)
+
+    stages = []
+    if stage_settings['dedupe'].get('enabled', True):
+        stages.append(stage('dedupe', stages_handlers.dedupe))
+    coalescer = make_coalescer(settings, on_collapse=collapse_event)
+    if coalescer is not None:
+        stages.append(CoalesceStage('coalesce', coalescer))
+    stages += [
+        stage('rules', stages_handlers.rules),
+        stage('llm', stages_handlers.analyze),
+        stage('notify', stages_handlers.notify),
+        stage('sinks', stages_handlers.publish),
+    ]
+    stopping = threading.Event()
+    return AsyncPipeline(event_source(settings, max_events, poll_timeout, stopping), stages,
+                         channel_size=pipeline_settings.get('channel_size', 1024), stopping=stopping)
+
+
+async def run_pipeline_async(settings, stop_event=None, max_events=None, sinks=None, stats_interval=None):
+    """
+    Run the pipeline until the source ends or ``stop_event`` is set
+
+    Args:
+        settings (dict): Application settings
+        stop_event (threading.Event): Optional event requesting a graceful stop
+        max_events (int): Stop the source after this many new events
+        sinks (list): Extra callables invoked with every published alert
+        stats_interval (float): Seconds between stats log lines
+
+    Returns:
+        dict: Final pipeline stats
+    """
+    pipeline_settings = settings.get('pipeline', {})
+    stage_settings = pipeline_settings.get('stages', {})
+    llm_connections = (stage_settings.get('llm', {}).get('concurrency', DEFAULT_STAGES['llm']['concurrency'])
+                       + stage_settings.get('notify', {}).get('concurrency', DEFAULT_STAGES['notify']['concurrency']))
+    stats_interval = stats_interval or settings.get('processing', {}).get('stats_interval', 60.0)
+
+    catalog_path = settings.get('catalog', {}).get('path')
+    catalog = None
+    if catalog_path:
+        from core.catalog import load_catalog
+        catalog = load_catalog(catalog_path)
+
+    service = open_config_service(settings)
+    cache = make_decision_cache(settings)
+    open_classifier(settings)
+    open_dead_letter_queue(settings)
+    open_alert_dispatcher(settings)
+    configure_prompts(settings)
+    scheduler = configure_scheduler(settings)
+    limits = httpx.Limits(max_connections=llm_connections, max_keepalive_connections=llm_connections)
+    async with httpx.AsyncClient(timeout=API_REQUEST_TIMEOUT,
+                                 transport=make_async_transport(limits, scheduler)) as client:
+        handlers = PricingStages(cache, catalog, sinks, client, make_price_history(settings))
+        service.subscribe(handlers.reload, "prompts", "agents", "settings.prompts")
+        pipeline = build_pipeline(settings, handlers, max_events)
+
+        async def supervise():
+            last_stats = time.monotonic()
+            while True:
+                await asyncio.sleep(0.2)
+                if stop_event is not None and stop_event.is_set():
+                    logger.info("Stopping pipeline")
+                    pipeline.stop(drain=True)
+                    return
+                if time.monotonic() - last_stats >= stats_interval:
+                    last_stats = time.monotonic()
+                    logger.info(f"Pipeline stats: {pipeline.get_stats()}")
+
+        supervisor = asyncio.ensure_future(supervise())
+        try:
+            await pipeline.run()
+        finally:
+            supervisor.cancel()
+    await asyncio.to_thread(close_alert_dispatcher)
+    close_config_service()
+
+    stats = pipeline.get_stats()
+    logger.info(f"Pipeline finished: {stats}")
+    return stats
+
+
+def run_pipeline(stop_event=None, settings=None, max_events=None, sinks=None):
+    """
+    Run the async pipeline on a new event loop in the calling thread
+
+    Drop-in replacement for running ``price_emitter`` and ``process_event``
+    in two threads.
+    """
+    settings = load_settings() if settings is None else settings
+    start_metrics_exporter(settings)
+    return asyncio.run(run_pipeline_async(settings, stop_event, max_events, sinks))
+
+
+def main():
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Run the price monitoring pipeline headless on asyncio")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--events", type=int, default=None, help="Stop after this many new events")
+    args = parser.parse_args()
+
+    load_dotenv()
+    stop_event = threading.Event()
+    if args.duration:
+        timer = threading.Timer(args.duration, stop_event.set)
+        timer.daemon = True
+        timer.start()
+    try:
+        run_pipeline(stop_event, load_settings(), args.events)
+    except KeyboardInterrupt:
+        logger.info("Pipeline interrupted")
+
+
+if __name__ == "__main__":
+    main()
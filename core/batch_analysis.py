@@ -0,0 +1,103 @@
+"""
+Batch Analysis - Packs several price events into one analysis prompt and
+parses the analyst's verdicts
+"""
+
+import re
+import json
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+VALID_DECISIONS = ("ALERT", "IGNORE")
+_DECISION_PATTERN = re.compile(r'\b(ALERT|IGNORE)\b')
+
+
+def format_batch_events(events, compact=False):
+    """
+    Render a batch of events as one line per event for the batch prompt
+
+    Events are identified by their position in the batch. Compact lines
+    drop the field labels (the compact template names the columns once).
+
+    Returns:
+        str: Event lines
+    """
+    if compact:
+        return "\n".join(
+            f"id={index} | {event['product_name']} | {event['category']} | {event['our_price']} | "
+            f"{event['competitor_price']} | {event.get('price_history') or '-'}"
+            for index, event in enumerate(events)
+        )
+    return "\n".join(
+        f"id={index} | Product: {event['product_name']} | Category: {event['category']} | "
+        f"Our Price: ${event['our_price']} | Competitor Price: ${event['competitor_price']}"
+        + (f" | History: {event['price_history']}" if event.get('price_history') else "")
+        for index, event in enumerate(events)
+    )
+
+
+def parse_batch_verdicts(text, batch_size):
+    """
+    Parse the per-event JSON verdict array returned for a batch prompt
+
+    Surrounding prose or code fences are tolerated; only the outermost JSON
+    array is read. Entries with unknown ids or decisions are skipped.
+
+    Args:
+        text (str): Raw agent output
+        batch_size (int): Number of events that were sent
+
+    Returns:
+        dict: Event index -> 'ALERT' or 'IGNORE' for every parsed verdict
+
+    Raises:
+        ValueError: If no JSON array can be parsed from the output
+    """
+    start = text.find('[')
+    end = text.rfind(']')
+    if start == -1 or end <= start:
+        raise ValueError("No JSON array in batch analysis output")
+
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in batch analysis output: {str(e)}")
+
+    verdicts = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get('id'))
+        except (TypeError, ValueError):
+            continue
+        decision = str(item.get('decision', '')).strip().upper()
+        if 0 <= index < batch_size and decision in VALID_DECISIONS:
+            verdicts[index] = decision
+    return verdicts
+
+
+def parse_verdict(text):
+    """
+    Parse the single ALERT/IGNORE verdict returned by the pricing analyst
+
+    The verdict must be the only decision word in the output; surrounding
+    prose and punctuation are tolerated.
+
+    Args:
+        text (str): Raw agent output
+
+    Returns:
+        str: 'ALERT' or 'IGNORE'
+
+    Raises:
+        ValueError: If the output contains no decision or both decisions
+    """
+    found = set(_DECISION_PATTERN.findall(str(text).upper()))
+    if len(found) != 1:
+        raise ValueError(f"Ambiguous analysis verdict: {str(text)[:80]!r}")
+    return found.pop()
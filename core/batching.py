@@ -0,0 +1,98 @@
+"""
+Batch Consumer - Blocking, micro-batched queue consumption
+"""
+
+import time
+import logging
+import threading
+from queue import Empty
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Input queue consumer counters (worker pools keep their own)
+CONSUMER_STATS = {
+    "batches": 0,
+    "events": 0,
+    "capacity": 0,
+    "idle_waits": 0,
+    "idle_wall_seconds": 0.0,
+    "idle_cpu_seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def drain_batch(source, max_size, linger, timeout, stats=None, stats_lock=None):
+    """
+    Block until at least one item is available, then collect a micro-batch
+
+    After the first item arrives, keeps collecting until ``max_size`` items
+    are gathered or ``linger`` seconds have passed, whichever comes first.
+    Items already waiting in the queue are always taken up to ``max_size``.
+
+    Args:
+        source (Queue): Queue to consume from
+        max_size (int): Maximum number of items per batch
+        linger (float): Seconds to wait for more items after the first one
+        timeout (float): Seconds to block waiting for the first item
+        stats (dict): Counters to update instead of ``CONSUMER_STATS`` (the
+            input consumer's), e.g. a worker pool's own
+        stats_lock (threading.Lock): Lock guarding ``stats``
+
+    Returns:
+        list: Collected items (empty if the timeout expired with no items)
+    """
+    if stats is None:
+        stats, stats_lock = CONSUMER_STATS, _stats_lock
+    wait_start = time.monotonic()
+    cpu_start = time.thread_time()
+    try:
+        first = source.get(timeout=timeout)
+    except Empty:
+        with stats_lock:
+            stats["idle_waits"] += 1
+            stats["idle_wall_seconds"] += time.monotonic() - wait_start
+            stats["idle_cpu_seconds"] += time.thread_time() - cpu_start
+        return []
+
+    batch = [first]
+    deadline = time.monotonic() + linger
+    while len(batch) < max_size:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining > 0:
+                batch.append(source.get(timeout=remaining))
+            else:
+                batch.append(source.get_nowait())
+        except Empty:
+            break
+
+    with stats_lock:
+        stats["batches"] += 1
+        stats["events"] += len(batch)
+        stats["capacity"] += max_size
+    return batch
+
+
+def consumer_stats(counters):
+    """
+    Add the derived metrics to a copy of consumer counters
+
+    ``avg_batch_fill`` is the average fraction of ``max_size`` used per batch
+    and ``idle_cpu_ratio`` is the CPU time burned per second spent waiting
+    on an empty queue (close to zero for a properly blocking consumer).
+    """
+    stats = dict(counters)
+    stats["avg_batch_size"] = stats["events"] / stats["batches"] if stats["batches"] else 0.0
+    stats["avg_batch_fill"] = stats["events"] / stats["capacity"] if stats["capacity"] else 0.0
+    stats["idle_cpu_ratio"] = (stats["idle_cpu_seconds"] / stats["idle_wall_seconds"]
+                               if stats["idle_wall_seconds"] else 0.0)
+    return stats
+
+
+def get_consumer_stats():
+    """Return a snapshot of the input consumer's counters with derived metrics"""
+    with _stats_lock:
+        return consumer_stats(CONSUMER_STATS)
@@ -0,0 +1,159 @@
+"""
+Product Catalog - Columnar, NumPy-backed catalog for large product sets
+
+Stores product ids, category codes and our prices as arrays so that price
+drops, threshold masks and category masks for a whole batch of competitor
+prices are computed in one vectorized call. Category codes are built from
+normalized (lowercased) names; the label first seen for each code is kept
+for display.
+"""
+
+import csv
+import logging
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ProductCatalog:
+    """
+    Column-oriented product catalog
+
+    Args:
+        ids (sequence): Product ids
+        names (sequence): Product names
+        categories (sequence): Category name per product
+        our_prices (sequence): Our price per product
+    """
+
+    def __init__(self, ids, names, categories, our_prices):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = np.asarray(names, dtype=object)
+        labels = [str(c).strip() for c in categories]
+        self.category_names, first_rows, codes = np.unique(
+            np.array([label.lower() for label in labels], dtype=str),
+            return_index=True, return_inverse=True,
+        )
+        self.category_labels = np.array([labels[i] for i in first_rows], dtype=object)
+        self.category_codes = codes.astype(np.int32)
+        self.our_price = np.asarray(our_prices, dtype=np.float64)
+
+        # Sorted id column for vectorized id -> row lookups
+        self._order = np.argsort(self.ids, kind='stable')
+        self._sorted_ids = self.ids[self._order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_products(cls, products):
+        """Build a catalog from product dicts (id, name, category, our_price)"""
+        return cls(
+            [p["id"] for p in products],
+            [p["name"] for p in products],
+            [p["category"] for p in products],
+            [p["our_price"] for p in products],
+        )
+
+    @classmethod
+    def from_csv(cls, path):
+        """Load a catalog from a CSV file with id, name, category and our_price columns"""
+        with open(path, 'r', newline='') as f:
+            return cls.from_products([
+                {"id": int(row["id"]), "name": row["name"],
+                 "category": row["category"], "our_price": float(row["our_price"])}
+                for row in csv.DictReader(f)
+            ])
+
+    @classmethod
+    def from_parquet(cls, path):
+        """Load a catalog from a Parquet file (requires pyarrow)"""
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=["id", "name", "category", "our_price"])
+        return cls(
+            table.column("id").to_numpy(),
+            table.column("name").to_pylist(),
+            table.column("category").to_pylist(),
+            table.column("our_price").to_numpy(),
+        )
+
+    def lookup_rows(self, product_ids):
+        """
+        Map product ids to catalog rows
+
+        Returns:
+            np.ndarray: Row index per id, -1 for ids not in the catalog
+        """
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(product_ids.shape, -1, dtype=np.int64)
+        positions = np.searchsorted(self._sorted_ids, product_ids)
+        positions = np.clip(positions, 0, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[positions] == product_ids
+        return np.where(found, self._order[positions], -1)
+
+    def category_code_mask(self, categories):
+        """Boolean mask over category codes for the given category names"""
+        wanted = {str(c).strip().lower() for c in categories}
+        return np.array([name in wanted for name in self.category_names], dtype=bool)
+
+    def evaluate(self, product_ids, competitor_prices, threshold, categories):
+        """
+        Compute drops and alert masks for a batch of competitor prices
+
+        Args:
+            product_ids (sequence): Product id per observation
+            competitor_prices (sequence): Competitor price per observation
+            threshold (float): Alert threshold as a fraction of our price
+            categories (iterable): Monitored category names
+
+        Returns:
+            dict: Arrays ``rows`` (-1 if unknown), ``known``, ``drop`` (fraction,
+            NaN if unknown), ``category_mask`` and ``threshold_mask``
+        """
+        rows = self.lookup_rows(product_ids)
+        known = rows >= 0
+        safe_rows = np.where(known, rows, 0)
+        competitor_prices = np.asarray(competitor_prices, dtype=np.float64)
+
+        our_price = np.where(known, self.our_price[safe_rows] if len(self) else 0.0, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drop = np.where(our_price > 0, (our_price - competitor_prices) / our_price, np.nan)
+
+        code_mask = self.category_code_mask(categories)
+        category_mask = known & (code_mask[self.category_codes[safe_rows]] if len(self) else False)
+        threshold_mask = category_mask & (drop >= threshold)
+
+        return {
+            "rows": rows,
+            "known": known,
+            "drop": drop,
+            "category_mask": category_mask,
+            "threshold_mask": threshold_mask,
+        }
+
+    def to_products(self):
+        """Return the catalog as a list of product dicts (with the original category labels)"""
+        return [
+            {"id": int(i), "name": str(n), "category": str(self.category_labels[c]), "our_price": float(p)}
+            for i, n, c, p in zip(self.ids, self.names, self.category_codes, self.our_price)
+        ]
+
+
+def load_catalog(path):
+    """
+    Load a product catalog from a CSV or Parquet file
+
+    Returns:
+        ProductCatalog: Loaded catalog
+    """
+    if path.endswith('.parquet'):
+        catalog = ProductCatalog.from_parquet(path)
+    else:
+        catalog = ProductCatalog.from_csv(path)
+    logger.info(f"Loaded {len(catalog)} products from {path}")
+    return catalog
@@ -0,0 +1,130 @@
+"""
+Event Coalescer - Collapses bursts of price updates per product
+
+Holds each product's events for a short window and releases only one per
+product: the newest update, or the one with the lowest competitor price
+(the most extreme drop). Work downstream of the coalescer then scales with
+the number of distinct products rather than the raw event count.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COALESCE_POLICIES = ("latest", "extreme")
+
+
+def _competitor_price(event):
+    try:
+        return float(event.get('competitor_price'))
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+class Coalescer:
+    """
+    Thread-safe per-product coalescing window
+
+    The window of a product opens with its first pending event; when it
+    expires, the kept event is released and superseded ones are passed to
+    ``on_collapse``.
+
+    Args:
+        window (float): Seconds to hold a product's first event
+        policy (str): "latest" keeps the newest event, "extreme" the one
+            with the lowest competitor price
+        on_collapse (callable): Called with each superseded event
+
+    Raises:
+        ValueError: If the policy is unknown
+    """
+
+    def __init__(self, window=0.2, policy="latest", on_collapse=None):
+        if policy not in COALESCE_POLICIES:
+            raise ValueError(f"Unknown coalescing policy: {policy}")
+        self.window = window
+        self.policy = policy
+        self.on_collapse = on_collapse
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"received": 0, "released": 0, "collapsed": 0}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, event):
+        """Add an event, superseding or being superseded by the pending one"""
+        key = event.get('product_id')
+        dropped = None
+        with self._lock:
+            self.stats["received"] += 1
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [time.monotonic() + self.window, event]
+                return
+            self.stats["collapsed"] += 1
+            if self.policy == "extreme" and _competitor_price(event) > _competitor_price(entry[1]):
+                dropped = event
+            else:
+                dropped, entry[1] = entry[1], event
+        if self.on_collapse is not None:
+            self.on_collapse(dropped)
+
+    def next_deadline(self):
+        """Monotonic time at which the oldest window expires, or None"""
+        with self._lock:
+            if not self._pending:
+                return None
+            return next(iter(self._pending.values()))[0]
+
+    def due(self, now=None):
+        """
+        Release the events whose window has expired
+
+        Returns:
+            list: Kept event per expired product, oldest window first
+        """
+        now = time.monotonic() if now is None else now
+        released = []
+        with self._lock:
+            while self._pending:
+                key, (deadline, event) = next(iter(self._pending.items()))
+                if deadline > now:
+                    break
+                del self._pending[key]
+                released.append(event)
+            self.stats["released"] += len(released)
+        return released
+
+    def flush(self):
+        """Release every pending event regardless of its window"""
+        return self.due(now=float('inf'))
+
+    def get_stats(self):
+        """Counters plus pending products and the fraction of events collapsed"""
+        with self._lock:
+            stats = dict(self.stats, pending=len(self._pending))
+        stats["collapse_ratio"] = stats["collapsed"] / stats["received"] if stats["received"] else 0.0
+        return stats
+
+
+def make_coalescer(settings, on_collapse=None):
+    """
+    Build a coalescer from the "coalescing" settings
+
+    Returns:
+        Coalescer or None: None when coalescing is disabled
+    """
+    coalescing = (settings or {}).get('coalescing', {})
+    if not coalescing.get('enabled', False):
+        return None
+    return Coalescer(coalescing.get('window_ms', 200) / 1000.0,
+                     coalescing.get('policy', 'latest'),
+                     on_collapse)
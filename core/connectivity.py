@@ -3,10 +3,9 @@ Network connectivity and API verification module
 """
 
 import os
-import json
 import logging
 import requests
-from openai import OpenAI
+from config.settings import load_settings
 
 # Set up logging
 logging.basicConfig(level=logging.INFO,
@@ -14,27 +13,20 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 
-def load_settings():
-    """Load application settings from JSON file"""
-    try:
-        with open('config/settings.json', 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Failed to load settings: {str(e)}")
-        raise
-
-
-def check_network_connection():
+def check_network_connection(settings=None):
     """
     Verifies network connectivity to the OpenAI API
 
+    Args:
+        settings (dict): Settings to use instead of config/settings.json
+
     Returns:
         bool: True if connection is successful
 
     Raises:
         ConnectionError: If connection fails
     """
-    settings = load_settings()
+    settings = load_settings() if settings is None else settings
     api_url = settings['api']['openai']['health_check_url']
     timeout = settings['api']['openai']['timeout']
 
@@ -55,6 +47,9 @@ def verify_openai_key():
     """
     Verifies that the OpenAI API key is valid and working
 
+    Lists the available models, which authenticates the key without
+    spending tokens on a completion.
+
     Returns:
         bool: True if API key is valid
 
@@ -68,13 +63,11 @@ def verify_openai_key():
         logger.error("OPENAI_API_KEY not found in environment variables")
         raise ValueError("OPENAI_API_KEY not found in .env file")
 
+    from openai import OpenAI
+
     try:
         client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": "Connection test"}],
-            max_tokens=5
-        )
+        client.models.list()
         logger.info("OpenAI API key verification successful!")
         return True
     except Exception as e:
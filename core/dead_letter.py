@@ -0,0 +1,108 @@
+"""
+Dead Letter Queue - Events whose LLM calls failed after every retry
+
+Instead of being logged and dropped, such events are appended to a JSONL
+file (one record per line: failure time, stage, error and the event) and
+kept in a bounded in-memory queue, so they can be inspected and fed back
+into the pipeline once the LLM API is healthy again.
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from core.metrics import DEAD_LETTERS_TOTAL
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterQueue:
+    """
+    Append-only store of failed events
+
+    Args:
+        path (str): JSONL file the records are appended to (None to keep
+            them in memory only)
+        max_entries (int): Records kept in memory
+    """
+
+    def __init__(self, path=None, max_entries=1000):
+        self.path = path
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def put(self, event, error, stage="analysis"):
+        """Record a failed event"""
+        record = {
+            "failed_at": datetime.now().isoformat(),
+            "stage": stage,
+            "error": str(error),
+            "event": dict(event),
+        }
+        with self._lock:
+            self._entries.append(record)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+        DEAD_LETTERS_TOTAL.inc(stage=stage)
+        logger.warning(f"Dead-lettered {event.get('product_name', event.get('product_id'))} "
+                       f"after {stage} failure: {str(error)}")
+
+    def entries(self):
+        """Records currently held in memory, oldest first"""
+        with self._lock:
+            return list(self._entries)
+
+
+def load_dead_letters(path):
+    """
+    Read the records of a dead letter file
+
+    Returns:
+        list: Records, oldest first (empty if the file does not exist)
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+_dead_letters = None
+_dead_letters_lock = threading.Lock()
+
+
+def open_dead_letter_queue(settings):
+    """
+    Return the process-wide dead letter queue, opening it on first use
+
+    Args:
+        settings (dict): Application settings (uses the "dead_letter" section)
+
+    Returns:
+        DeadLetterQueue or None: The queue, or None if it is disabled
+    """
+    global _dead_letters
+    dlq_settings = (settings or {}).get('dead_letter', {})
+    if not dlq_settings.get('enabled', False):
+        return None
+    with _dead_letters_lock:
+        if _dead_letters is None:
+            _dead_letters = DeadLetterQueue(dlq_settings.get('path', 'data/dead_letter.jsonl'),
+                                            dlq_settings.get('max_entries', 1000))
+        return _dead_letters
+
+
+def get_dead_letter_queue():
+    """Return the process-wide dead letter queue if it has been opened, else None"""
+    return _dead_letters
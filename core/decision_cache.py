@@ -0,0 +1,186 @@
+"""
+Decision Cache - LRU/TTL cache of agent decisions for repeat price events
+
+Events are keyed on (product_id, category, bucketed price ratio, threshold,
+coarse price history signal, prompt version), so a SKU that comes back at an
+unchanged or near-identical competitor price, with the same history context
+in the prompt, reuses the earlier ALERT/IGNORE decision and notification
+text instead of paying for another crew run.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from config.service import fingerprint_files
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Files whose contents change the meaning of a cached decision
+CONFIG_FILES = ('config/prompts.yaml', 'config/agents.yaml')
+
+
+class DecisionCache:
+    """
+    Thread-safe LRU cache with per-entry TTL
+
+    Args:
+        max_entries (int): Entries kept before the least recently used is evicted
+        ttl_seconds (float): Lifetime of an entry (0 disables expiry)
+        price_bucket (float): Width of the competitor/our price ratio buckets
+        history_bucket (float): Width of the buckets of the price change since
+            the product was last analyzed (from the price history)
+        version_check_interval (float): Seconds between checks of the config files
+        config_files (tuple): Files whose changes invalidate the whole cache;
+            empty when the version is set from outside with ``set_version``
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600.0, price_bucket=0.005,
+                 version_check_interval=5.0, config_files=CONFIG_FILES, history_bucket=0.05):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.price_bucket = price_bucket
+        self.history_bucket = history_bucket
+        self.version_check_interval = version_check_interval
+        self.config_files = config_files
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._file_stamp = None
+        self._version = None
+        self._next_version_check = 0.0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        if self.config_files:
+            self._refresh_version(time.monotonic())
+
+    def _file_stamps(self):
+        stamps = []
+        for path in self.config_files:
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _refresh_version(self, now):
+        """Recompute the prompt version if the config files changed; caller may hold the lock"""
+        self._next_version_check = now + self.version_check_interval
+        stamp = self._file_stamps()
+        if stamp == self._file_stamp:
+            return
+        self._file_stamp = stamp
+        self._apply_version(fingerprint_files(self.config_files))
+
+    def _apply_version(self, version):
+        """Switch to a configuration version, dropping every entry if it changed; caller holds the lock"""
+        if self._version is not None and version != self._version:
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+            logger.info(f"Decision cache invalidated (prompt version {version})")
+        self._version = version
+
+    def set_version(self, version):
+        """Set the configuration version (from the config service), clearing the cache if it changed"""
+        with self._lock:
+            self._apply_version(version)
+
+    @property
+    def version(self):
+        """Current prompt/agent configuration version"""
+        return self._version
+
+    def history_key(self, event):
+        """
+        Coarse summary of the price history the analyst sees for an event
+
+        Returns:
+            tuple or None: (first seen, new low, bucketed change since last
+            analyzed), or None if the event carries no price history
+        """
+        signal = event.get('price_signal')
+        if not signal:
+            return None
+        change = signal.get('change')
+        return (
+            bool(signal.get('first')),
+            bool(signal.get('new_low')),
+            None if change is None else int(round(change / self.history_bucket)),
+        )
+
+    def make_key(self, event, threshold):
+        """
+        Build the cache key for an event
+
+        Returns:
+            tuple or None: Cache key, or None if the prices are not usable
+        """
+        try:
+            ratio = float(event['competitor_price']) / float(event['our_price'])
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            return None
+        return (
+            event.get('product_id'),
+            event.get('category'),
+            int(round(ratio / self.price_bucket)),
+            round(float(threshold), 6),
+            self.history_key(event),
+            self._version,
+        )
+
+    def get(self, event, threshold):
+        """
+        Look up a cached decision for an event
+
+        Returns:
+            dict or None: Cached {"decision", "details"} entry on a hit
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.config_files and now >= self._next_version_check:
+                self._refresh_version(now)
+            key = self.make_key(event, threshold)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if self.ttl_seconds and now >= expires_at:
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, event, threshold, decision, details=""):
+        """Store the decision and notification text for an event"""
+        now = time.monotonic()
+        with self._lock:
+            key = self.make_key(event, threshold)
+            if key is None:
+                return
+            self._entries[key] = (now + self.ttl_seconds, {"decision": decision, "details": details})
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every cached decision"""
+        with self._lock:
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+    def get_stats(self):
+        """Return a snapshot of the cache counters with size and hit rate"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,503 @@
+"""
+Decision Classifier - Local model tier in front of the pricing analyst
+
+A logistic regression over a handful of features (price drop, distance to
+the alert threshold, category, price history signals) decides ALERT or
+IGNORE on the CPU in microseconds. Only events it is not confident about
+(probability of the likelier decision below "classifier.confidence_threshold")
+are escalated to the LLM analyst.
+
+The model is trained offline from the analyst's logged decisions. With the
+classifier enabled, every analyst decision is committed to the event log
+with the features the classifier saw, so the classifier needs
+"event_log.enabled" (a warning is logged at startup without it); until a
+model exists every event is escalated, so the first runs just collect
+training data. Inference is pure Python; training needs numpy:
+
+Usage:
+    python -m core.decision_classifier export --event-log data/event_log --output data/decisions.jsonl
+    python -m core.decision_classifier train --dataset data/decisions.jsonl --output data/decision_model.json
+    python -m core.decision_classifier eval --model data/decision_model.json --dataset data/decisions.jsonl
+
+A model is only used while the monitored categories and alert threshold
+match the ones it was trained under; a retrained model file is picked up
+without a restart.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import threading
+from datetime import datetime
+from config.service import current_config, get_config_service
+from core.event_log import KIND_DECISION, EventLog
+from core.metrics import CLASSIFIER_EVENTS_TOTAL, CLASSIFIER_SECONDS
+from core.rules import compute_price_drop
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MODEL_FORMAT = 1
+
+NUMERIC_FEATURES = ("drop", "threshold_gap", "above_threshold", "history_change",
+                    "new_low", "first_seen", "volatility")
+
+# Confidence thresholds reported by ``evaluate_model``
+EVAL_THRESHOLDS = (0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+def extract_features(event, config=None):
+    """
+    Compute the classifier features of an event
+
+    History signals come from the price history annotation of the event
+    (zero when the history is disabled).
+
+    Returns:
+        dict or None: Feature name -> value (plus "category"), or None if
+        the prices are not usable
+    """
+    config = config or current_config()
+    drop = compute_price_drop(event.get('our_price'), event.get('competitor_price'))
+    if drop is None:
+        return None
+    signal = event.get('price_signal') or {}
+    return {
+        "drop": drop,
+        "threshold_gap": drop - config.price_drop_threshold,
+        "above_threshold": 1.0 if drop >= config.price_drop_threshold else 0.0,
+        "history_change": signal.get('change') or 0.0,
+        "new_low": 1.0 if signal.get('new_low') else 0.0,
+        "first_seen": 1.0 if signal.get('first') else 0.0,
+        "volatility": signal.get('volatility') or 0.0,
+        "category": str(event.get('category', '')).strip().lower(),
+    }
+
+
+def _sigmoid(z):
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class DecisionModel:
+    """
+    Logistic regression over standardized numeric features and one-hot
+    categories
+
+    Args:
+        means (list): Mean of each numeric feature in the training data
+        scales (list): Standard deviation of each numeric feature
+        categories (list): Categories with a one-hot weight
+        weights (list): Numeric weights followed by category weights
+        bias (float): Intercept
+        basis (dict): Monitored categories and alert threshold the model
+            was trained under
+        metrics (dict): Evaluation results recorded at training time
+    """
+
+    def __init__(self, means, scales, categories, weights, bias, basis, metrics=None):
+        self.means = list(means)
+        self.scales = list(scales)
+        self.categories = list(categories)
+        self.weights = list(weights)
+        self.bias = float(bias)
+        self.basis = basis
+        self.metrics = metrics or {}
+        self._numeric = list(zip(NUMERIC_FEATURES, self.means, self.scales, self.weights))
+        self._category_weights = dict(zip(self.categories, self.weights[len(NUMERIC_FEATURES):]))
+        self._basis_key = (round(float(basis.get('price_drop_threshold', -1.0)), 6),
+                           frozenset(basis.get('categories', ())))
+
+    def predict_proba(self, features):
+        """Probability that the analyst would decide ALERT"""
+        z = self.bias
+        for name, mean, scale, weight in self._numeric:
+            z += weight * (features[name] - mean) / scale
+        z += self._category_weights.get(features["category"], 0.0)
+        return _sigmoid(z)
+
+    def matches(self, config):
+        """Whether the model was trained under the configuration's categories and threshold"""
+        return self._basis_key == (round(config.price_drop_threshold, 6), config.categories)
+
+    def to_dict(self):
+        return {"format": MODEL_FORMAT, "features": list(NUMERIC_FEATURES), "means": self.means,
+                "scales": self.scales, "categories": self.categories, "weights": self.weights,
+                "bias": self.bias, "basis": self.basis, "metrics": self.metrics}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Raises:
+            ValueError: If the model was saved in another format or with
+                other features
+        """
+        if data.get('format') != MODEL_FORMAT or tuple(data.get('features', ())) != NUMERIC_FEATURES:
+            raise ValueError("Unsupported decision model format; retrain the model")
+        return cls(data['means'], data['scales'], data['categories'], data['weights'],
+                   data['bias'], data.get('basis', {}), data.get('metrics'))
+
+    def save(self, path):
+        """Write the model as JSON, replacing the file atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+def train_model(examples, basis, l2=1.0, max_iterations=50):
+    """
+    Fit a logistic regression with Newton's method
+
+    Args:
+        examples (list): (features, label) pairs, label 1 for ALERT
+        basis (dict): Monitored categories and alert threshold of the data
+        l2 (float): L2 regularization strength (not applied to the bias)
+        max_iterations (int): Newton steps before giving up on convergence
+
+    Returns:
+        DecisionModel: The fitted model
+
+    Raises:
+        ValueError: If there are no examples
+    """
+    import numpy as np
+
+    if not examples:
+        raise ValueError("No training examples")
+    categories = sorted({features["category"] for features, _ in examples})
+    category_index = {category: i for i, category in enumerate(categories)}
+    numeric = np.array([[features[name] for name in NUMERIC_FEATURES] for features, _ in examples], dtype=float)
+    means = numeric.mean(axis=0)
+    scales = numeric.std(axis=0)
+    scales[scales == 0] = 1.0
+
+    one_hot = np.zeros((len(examples), len(categories)))
+    for row, (features, _) in enumerate(examples):
+        one_hot[row, category_index[features["category"]]] = 1.0
+    x = np.hstack([(numeric - means) / scales, one_hot, np.ones((len(examples), 1))])
+    y = np.array([label for _, label in examples], dtype=float)
+
+    penalty = np.full(x.shape[1], float(l2))
+    penalty[-1] = 1e-9
+    w = np.zeros(x.shape[1])
+    for _ in range(max_iterations):
+        p = 1.0 / (1.0 + np.exp(-np.clip(x @ w, -30, 30)))
+        gradient = x.T @ (p - y) + penalty * w
+        hessian = (x.T * (p * (1 - p))) @ x + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.max(np.abs(step)) < 1e-6:
+            break
+    return DecisionModel(means.tolist(), scales.tolist(), categories, w[:-1].tolist(), float(w[-1]), basis)
+
+
+def evaluate_model(model, examples, thresholds=EVAL_THRESHOLDS):
+    """
+    Measure the model against the analyst's decisions
+
+    Returns:
+        dict: Overall accuracy and log loss, and per confidence threshold
+        the escalation rate and the accuracy of the decisions kept local
+    """
+    scored = [(model.predict_proba(features), label) for features, label in examples]
+    if not scored:
+        return {"examples": 0}
+    correct = sum(1 for p, label in scored if (p >= 0.5) == bool(label))
+    log_loss = -sum(math.log(max(p if label else 1 - p, 1e-12)) for p, label in scored) / len(scored)
+    tiers = []
+    for threshold in thresholds:
+        local = [(p, label) for p, label in scored if max(p, 1 - p) >= threshold]
+        local_correct = sum(1 for p, label in local if (p >= 0.5) == bool(label))
+        tiers.append({
+            "confidence_threshold": threshold,
+            "escalation_rate": round(1 - len(local) / len(scored), 4),
+            "local_accuracy": round(local_correct / len(local), 4) if local else None,
+            "local_errors": len(local) - local_correct,
+        })
+    return {
+        "examples": len(scored),
+        "alert_ratio": round(sum(label for _, label in scored) / len(scored), 4),
+        "accuracy": round(correct / len(scored), 4),
+        "log_loss": round(log_loss, 4),
+        "tiers": tiers,
+    }
+
+
+def split_examples(examples, holdout=0.2, seed=0):
+    """Shuffle and split examples into training and holdout sets"""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    cut = int(len(shuffled) * (1 - holdout))
+    return shuffled[:cut], shuffled[cut:]
+
+
+def read_dataset(path):
+    """
+    Read examples from a JSONL dataset ({"features": {...}, "decision": ...} per line)
+
+    Returns:
+        list: (features, label) pairs
+    """
+    examples = []
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["features"], 1 if record["decision"] == "ALERT" else 0))
+    return examples
+
+
+def examples_from_event_log(event_log, sources=("llm",)):
+    """
+    Collect the logged decisions that carry classifier features
+
+    Args:
+        event_log (EventLog): Log to read
+        sources (tuple): Decision sources to learn from (the analyst by default)
+
+    Returns:
+        list: (features, label) pairs
+    """
+    examples = []
+    for record in event_log.records(kind=KIND_DECISION):
+        data = record["data"]
+        if data.get("source") in sources and data.get("features") and data.get("decision") in ("ALERT", "IGNORE"):
+            examples.append((data["features"], 1 if data["decision"] == "ALERT" else 0))
+    return examples
+
+
+class ClassifierTier:
+    """
+    Decides confident events locally and escalates the rest
+
+    Args:
+        model_path (str): JSON model written by ``train``
+        confidence_threshold (float): Minimum probability of the predicted
+            decision for it to be taken without the analyst
+        log_features (bool): Attach the features to events so the analyst's
+            decisions are logged as training data
+        model_check_interval (float): Seconds between checks of the model file
+    """
+
+    def __init__(self, model_path, confidence_threshold=0.9, log_features=True, model_check_interval=5.0):
+        self.model_path = model_path
+        self.confidence_threshold = confidence_threshold
+        self.log_features = log_features
+        self.model_check_interval = model_check_interval
+        self.model = None
+        # Stamp of the loaded model file; () until the first check
+        self._model_stamp = ()
+        self._next_model_check = 0.0
+        self._basis_warned = False
+        self._lock = threading.Lock()
+        self.stats = {"alerts": 0, "ignores": 0, "low_confidence": 0, "unavailable": 0}
+        self._refresh_model(time.monotonic())
+
+    def _refresh_model(self, now):
+        """Load the model file if it changed since the last check"""
+        self._next_model_check = now + self.model_check_interval
+        try:
+            st = os.stat(self.model_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._model_stamp:
+            return
+        self._model_stamp = stamp
+        if stamp is None:
+            logger.info(f"No decision model at {self.model_path}; escalating every event to the analyst")
+            self.model = None
+            return
+        try:
+            self.model = DecisionModel.load(self.model_path)
+            self._basis_warned = False
+            logger.info(f"Decision model loaded from {self.model_path}")
+        except Exception as e:
+            logger.error(f"Failed to load decision model {self.model_path}: {str(e)}")
+            self.model = None
+
+    def configure(self, classifier_settings):
+        """Apply changed "classifier" settings (threshold, model path, logging)"""
+        with self._lock:
+            self.confidence_threshold = classifier_settings.get('confidence_threshold', self.confidence_threshold)
+            self.log_features = classifier_settings.get('log_features', self.log_features)
+            model_path = classifier_settings.get('model_path', self.model_path)
+            if model_path != self.model_path:
+                self.model_path = model_path
+                self._model_stamp = ()
+                self._next_model_check = 0.0
+
+    def _count(self, outcome):
+        with self._lock:
+            self.stats[outcome] += 1
+        CLASSIFIER_EVENTS_TOTAL.inc(outcome=outcome)
+
+    def classify(self, event):
+        """
+        Decide an event locally if the model is confident enough
+
+        Returns:
+            str or None: "ALERT" or "IGNORE", or None to escalate the event
+            to the analyst
+        """
+        start = time.perf_counter()
+        now = time.monotonic()
+        if now >= self._next_model_check:
+            with self._lock:
+                if now >= self._next_model_check:
+                    self._refresh_model(now)
+
+        config = current_config()
+        features = extract_features(event, config)
+        if features is not None and self.log_features:
+            event['decision_features'] = features
+        model = self.model
+        if model is None or features is None:
+            self._count("unavailable")
+            return None
+        if not model.matches(config):
+            if not self._basis_warned:
+                self._basis_warned = True
+                logger.warning("Decision model was trained under other categories or threshold; "
+                               "escalating every event until it is retrained")
+            self._count("unavailable")
+            return None
+
+        probability = model.predict_proba(features)
+        CLASSIFIER_SECONDS.observe(time.perf_counter() - start)
+        confidence = max(probability, 1.0 - probability)
+        if confidence < self.confidence_threshold:
+            self._count("low_confidence")
+            return None
+        decision = "ALERT" if probability >= 0.5 else "IGNORE"
+        self._count("alerts" if decision == "ALERT" else "ignores")
+        event['decided_by'] = "classifier"
+        event['classifier_confidence'] = round(confidence, 4)
+        return decision
+
+    def get_stats(self):
+        """Counters plus the fraction of events escalated to the analyst"""
+        with self._lock:
+            stats = dict(self.stats)
+        seen = stats["alerts"] + stats["ignores"] + stats["low_confidence"] + stats["unavailable"]
+        stats["classified"] = stats["alerts"] + stats["ignores"]
+        stats["escalation_rate"] = (seen - stats["classified"]) / seen if seen else 0.0
+        return stats
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def open_classifier(settings):
+    """
+    Return the process-wide classifier tier, opening it on first use
+
+    Args:
+        settings (dict): Application settings (uses the "classifier" section)
+
+    Returns:
+        ClassifierTier or None: The tier, or None if it is disabled
+    """
+    global _classifier
+    classifier_settings = (settings or {}).get('classifier', {})
+    if not classifier_settings.get('enabled', False):
+        return None
+    if classifier_settings.get('log_features', True) and not settings.get('event_log', {}).get('enabled', False):
+        logger.warning("The event log is disabled, so no analyst decisions are collected to train "
+                       "the decision classifier; set \"event_log.enabled\" to true")
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = ClassifierTier(
+                classifier_settings.get('model_path', 'data/decision_model.json'),
+                confidence_threshold=classifier_settings.get('confidence_threshold', 0.9),
+                log_features=classifier_settings.get('log_features', True),
+                model_check_interval=classifier_settings.get('model_check_interval', 5.0),
+            )
+            service = get_config_service()
+            if service is not None:
+                tier = _classifier
+                service.subscribe(lambda snapshot, changed: tier.configure(snapshot.settings.get('classifier', {})),
+                                  "settings.classifier")
+        return _classifier
+
+
+def get_classifier():
+    """Return the process-wide classifier tier if it has been opened, else None"""
+    return _classifier
+
+
+def _load_examples(args):
+    examples = []
+    for path in args.dataset or []:
+        examples.extend(read_dataset(path))
+    if args.event_log:
+        event_log = EventLog(args.event_log)
+        try:
+            examples.extend(examples_from_event_log(event_log))
+        finally:
+            event_log.close()
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the local decision classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("export", "Write logged analyst decisions as a JSONL dataset"),
+                            ("train", "Train a model and report its holdout evaluation"),
+                            ("eval", "Evaluate a model")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--dataset", action="append", help="JSONL dataset (repeatable)")
+        command.add_argument("--event-log", help="Event log directory to read decisions from")
+    commands.choices["export"].add_argument("--output", required=True)
+    commands.choices["train"].add_argument("--output", default="data/decision_model.json")
+    commands.choices["train"].add_argument("--holdout", type=float, default=0.2)
+    commands.choices["train"].add_argument("--l2", type=float, default=1.0)
+    commands.choices["train"].add_argument("--seed", type=int, default=0)
+    commands.choices["eval"].add_argument("--model", default="data/decision_model.json")
+    args = parser.parse_args()
+
+    examples = _load_examples(args)
+    if not examples:
+        print("No examples with classifier features found", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "export":
+        with open(args.output, 'w') as f:
+            for features, label in examples:
+                f.write(json.dumps({"features": features, "decision": "ALERT" if label else "IGNORE"}) + "\n")
+        print(f"Wrote {len(examples)} examples to {args.output}")
+    elif args.command == "train":
+        config = current_config()
+        basis = {"price_drop_threshold": config.price_drop_threshold, "categories": sorted(config.categories)}
+        training, holdout = split_examples(examples, args.holdout, args.seed)
+        model = train_model(training, basis, args.l2)
+        model.metrics = evaluate_model(model, holdout or training)
+        model.metrics["trained_at"] = datetime.now().isoformat(timespec='seconds')
+        model.metrics["training_examples"] = len(training)
+        model.save(args.output)
+        print(json.dumps(model.metrics, indent=2))
+    else:
+        print(json.dumps(evaluate_model(DecisionModel.load(args.model), examples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+"""
+Event Log - Durable, append-only log of price events and decisions
+
+Records are appended to size-capped segment files with batched fsync. Each
+segment has a fixed-width index file (log sequence number, timestamp,
+product id, referenced event, offset, kind) that is memory-mapped for
+lookups, so history can be paged by time or product without loading the
+log into RAM. When a segment is sealed, a product index (product id and
+index position, sorted) is written next to it, so product queries bisect
+instead of scanning; the active segment keeps the same mapping in memory.
+
+On startup, events that have no decision record yet are returned by
+``pending_events`` so they can be re-queued. The lowest pending sequence
+number is checkpointed, so the next startup only scans the segments from
+there on.
+"""
+
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import bisect
+import logging
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Record kinds
+KIND_EVENT = 0
+KIND_DECISION = 1
+
+# Log record header: payload length, CRC32 of the payload
+RECORD_HEADER = struct.Struct('<II')
+
+# Index entry: lsn, timestamp_ns, product_id, ref_lsn, offset, kind
+INDEX_ENTRY = struct.Struct('<qqqqqq')
+
+# Product index entry: product_id, position in the segment index
+PRODUCT_ENTRY = struct.Struct('<qq')
+
+SEGMENT_SUFFIX = '.log'
+INDEX_SUFFIX = '.idx'
+PRODUCT_INDEX_SUFFIX = '.pidx'
+CHECKPOINT_FILE = 'checkpoint.json'
+
+
+def _product_key(product_id):
+    """Integer product id for the index (-1 if the id is not an integer)"""
+    try:
+        return int(product_id)
+    except (TypeError, ValueError):
+        return -1
+
+
+class _IndexView:
+    """Sequence view over a memory-mapped index file of fixed-width entries"""
+
+    def __init__(self, path, entry=INDEX_ENTRY):
+        self._entry = entry
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._count = size // entry.size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._count else None
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._entry.unpack_from(self._map, i * self._entry.size)
+
+    def column(self, field):
+        """Lazy sequence of one field of every entry, for bisecting"""
+        view = self
+
+        class _Column:
+            def __len__(self):
+                return len(view)
+
+            def __getitem__(self, i):
+                return view[i][field]
+
+        return _Column()
+
+    def timestamps(self):
+        """Lazy sequence of index timestamps for bisecting"""
+        return self.column(1)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventLog:
+    """
+    Segmented append-only event and decision log
+
+    Args:
+        directory (str): Directory holding segment and index files
+        segment_bytes (int): Size after which a new segment is started
+        fsync_interval (float): Maximum seconds between fsyncs
+        fsync_batch (int): Records after which an fsync is forced
+        max_segments (int): Oldest segments beyond this count are deleted
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, fsync_interval=0.2,
+                 fsync_batch=256, max_segments=None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.max_segments = max_segments
+        self._lock = threading.RLock()
+        self._unsynced = 0
+        self._closed = threading.Event()
+        # Product id -> positions in the active segment's index
+        self._active_products = {}
+        self._active_count = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._segments = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+        self._next_lsn = self._recover_last_segment() if self._segments else 0
+        # Events logged by this process start here; older ones may need replay
+        self.start_lsn = self._next_lsn
+        if not self._segments:
+            self._segments.append(self._next_lsn)
+        for base in self._segments[:-1]:
+            if not os.path.exists(self._product_index_path(base)):
+                self._write_product_index(base)
+        self._open_active()
+        self._counts = {KIND_EVENT: 0, KIND_DECISION: 0}
+        for base in self._segments:
+            for kind, n in self._count_segment(base).items():
+                self._counts[kind] += n
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="event-log-flusher", daemon=True)
+        self._flusher.start()
+        logger.info(f"Event log opened at {directory} ({len(self._segments)} segments, next lsn {self._next_lsn})")
+
+    # Paths and segment management
+
+    def _log_path(self, base):
+        return os.path.join(self.directory, f"{base:020d}{SEGMENT_SUFFIX}")
+
+    def _index_path(self, base):
+        return os.path.join(self.directory, f"{base:020d}{INDEX_SUFFIX}")
+
+    def _product_index_path(self, base):
+        return os.path.join(self.directory, f"{base:020d}{PRODUCT_INDEX_SUFFIX}")
+
+    def _write_product_index(self, base):
+        """Write the sorted product index of a sealed segment"""
+        with _IndexView(self._index_path(base)) as index:
+            entries = sorted((index[i][2], i) for i in range(len(index)))
+        path = self._product_index_path(base)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(b''.join(PRODUCT_ENTRY.pack(*entry) for entry in entries))
+        os.replace(f"{path}.tmp", path)
+
+    def _open_active(self):
+        base = self._segments[-1]
+        self._log = open(self._log_path(base), 'ab')
+        self._index = open(self._index_path(base), 'ab')
+        self._size = self._log.tell()
+
+    def _recover_last_segment(self):
+        """
+        Truncate a torn tail of the last segment and rebuild its index
+
+        Returns:
+            int: Next log sequence number
+        """
+        base = self._segments[-1]
+        log_path = self._log_path(base)
+        entries = []
+        good_end = 0
+        next_lsn = base
+
+        with open(log_path, 'rb') as f:
+            data = f.read()
+        while good_end + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, good_end)
+            start = good_end + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            record = json.loads(payload)
+            self._active_products.setdefault(record["product_id"], []).append(len(entries))
+            entries.append(INDEX_ENTRY.pack(record["lsn"], record["ts_ns"], record["product_id"],
+                                            record["ref"], good_end, record["kind"]))
+            next_lsn = record["lsn"] + 1
+            good_end = start + length
+
+        if good_end < len(data):
+            logger.warning(f"Event log: truncating {len(data) - good_end} torn bytes from {log_path}")
+            with open(log_path, 'r+b') as f:
+                f.truncate(good_end)
+        with open(self._index_path(base), 'wb') as f:
+            f.write(b''.join(entries))
+        self._active_count = len(entries)
+        return next_lsn
+
+    def _roll(self):
+        """Close the active segment durably and start a new one"""
+        self._sync()
+        self._log.close()
+        self._index.close()
+        self._write_product_index(self._segments[-1])
+        self._active_products = {}
+        self._active_count = 0
+        self._segments.append(self._next_lsn)
+        self._open_active()
+
+        if self.max_segments and len(self._segments) > self.max_segments:
+            for base in self._segments[:-self.max_segments]:
+                for kind, n in self._count_segment(base).items():
+                    self._counts[kind] -= n
+                for path in (self._log_path(base), self._index_path(base), self._product_index_path(base)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            del self._segments[:-self.max_segments]
+
+    # Writing
+
+    def _append(self, kind, data, product_id, ref_lsn=-1):
+        with self._lock:
+            lsn = self._next_lsn
+            ts_ns = time.time_ns()
+            product_key = _product_key(product_id)
+            payload = json.dumps({"lsn": lsn, "kind": kind, "ts_ns": ts_ns, "product_id": product_key,
+                                  "ref": ref_lsn, "data": data}).encode('utf-8')
+            offset = self._size
+            self._log.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._index.write(INDEX_ENTRY.pack(lsn, ts_ns, product_key, ref_lsn, offset, kind))
+            self._active_products.setdefault(product_key, []).append(self._active_count)
+            self._active_count += 1
+            self._size += RECORD_HEADER.size + len(payload)
+            self._next_lsn = lsn + 1
+            self._counts[kind] += 1
+            self._unsynced += 1
+
+            if self._unsynced >= self.fsync_batch:
+                self._sync()
+            if self._size >= self.segment_bytes:
+                self._roll()
+            return lsn
+
+    def append_event(self, event):
+        """
+        Record an emitted price event and stamp it with its log sequence number
+
+        Returns:
+            int: Log sequence number of the event
+        """
+        data = {k: v for k, v in event.items() if k != 'lsn'}
+        event['lsn'] = self._append(KIND_EVENT, data, event.get('product_id'))
+        return event['lsn']
+
+    def append_decision(self, event, decision, details="", extra=None):
+        """
+        Record the decision taken for a logged event, committing it
+
+        Args:
+            event (dict): The logged event
+            decision (str): Decision taken
+            details (str): Alert details or reason
+            extra (dict): Additional fields stored with the decision
+
+        Returns:
+            int or None: Log sequence number of the decision, or None if the
+            event was never logged
+        """
+        ref_lsn = event.get('lsn')
+        if ref_lsn is None:
+            return None
+        data = {"decision": decision, "details": details}
+        if extra:
+            data.update(extra)
+        return self._append(KIND_DECISION, data, event.get('product_id'), ref_lsn)
+
+    def _sync(self):
+        self._log.flush()
+        self._index.flush()
+        os.fsync(self._log.fileno())
+        os.fsync(self._index.fileno())
+        self._unsynced = 0
+
+    def flush(self):
+        """Force buffered records to disk"""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.fsync_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Event log flush error: {str(e)}")
+
+    def close(self):
+        """Flush and close the log"""
+        self._closed.set()
+        with self._lock:
+            self._sync()
+            self._log.close()
+            self._index.close()
+
+    # Reading
+
+    def _segment_bases(self):
+        """Return segment bases after making buffered writes readable"""
+        with self._lock:
+            self._log.flush()
+            self._index.flush()
+            return list(self._segments)
+
+    def _read_record(self, base, offset):
+        with open(self._log_path(base), 'rb') as f:
+            f.seek(offset)
+            length, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            return json.loads(f.read(length))
+
+    def _read_checkpoint(self):
+        """Lowest sequence number that may still be pending (0 without a checkpoint)"""
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE), 'r') as f:
+                return int(json.load(f)["pending_from"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+    def _write_checkpoint(self, pending_from):
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump({"pending_from": pending_from}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def pending_events(self, before_lsn=None):
+        """
+        Return logged events that have no decision yet, oldest first
+
+        Segments that lie entirely below the checkpoint (every event in
+        them was committed when it was written) are skipped; the lowest
+        pending sequence number found is checkpointed for the next call.
+
+        Args:
+            before_lsn (int): Only consider events below this sequence number
+                (defaults to ``start_lsn``, i.e. events from earlier runs)
+
+        Returns:
+            list: Event dicts stamped with their ``lsn``
+        """
+        before_lsn = self.start_lsn if before_lsn is None else before_lsn
+        pending_from = self._read_checkpoint()
+        bases = self._segment_bases()
+        # Decisions always follow their event, so start at the checkpoint's segment
+        first = max(0, bisect.bisect_right(bases, pending_from) - 1)
+        events = {}
+        committed = set()
+        for base in bases[first:]:
+            with _IndexView(self._index_path(base)) as index:
+                for i in range(len(index)):
+                    lsn, _, _, ref_lsn, offset, kind = index[i]
+                    if kind == KIND_EVENT:
+                        if pending_from <= lsn < before_lsn:
+                            events[lsn] = (base, offset)
+                    else:
+                        committed.add(ref_lsn)
+
+        pending = []
+        for lsn in sorted(set(events) - committed):
+            record = self._read_record(*events[lsn])
+            event = record["data"]
+            event["lsn"] = lsn
+            pending.append(event)
+        self._write_checkpoint(pending[0]["lsn"] if pending else max(pending_from, before_lsn))
+        return pending
+
+    def records(self, kind=KIND_EVENT):
+        """
+        Iterate over every retained record of a kind, oldest first
+
+        Only the index is scanned up front; records are read one at a time.
+
+        Yields:
+            dict: Records with lsn, kind, ts_ns, product_id, ref and data
+        """
+        for base in self._segment_bases():
+            with _IndexView(self._index_path(base)) as index:
+                offsets = [index[i][4] for i in range(len(index)) if index[i][5] == kind]
+            for offset in offsets:
+                yield self._read_record(base, offset)
+
+    def _product_positions(self, base, product_key):
+        """Index positions of a product's records in one segment, ascending"""
+        with self._lock:
+            if base == self._segments[-1]:
+                return list(self._active_products.get(product_key, ()))
+            path = self._product_index_path(base)
+            if not os.path.exists(path):
+                self._write_product_index(base)
+        with _IndexView(path, PRODUCT_ENTRY) as products:
+            keys = products.column(0)
+            first = bisect.bisect_left(keys, product_key)
+            last = bisect.bisect_right(keys, product_key)
+            return [products[i][1] for i in range(first, last)]
+
+    def page(self, page=1, page_size=50, product_id=None, kind=KIND_EVENT):
+        """
+        Read one page of records, newest first
+
+        Only index entries are read (for a product, just its entries, found
+        through the product index); only the records on the requested page
+        are read from the segment files.
+
+        Args:
+            page (int): 1-based page number
+            page_size (int): Records per page
+            product_id: Only return records for this product
+            kind (int): KIND_EVENT or KIND_DECISION
+
+        Returns:
+            list: Records as dicts with lsn, kind, ts_ns, product_id, ref and data
+        """
+        skip = (max(1, page) - 1) * page_size
+        product_key = None if product_id is None else _product_key(product_id)
+        selected = []
+        for base in reversed(self._segment_bases()):
+            with _IndexView(self._index_path(base)) as index:
+                if product_key is None:
+                    positions = range(len(index) - 1, -1, -1)
+                else:
+                    positions = reversed(self._product_positions(base, product_key))
+                for i in positions:
+                    if i >= len(index):
+                        # Written after the index view was mapped
+                        continue
+                    entry = index[i]
+                    if entry[5] != kind:
+                        continue
+                    if skip:
+                        skip -= 1
+                        continue
+                    selected.append((base, entry[4]))
+                    if len(selected) >= page_size:
+                        break
+            if len(selected) >= page_size:
+                break
+        return [self._read_record(base, offset) for base, offset in selected]
+
+    def time_range(self, start_ns, end_ns, limit=1000):
+        """
+        Read records appended between two timestamps (epoch ns), oldest first
+
+        Uses a binary search over each memory-mapped index.
+
+        Returns:
+            list: Records as dicts
+        """
+        selected = []
+        for base in self._segment_bases():
+            with _IndexView(self._index_path(base)) as index:
+                if not len(index) or index[-1][1] < start_ns or index[0][1] > end_ns:
+                    continue
+                timestamps = index.timestamps()
+                first = bisect.bisect_left(timestamps, start_ns)
+                last = bisect.bisect_right(timestamps, end_ns)
+                for i in range(first, last):
+                    selected.append((base, index[i][4]))
+                    if len(selected) >= limit:
+                        break
+            if len(selected) >= limit:
+                break
+        return [self._read_record(base, offset) for base, offset in selected]
+
+    def _count_segment(self, base):
+        """Count the records of each kind in one segment"""
+        counts = {KIND_EVENT: 0, KIND_DECISION: 0}
+        with _IndexView(self._index_path(base)) as index:
+            for i in range(len(index)):
+                counts[index[i][5]] += 1
+        return counts
+
+    def count(self, kind=KIND_EVENT):
+        """Number of retained records of a kind"""
+        with self._lock:
+            return self._counts[kind]
+
+
+_event_log = None
+_event_log_lock = threading.Lock()
+
+
+def open_event_log(settings):
+    """
+    Return the process-wide event log, opening it on first use
+
+    Args:
+        settings (dict): Application settings (uses the "event_log" section)
+
+    Returns:
+        EventLog or None: The log, or None if it is disabled
+    """
+    global _event_log
+    log_settings = (settings or {}).get('event_log', {})
+    if not log_settings.get('enabled', False):
+        return None
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog(
+                log_settings.get('path', 'data/event_log'),
+                segment_bytes=log_settings.get('segment_mb', 64) * 1024 * 1024,
+                fsync_interval=log_settings.get('fsync_interval_ms', 200) / 1000.0,
+                fsync_batch=log_settings.get('fsync_batch', 256),
+                max_segments=log_settings.get('max_segments'),
+            )
+        return _event_log
+
+
+def get_event_log():
+    """Return the process-wide event log if it has been opened, else None"""
+    return _event_log
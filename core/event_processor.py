@@ -3,15 +3,33 @@ Event Processor - Processes price events with AI agents
 """
 
 import os
-import yaml
+import time
+import threading
 import logging
-from crewai import Crew, Process
-from config.constants import (
-    INPUT_QUEUE, OUTPUT_QUEUE,
-    DESIRED_CATEGORIES, PRICE_DROP_THRESHOLD
+from queue import Empty, Full
+from config.constants import INPUT_QUEUE, OUTPUT_QUEUE
+from config.service import close_config_service, current_config, get_config_service, open_config_service
+from config.settings import load_settings
+from agents.prompting import compact_mode, configure_prompts, select_templates
+from agents.rate_limiter import configure_scheduler, llm_priority
+from core.alert_sinks import open_alert_dispatcher, get_alert_dispatcher, close_alert_dispatcher
+from core.batch_analysis import format_batch_events, parse_batch_verdicts, parse_verdict
+from core.batching import drain_batch, get_consumer_stats
+from core.coalescing import make_coalescer
+from core.dead_letter import open_dead_letter_queue, get_dead_letter_queue
+from core.decision_cache import CONFIG_FILES, DecisionCache
+from core.decision_classifier import get_classifier, open_classifier
+from core.event_log import open_event_log, get_event_log
+from core.event_store import ALERT_HISTORY
+from core.metrics import (
+    EVENTS_TOTAL, EVENTS_COALESCED_TOTAL, EVENTS_UNCHANGED_TOTAL, ALERTS_TOTAL, ERRORS_TOTAL,
+    QUEUE_WAIT_SECONDS, RULE_SECONDS, LLM_SECONDS, CREW_SECONDS,
+    CREW_OVERHEAD_SECONDS, END_TO_END_SECONDS, start_metrics_exporter
 )
-from agents.agent_factory import create_pricing_analyst, create_notification_manager
-from crewai import Task
+from core.price_history import make_price_history
+from core.rules import RULE_IGNORE, compute_price_drop, evaluate_events, get_rule_stats
+from core.startup import preload_agents
+from core.worker_pool import WorkerPool
 
 # Set up logging
 logging.basicConfig(level=logging.INFO,
@@ -20,81 +38,671 @@ logger = logging.getLogger(__name__)
 
 
 def load_prompts():
-    """Load prompt templates from YAML file"""
+    """Return the prompt templates of the current configuration snapshot"""
+    return current_config().prompts
+
+
+def make_decision_cache(settings):
+    """
+    Build the decision cache shared by all workers from the "cache" settings
+
+    With a config service the cache follows the snapshot's decision version,
+    so it is only cleared when the prompts, the agents, the "monitoring"
+    settings or the prompt mode change; otherwise it fingerprints the prompt files itself.
+
+    Returns:
+        DecisionCache or None: None when the cache is disabled
+    """
+    cache_settings = settings.get('cache', {})
+    if not cache_settings.get('enabled', True):
+        return None
+    service = get_config_service()
+    cache = DecisionCache(
+        max_entries=cache_settings.get('max_entries', 10000),
+        ttl_seconds=cache_settings.get('ttl_seconds', 3600.0),
+        price_bucket=cache_settings.get('price_bucket', 0.005),
+        history_bucket=cache_settings.get('history_bucket', 0.05),
+        version_check_interval=cache_settings.get('version_check_interval', 5.0),
+        config_files=() if service is not None else CONFIG_FILES,
+    )
+    if service is not None:
+        cache.set_version(service.snapshot.decision_version)
+        service.subscribe(lambda snapshot, changed: cache.set_version(snapshot.decision_version),
+                          "prompts", "agents", "settings.monitoring", "settings.prompts")
+    return cache
+
+
+def build_crew_inputs(event):
+    """Build the template inputs used to parameterise the analysis crew"""
+    config = current_config()
+    return {
+        "product_name": str(event['product_name']),
+        "category": str(event['category']),
+        "our_price": str(event['our_price']),
+        "competitor_price": str(event['competitor_price']),
+        "price_history": str(event.get('price_history', 'not tracked')),
+        "desired_categories": str(list(config.category_names)),
+        "price_drop_threshold": str(config.price_drop_threshold * 100),
+    }
+
+
+def event_priority(event):
+    """LLM scheduling priority of an event: its price drop (larger drops first)"""
+    return compute_price_drop(event.get('our_price'), event.get('competitor_price')) or 0.0
+
+
+def run_crew(crew, inputs, first_agent="pricing_analyst", task="analysis"):
+    """
+    Run a crew and record its wall time, per-agent LLM time and overhead
+
+    Args:
+        crew (Crew): Crew to run
+        inputs (dict): Template inputs for the crew
+        first_agent (str): Agent that runs the crew's first task
+        task (str): Task name for token accounting
+
+    Returns:
+        str: Crew output
+    """
+    from agents.instrumentation import begin_crew_accounting, end_crew_accounting
+
+    begin_crew_accounting(first_agent, task)
+    start = time.perf_counter()
+    try:
+        return str(crew.kickoff(inputs=inputs))
+    finally:
+        elapsed = time.perf_counter() - start
+        llm_seconds = end_crew_accounting()
+        CREW_SECONDS.observe(elapsed)
+        for agent, seconds in llm_seconds.items():
+            LLM_SECONDS.observe(seconds, agent=agent)
+        CREW_OVERHEAD_SECONDS.observe(max(0.0, elapsed - sum(llm_seconds.values())))
+
+
+def emit_alert(event, details):
+    """
+    Attach the alert details to an event, record it in the alert history,
+    publish it on the output queue and hand it to the alert outputs
+
+    The output queue is bounded; if no consumer keeps up, the oldest
+    pending alert is dropped so that the workers never block here. Delivery
+    to the alert outputs happens on the dispatcher's own thread.
+    """
+    event["alert_details"] = details
+    ALERT_HISTORY.append(event)
+    while True:
+        try:
+            OUTPUT_QUEUE.put_nowait(event)
+            break
+        except Full:
+            try:
+                OUTPUT_QUEUE.get_nowait()
+            except Empty:
+                pass
+    dispatcher = get_alert_dispatcher()
+    if dispatcher is not None:
+        dispatcher.submit(event)
+    ALERTS_TOTAL.inc()
+    if event.get('emitted_ns'):
+        END_TO_END_SECONDS.observe((time.time_ns() - event['emitted_ns']) / 1e9)
+    logger.info(f"Alert generated for {event['product_name']}")
+
+
+def commit_decision(event, decision, details=""):
+    """
+    Record a decision in the durable event log, if one is open
+
+    Decisions taken by the analyst or the local classifier are stored with
+    their source and, when the classifier logs them, its features (the
+    classifier's training data).
+    """
+    event_log = get_event_log()
+    if event_log is not None:
+        extra = None
+        if event.get('decided_by') is not None:
+            extra = {"source": event['decided_by']}
+            if event.get('decision_features') is not None:
+                extra["features"] = event['decision_features']
+        event_log.append_decision(event, decision, details, extra)
+
+
+def dead_letter_event(event, error, stage="analysis"):
+    """
+    Hand an event whose LLM calls failed after every retry to the dead
+    letter queue, committing it so it is not replayed from the event log
+
+    Without a dead letter queue the failure is only logged (and the event
+    stays pending in the event log).
+    """
+    ERRORS_TOTAL.inc(stage=stage)
+    dead_letters = get_dead_letter_queue()
+    if dead_letters is None:
+        logger.error(f"Event {stage} error: {str(error)}")
+        return
+    dead_letters.put(event, error, stage)
+    commit_decision(event, "DEAD_LETTER", str(error))
+
+
+def apply_decision(event, decision, details="", cache=None):
+    """
+    Apply a final ALERT/IGNORE decision to an event
+
+    Stores it in the decision cache (if given), commits it to the event log
+    and publishes ALERT events.
+
+    Returns:
+        bool: True if an alert was generated
+    """
+    if cache is not None:
+        cache.put(event, current_config().price_drop_threshold, decision, details if decision == "ALERT" else "")
+    commit_decision(event, decision, details if decision == "ALERT" else "")
+    if decision == "ALERT":
+        emit_alert(event, details)
+        return True
+    return False
+
+
+def apply_cached_decision(event, cache):
+    """
+    Apply a previous decision for an equivalent event, if one is cached
+
+    Returns:
+        bool or None: Whether an alert was generated, or None on a cache miss
+    """
+    cached = cache.get(event, current_config().price_drop_threshold) if cache is not None else None
+    if cached is None:
+        return None
+    logger.info(f"Cached {cached['decision']} decision reused for {event['product_name']}")
+    event["cached_decision"] = True
+    return apply_decision(event, cached["decision"], cached["details"])
+
+
+def notify_event(event, notification_crew, cache=None):
+    """
+    Produce the notification for an event decided as ALERT and publish it
+
+    Args:
+        event (dict): Pricing event decided as ALERT
+        notification_crew (Crew): Notification crew from the agent registry
+        cache (DecisionCache): Optional cache of earlier decisions
+
+    Returns:
+        bool: True (an alert was generated)
+    """
+    with llm_priority(event_priority(event)):
+        details = run_crew(notification_crew, build_crew_inputs(event), "notification_manager", "notification")
+    return apply_decision(event, "ALERT", details, cache)
+
+
+def decide_event(event, decision, notify, cache=None):
+    """
+    Apply an analyst verdict, handing ALERT events to ``notify``
+
+    Returns:
+        bool: True if the event was decided as ALERT
+    """
+    if decision == "ALERT":
+        notify(event)
+        return True
+    return apply_decision(event, decision, cache=cache)
+
+
+def classify_event(event, notify, cache=None):
+    """
+    Let the local classifier decide an event if it is confident enough
+
+    Returns:
+        bool or None: Whether the event was decided as ALERT, or None if it
+        has to be escalated to the analyst
+    """
+    classifier = get_classifier()
+    decision = classifier.classify(event) if classifier is not None else None
+    if decision is None:
+        return None
+    return decide_event(event, decision, notify, cache)
+
+
+def analyze_event(event, crew, notify, cache=None, classify=True):
+    """
+    Run the pricing analyst on a single pricing event
+
+    The analyst only returns a verdict. IGNORE events are committed right
+    away; ALERT events are handed to ``notify``, which runs the notification
+    manager and publishes the alert. When a decision cache is given, a
+    previous decision for an equivalent event is reused instead, and the
+    local classifier decides the events it is confident about.
+
+    Args:
+        event (dict): Pricing event
+        crew (Crew): Reusable analysis crew from the agent registry
+        notify (callable): Called with each event decided as ALERT
+        cache (DecisionCache): Optional cache of earlier decisions
+        classify (bool): Try the local classifier first (False when it
+            already escalated the event)
+
+    Returns:
+        bool: True if the event was decided as ALERT
+    """
+    alerted = apply_cached_decision(event, cache)
+    if alerted is None and classify:
+        alerted = classify_event(event, notify, cache)
+    if alerted is not None:
+        return alerted
+
+    logger.info(f"Processing event for {event['product_name']}")
+
+    # Phase one: get the analyst's verdict
+    with llm_priority(event_priority(event)):
+        result = run_crew(crew, build_crew_inputs(event))
+    try:
+        decision = parse_verdict(result)
+        event["decided_by"] = "llm"
+    except ValueError as e:
+        # Err on the side of alerting rather than dropping a real price drop
+        ERRORS_TOTAL.inc(stage="verdict_parse")
+        logger.warning(f"{str(e)}; treating {event['product_name']} as ALERT")
+        decision = "ALERT"
+
+    # Phase two (ALERT only): notification
+    return decide_event(event, decision, notify, cache)
+
+
+def analyze_batch(events, batch_crew, crew, notify, cache=None):
+    """
+    Analyze several pricing events with a single LLM request
+
+    Cached decisions are applied first, then the local classifier decides
+    the events it is confident about; the remaining events are packed into
+    one batch prompt. Events whose verdict cannot be parsed from the reply
+    fall back to single-event analysis. Events decided as ALERT are handed
+    to ``notify``.
+
+    Args:
+        events (list): Pricing events
+        batch_crew (Crew): Batch analysis crew from the agent registry
+        crew (Crew): Single-event analysis crew used as fallback
+        notify (callable): Called with each event decided as ALERT
+        cache (DecisionCache): Optional cache of earlier decisions
+
+    Returns:
+        int: Number of events decided as ALERT
+    """
+    alerts = 0
+    pending = []
+    for event in events:
+        try:
+            alerted = apply_cached_decision(event, cache)
+            if alerted is None:
+                alerted = classify_event(event, notify, cache)
+        except Exception as e:
+            dead_letter_event(event, e)
+            continue
+        if alerted is None:
+            pending.append(event)
+        else:
+            alerts += int(alerted)
+
+    if len(pending) == 1:
+        try:
+            alerts += int(analyze_event(pending[0], crew, notify, cache, classify=False))
+        except Exception as e:
+            dead_letter_event(pending[0], e)
+        return alerts
+    if not pending:
+        return alerts
+
+    logger.info(f"Processing batch of {len(pending)} events")
+    inputs = build_crew_inputs(pending[0])
+    inputs["events"] = format_batch_events(pending, compact_mode())
     try:
-        with open('config/prompts.yaml', 'r') as f:
-            return yaml.safe_load(f)
+        with llm_priority(max(event_priority(event) for event in pending)):
+            result = run_crew(batch_crew, inputs, task="batch_analysis")
     except Exception as e:
-        logger.error(f"Failed to load prompts: {str(e)}")
-        return {}
+        for event in pending:
+            dead_letter_event(event, e)
+        return alerts
+    try:
+        verdicts = parse_batch_verdicts(result, len(pending))
+    except ValueError as e:
+        ERRORS_TOTAL.inc(stage="batch_parse")
+        logger.warning(f"Batch analysis output unusable, falling back to single events: {str(e)}")
+        verdicts = {}
+
+    for index, event in enumerate(pending):
+        try:
+            decision = verdicts.get(index)
+            if decision is None:
+                alerts += int(analyze_event(event, crew, notify, cache, classify=False))
+            else:
+                event["decided_by"] = "llm"
+                alerts += int(decide_event(event, decision, notify, cache))
+        except Exception as e:
+            dead_letter_event(event, e)
+    return alerts
 
 
-def process_event():
+def make_notification_handler(cache=None):
+    """
+    Build a handler that writes and publishes notifications for ALERT events
+
+    Called once per notification worker thread.
+
+    Args:
+        cache (DecisionCache): Optional decision cache shared by all workers
+
+    Returns:
+        callable: Function taking a list of events
+    """
+    from agents.registry import get_notification_crew
+
+    def handle(batch):
+        try:
+            # Templates come from the current snapshot, so prompt edits apply to the next batch
+            templates = select_templates(load_prompts())
+            notification_crew = get_notification_crew(templates['notification_event_template'],
+                                                      templates['notification_template'])
+        except Exception as e:
+            for event in batch:
+                dead_letter_event(event, e, stage="notification")
+            return
+        for event in batch:
+            try:
+                notify_event(event, notification_crew, cache)
+            except Exception as e:
+                dead_letter_event(event, e, stage="notification")
+
+    return handle
+
+
+def make_event_handler(cache=None, batch_analysis=False, notification_pool=None):
+    """
+    Build a handler that analyzes batches of events with the AI agents
+
+    Called once per worker thread; agents and crew templates come from
+    the per-thread cache of the agent registry.
+
+    Args:
+        cache (DecisionCache): Optional decision cache shared by all workers
+        batch_analysis (bool): Send each batch to the analyst as one request
+        notification_pool (WorkerPool): Pool that writes notifications for
+            ALERT events; without one they are written on the calling thread
+
+    Returns:
+        callable: Function taking a list of events
+    """
+    # CrewAI is imported by the first worker that needs it, not at startup
+    from agents.registry import get_analysis_crew, get_batch_analysis_crew, get_notification_crew
+
+    def handle(batch):
+        try:
+            # Prompt templates of the current snapshot (compact variants in
+            # compact prompt mode), so prompt edits apply to the next batch
+            templates = select_templates(load_prompts())
+            crew = get_analysis_crew(templates['pricing_analysis_template'])
+            if notification_pool is not None:
+                notify = notification_pool.submit
+            else:
+                notification_crew = get_notification_crew(templates['notification_event_template'],
+                                                          templates['notification_template'])
+                notify = lambda event: notify_event(event, notification_crew, cache)
+            batch_crew = None
+            if batch_analysis and len(batch) > 1:
+                batch_crew = get_batch_analysis_crew(templates['batch_analysis_template'])
+        except Exception as e:
+            # Without crews no event of the batch can be analyzed
+            for event in batch:
+                dead_letter_event(event, e)
+            return
+
+        if batch_crew is not None:
+            analyze_batch(batch, batch_crew, crew, notify, cache)
+            return
+        for event in batch:
+            try:
+                analyze_event(event, crew, notify, cache)
+            except Exception as e:
+                dead_letter_event(event, e)
+
+    return handle
+
+
+def requeue_events(events):
+    """Put previously logged events back on the input queue"""
+    for event in events:
+        INPUT_QUEUE.put(event)
+
+
+def collapse_event(event):
+    """Record an event superseded by a newer update for the same product"""
+    EVENTS_COALESCED_TOTAL.inc()
+    commit_decision(event, RULE_IGNORE, "superseded by a newer update")
+
+
+def filter_unchanged(batch, history):
+    """
+    Record each event in the price history and drop unchanged ones
+
+    Events whose competitor price did not move significantly since the
+    product was last analyzed are committed as IGNORE (when the history
+    suppresses them); the others are annotated with their history summary
+    for the prompt and with its signals for the decision classifier.
+
+    Returns:
+        list: Events that still need a decision
+    """
+    kept = []
+    for event in batch:
+        signal = history.observe(event)
+        if history.suppress_unchanged and not signal.significant:
+            EVENTS_UNCHANGED_TOTAL.inc()
+            commit_decision(event, RULE_IGNORE,
+                            f"competitor price changed {signal.change * 100:+.2f}% since last analyzed")
+            continue
+        event['price_history'] = signal.describe()
+        event['price_signal'] = signal.features()
+        kept.append(event)
+    return kept
+
+
+def dispatch_events(batch, pool, catalog=None, history=None):
+    """
+    Run a batch through the price history and the rule pre-filter and hand
+    the rest to the pool
+
+    Args:
+        batch (list): Pricing events
+        pool (WorkerPool): Analysis worker pool
+        catalog (ProductCatalog): Optional catalog for the rule engine
+        history (PriceHistory): Optional per-product price history
+    """
+    if history is not None:
+        batch = filter_unchanged(batch, history)
+        if not batch:
+            return
+
+    # Decide clear-cut cases without calling the agents
+    if current_config().rule_prefilter:
+        with RULE_SECONDS.time():
+            verdicts = evaluate_events(batch, catalog=catalog)
+        escalated = []
+        for event, (verdict, reason) in zip(batch, verdicts):
+            if verdict == RULE_IGNORE:
+                commit_decision(event, verdict, reason)
+            else:
+                escalated.append(event)
+        if len(escalated) < len(batch):
+            stats = get_rule_stats()
+            logger.info(f"Rule pre-filter ignored {len(batch) - len(escalated)}/{len(batch)} events "
+                        f"({stats['short_circuited']}/{stats['evaluated']} short-circuited)")
+    else:
+        escalated = batch
+
+    # Blocks while the responsible worker is saturated (back-pressure)
+    for event in escalated:
+        try:
+            pool.submit(event)
+        except RuntimeError as e:
+            dead_letter_event(event, e, stage="dispatch")
+
+
+def process_event(stop_event=None, settings=None, ready_event=None):
     """
     Process pricing events from the input queue using AI agents
 
-    This function continuously monitors the input queue for new pricing events,
-    and when one is found, it processes it with the AI agents to determine
+    This function blocks on the input queue and drains pricing events in
+    micro-batches. Bursts of updates for the same product are coalesced
+    within a short window (when enabled), and events whose competitor price
+    did not change significantly are dropped; each batch is then run through
+    the rule pre-filter and the remaining events are dispatched to a pool
+    of analysis workers, which process them with the AI agents to determine
     if an alert should be generated.
+
+    Args:
+        stop_event (threading.Event): Optional event that requests a graceful
+            shutdown; queued events are analyzed before returning
+        settings (dict): Settings to use instead of config/settings.json
+        ready_event (threading.Event): Optional event set once the processor
+            is consuming the input queue
     """
-    # Load prompt templates
-    prompts = load_prompts()
-    pricing_template = prompts.get('pricing_analysis_template', '')
-    notification_template = prompts.get('notification_template', '')
+    settings = load_settings() if settings is None else settings
+    open_config_service(settings)
+    start_metrics_exporter(settings)
+    open_dead_letter_queue(settings)
+    open_alert_dispatcher(settings)
+    configure_prompts(settings)
+    configure_scheduler(settings)
 
-    # Initialize agents
-    pricing_analyst = create_pricing_analyst()
-    notification_manager = create_notification_manager()
+    # Load consumer settings
+    processing_settings = settings.get('processing', {})
+    batch_size = max(1, int(processing_settings.get('batch_size', 16)))
+    linger = processing_settings.get('batch_linger_ms', 50) / 1000.0
+    poll_timeout = processing_settings.get('poll_timeout', 1.0)
+    stats_interval = processing_settings.get('stats_interval', 60.0)
 
-    logger.info("Event processor started")
+    # Evaluate rules against the columnar catalog when one is configured
+    catalog_path = settings.get('catalog', {}).get('path')
+    catalog = None
+    if catalog_path:
+        from core.catalog import load_catalog
+        catalog = load_catalog(catalog_path)
 
-    while True:
+    # Share one decision cache between all workers; the local classifier
+    # decides confident events before they reach the analyst
+    cache = make_decision_cache(settings)
+    classifier = open_classifier(settings)
+
+    # Start the analysis workers; in batch analysis mode each worker packs
+    # up to analysis_batch_size queued events into one LLM request
+    batch_analysis = processing_settings.get('batch_analysis', False)
+
+    # Notifications are only written for ALERT events, on a smaller pool so
+    # that they never compete with verdicts for most of the LLM capacity
+    notification_pool = WorkerPool(
+        lambda: make_notification_handler(cache),
+        num_workers=processing_settings.get('notification_workers', 1),
+        queue_size=processing_settings.get('notification_queue_size', 256),
+        poll_timeout=poll_timeout,
+        name="notification-worker",
+        on_abandoned=lambda event, error: dead_letter_event(event, error, stage="notification"),
+    ).start()
+
+    pool = WorkerPool(
+        lambda: make_event_handler(cache, batch_analysis, notification_pool),
+        num_workers=processing_settings.get('workers', 4),
+        queue_size=processing_settings.get('worker_queue_size', 64),
+        batch_size=processing_settings.get('analysis_batch_size', 8) if batch_analysis else 1,
+        linger=linger,
+        poll_timeout=poll_timeout,
+        name="analysis-worker",
+        on_abandoned=lambda event, error: dead_letter_event(event, error, stage="dispatch"),
+    ).start()
+
+    # Re-queue events from earlier runs that never got a decision
+    event_log = open_event_log(settings)
+    if event_log is not None:
+        pending = event_log.pending_events()
+        if pending:
+            logger.info(f"Replaying {len(pending)} uncommitted events from the event log")
+            threading.Thread(target=requeue_events, args=(pending,), daemon=True).start()
+
+    coalescer = make_coalescer(settings, on_collapse=collapse_event)
+    history = make_price_history(settings)
+
+    # Import the agent frameworks in the background instead of on the first event
+    if settings.get('startup', {}).get('preload_agents', True):
+        preload_agents()
+
+    logger.info(f"Event processor started (batch size {batch_size}, linger {linger * 1000:.0f} ms)")
+    last_stats = time.monotonic()
+    if ready_event is not None:
+        ready_event.set()
+
+    while stop_event is None or not stop_event.is_set():
         try:
-            if not INPUT_QUEUE.empty():
-                event = INPUT_QUEUE.get()
-                logger.info(f"Processing event for {event['product_name']}")
-
-                # Format the pricing analysis prompt
-                analysis_description = pricing_template.format(
-                    product_name=event['product_name'],
-                    category=event['category'],
-                    our_price=event['our_price'],
-                    competitor_price=event['competitor_price'],
-                    desired_categories=DESIRED_CATEGORIES,
-                    price_drop_threshold=PRICE_DROP_THRESHOLD * 100
-                )
-
-                # Create the pricing analysis task
-                analysis_task = Task(
-                    description=analysis_description,
-                    agent=pricing_analyst,
-                    expected_output="ALERT or IGNORE decision",
-                )
-
-                # Create the notification task
-                notification_task = Task(
-                    description=notification_template,
-                    agent=notification_manager,
-                    expected_output="Clear notification message with key details",
-                    context=[analysis_task],
-                )
-
-                # Create and execute the crew
-                crew = Crew(
-                    agents=[pricing_analyst, notification_manager],
-                    tasks=[analysis_task, notification_task],
-                    verbose=True,
-                    process=Process.sequential,
-                )
-
-                # Run the crew and get the result
-                result = crew.kickoff()
-
-                # If the result contains "ALERT", add it to the output queue
-                if "ALERT" in result:
-                    event["alert_details"] = result
-                    OUTPUT_QUEUE.put(event)
-                    logger.info(f"Alert generated for {event['product_name']}")
+            if time.monotonic() - last_stats >= stats_interval:
+                last_stats = time.monotonic()
+                stats = get_consumer_stats()
+                logger.info(f"Consumer stats: {stats['batches']} batches, "
+                            f"avg fill {stats['avg_batch_fill'] * 100:.0f}%, "
+                            f"idle CPU {stats['idle_cpu_ratio'] * 100:.2f}%, "
+                            f"{pool.depth()} events in flight")
+                for worker_pool in (pool, notification_pool):
+                    pool_stats = worker_pool.get_stats()
+                    logger.info(f"{worker_pool.name} pool: {pool_stats['processed']} processed, "
+                                f"{pool_stats['errors']} errors, "
+                                f"avg batch {pool_stats['avg_batch_size']:.1f}")
+                if coalescer is not None:
+                    coalesce_stats = coalescer.get_stats()
+                    logger.info(f"Coalescer: {coalesce_stats['collapsed']}/{coalesce_stats['received']} "
+                                f"events collapsed ({coalesce_stats['collapse_ratio'] * 100:.0f}%), "
+                                f"{coalesce_stats['pending']} products pending")
+                if history is not None:
+                    history_stats = history.get_stats()
+                    logger.info(f"Price history: {history_stats['products']} products, "
+                                f"{history_stats['unchanged']}/{history_stats['observed']} events unchanged, "
+                                f"{history_stats['new_lows']} new lows")
+                if classifier is not None:
+                    classifier_stats = classifier.get_stats()
+                    logger.info(f"Decision classifier: {classifier_stats['classified']} decided locally, "
+                                f"escalation rate {classifier_stats['escalation_rate'] * 100:.0f}% "
+                                f"({classifier_stats['low_confidence']} low confidence, "
+                                f"{classifier_stats['unavailable']} without a usable model)")
+                if cache is not None:
+                    cache_stats = cache.get_stats()
+                    logger.info(f"Decision cache: {cache_stats['size']} entries, "
+                                f"hit rate {cache_stats['hit_rate'] * 100:.0f}% "
+                                f"({cache_stats['hits']} hits, {cache_stats['misses']} misses)")
+
+            # Wake up in time to release the next expiring coalescing window
+            timeout = poll_timeout
+            deadline = coalescer.next_deadline() if coalescer is not None else None
+            if deadline is not None:
+                timeout = max(0.0, min(poll_timeout, deadline - time.monotonic()))
+
+            batch = drain_batch(INPUT_QUEUE, batch_size, linger, timeout)
+            EVENTS_TOTAL.inc(len(batch))
+            now_ns = time.time_ns()
+            for event in batch:
+                if event.get('emitted_ns'):
+                    QUEUE_WAIT_SECONDS.observe((now_ns - event['emitted_ns']) / 1e9)
+
+            # Keep one event per product and window
+            if coalescer is not None:
+                for event in batch:
+                    coalescer.add(event)
+                batch = coalescer.due()
+
+            if batch:
+                dispatch_events(batch, pool, catalog, history)
 
         except Exception as e:
-            logger.error(f"Event processing error: {str(e)}")
\ No newline at end of file
+            ERRORS_TOTAL.inc(stage="dispatch")
+            logger.error(f"Event processing error: {str(e)}")
+
+    if coalescer is not None:
+        dispatch_events(coalescer.flush(), pool, catalog, history)
+    pool.shutdown(drain=True)
+    notification_pool.shutdown(drain=True)
+    close_alert_dispatcher()
+    close_config_service()
+    logger.info("Event processor stopped")
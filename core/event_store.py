@@ -0,0 +1,119 @@
+"""
+Event Store - Bounded, thread-safe history of price events and alerts
+
+Keeps the most recent records in a fixed-size ring buffer for the dashboard
+so that memory stays flat regardless of uptime. The work queues are only
+used for hand-off between stages.
+"""
+
+import threading
+from config.constants import ALERT_HISTORY_SIZE, EVENT_HISTORY_SIZE
+from core.events import format_timestamp
+
+# Fields returned by EventRecord.to_dict
+RECORD_FIELDS = ('seq', 'timestamp', 'product_id', 'product_name', 'category',
+                 'our_price', 'competitor_price', 'price_diff', 'alert_details')
+
+
+class EventRecord:
+    """
+    Compact record of a price event (and its alert details, if any)
+
+    The price difference is computed once when the record is created; the
+    display timestamp is only formatted the first time it is read.
+    """
+
+    __slots__ = ('seq', 'emitted_ns', 'product_id', 'product_name', 'category',
+                 'our_price', 'competitor_price', 'price_diff', 'alert_details', '_timestamp')
+
+    def __init__(self, seq, event):
+        self.seq = seq
+        self.emitted_ns = event.get('emitted_ns')
+        self.product_id = event.get('product_id')
+        self.product_name = event.get('product_name')
+        self.category = event.get('category')
+        self.our_price = event.get('our_price')
+        self.competitor_price = event.get('competitor_price')
+        self.alert_details = event.get('alert_details')
+        # Events recorded with a preformatted timestamp keep it
+        self._timestamp = event['timestamp'] if 'timestamp' in event else None
+        try:
+            self.price_diff = (self.our_price - self.competitor_price) / self.our_price * 100
+        except (TypeError, ZeroDivisionError):
+            self.price_diff = None
+
+    @property
+    def timestamp(self):
+        """Emission time formatted for display"""
+        if self._timestamp is None:
+            self._timestamp = format_timestamp(self.emitted_ns)
+        return self._timestamp
+
+    def to_dict(self):
+        """Return the record as a plain event dict"""
+        return {name: getattr(self, name) for name in RECORD_FIELDS}
+
+
+class HistoryStore:
+    """
+    Fixed-capacity ring buffer of EventRecords
+
+    Appends are O(1) and overwrite the oldest record once full. Each record
+    gets a monotonically increasing sequence number so readers can ask for
+    records newer than the last one they have seen.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._buffer = [None] * self.capacity
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, event):
+        """
+        Record an event dict
+
+        Returns:
+            int: Sequence number assigned to the record
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._buffer[seq % self.capacity] = EventRecord(seq, event)
+            self._next_seq = seq + 1
+            return seq
+
+    def __len__(self):
+        with self._lock:
+            return min(self._next_seq, self.capacity)
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest record, or -1 if empty"""
+        with self._lock:
+            return self._next_seq - 1
+
+    def snapshot(self, limit=None, since_seq=None):
+        """
+        Return retained records, oldest first
+
+        Args:
+            limit (int): Return at most this many of the newest records
+            since_seq (int): Only return records with a sequence number
+                greater than this
+
+        Returns:
+            list: EventRecords
+        """
+        with self._lock:
+            end = self._next_seq
+            start = max(0, end - self.capacity)
+            if since_seq is not None:
+                start = max(start, since_seq + 1)
+            if limit is not None:
+                start = max(start, end - limit)
+            return [self._buffer[seq % self.capacity] for seq in range(start, end)]
+
+
+# Dashboard history (bounded ring buffers of the most recent records)
+EVENT_HISTORY = HistoryStore(EVENT_HISTORY_SIZE)
+ALERT_HISTORY = HistoryStore(ALERT_HISTORY_SIZE)
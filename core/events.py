@@ -0,0 +1,241 @@
+"""
+Price Events - Compact event type and binary batch encoding
+
+``PriceEvent`` replaces the per-event dict with a ``__slots__`` object: an
+integer product id, the prices, and the emission time as epoch nanoseconds.
+Product names and categories are shared with the catalog instead of being
+copied, and the display timestamp is only formatted when something shows
+it. The event also answers the dict protocol (``event['x']``, ``get``,
+item assignment for annotations such as ``lsn`` or ``alert_details``), so
+stages written against dict events keep working unchanged.
+
+Batches of events are encoded with ``struct`` for queue transport and
+persistence: a header, a table of the distinct product names and
+categories in the batch, then one fixed-width record per event with the
+prices as float32 (restored to cents on decode, exact below 65,536).
+"""
+
+import struct
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Batch header: magic, number of strings, number of records
+BATCH_HEADER = struct.Struct('<4sII')
+BATCH_MAGIC = b'PEV1'
+# String table entry: UTF-8 length (followed by the bytes)
+STRING_LENGTH = struct.Struct('<H')
+# Event record: product id, name index, category index, our price,
+# competitor price, emitted_ns
+EVENT_RECORD = struct.Struct('<IIIffq')
+# Frame length prefix of a batch in an event file
+FRAME_LENGTH = struct.Struct('<I')
+
+_FIELDS = ('product_id', 'product_name', 'category', 'our_price', 'competitor_price', 'emitted_ns')
+_FIELD_SET = frozenset(_FIELDS)
+
+
+def format_timestamp(emitted_ns):
+    """Format an epoch-ns time for display (empty string if unknown)"""
+    if not emitted_ns:
+        return ''
+    return datetime.fromtimestamp(emitted_ns / 1e9).strftime(TIMESTAMP_FORMAT)
+
+
+class PriceEvent:
+    """
+    Competitor price event
+
+    Args:
+        product_id (int): Product id
+        product_name (str): Product name
+        category (str): Product category
+        our_price (float): Our price
+        competitor_price (float): Competitor price
+        emitted_ns (int): Emission time in epoch nanoseconds (0 if not emitted yet)
+    """
+
+    __slots__ = _FIELDS + ('_extra',)
+
+    def __init__(self, product_id, product_name, category, our_price, competitor_price, emitted_ns=0):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.category = category
+        self.our_price = our_price
+        self.competitor_price = competitor_price
+        self.emitted_ns = emitted_ns
+        self._extra = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an event from a dict event, keeping its other keys as annotations"""
+        event = cls(data.get('product_id'), data.get('product_name'), data.get('category'),
+                    data.get('our_price'), data.get('competitor_price'), data.get('emitted_ns') or 0)
+        for key, value in data.items():
+            if key not in _FIELD_SET and key != 'timestamp':
+                event[key] = value
+        return event
+
+    @property
+    def timestamp(self):
+        """Emission time formatted for display"""
+        return format_timestamp(self.emitted_ns)
+
+    @property
+    def price_diff(self):
+        """Our price minus the competitor's, in percent of ours (None if unknown)"""
+        try:
+            return (self.our_price - self.competitor_price) / self.our_price * 100
+        except (TypeError, ZeroDivisionError):
+            return None
+
+    # Dict protocol, for stages written against dict events
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if key == 'timestamp':
+            return self.timestamp
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        elif key != 'timestamp':
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return key in _FIELD_SET or (self._extra is not None and key in self._extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """Stored fields and annotations (the timestamp is derived, not stored)"""
+        return list(_FIELDS) + list(self._extra or ())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """Plain dict of the event, e.g. for JSON"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return (f"PriceEvent(product_id={self.product_id!r}, product_name={self.product_name!r}, "
+                f"our_price={self.our_price!r}, competitor_price={self.competitor_price!r})")
+
+
+def encode_batch(events):
+    """
+    Encode events into one binary batch
+
+    Only the event fields are encoded; annotations are not.
+
+    Returns:
+        bytes: Encoded batch
+
+    Raises:
+        ValueError: If an event cannot be encoded (e.g. a missing price, a
+            product id that is not a non-negative integer or a name or
+            category longer than 65535 UTF-8 bytes)
+    """
+    strings = {}
+    records = []
+    parts = []
+    try:
+        for event in events:
+            name = strings.setdefault(event.get('product_name') or '', len(strings))
+            category = strings.setdefault(event.get('category') or '', len(strings))
+            records.append(EVENT_RECORD.pack(int(event.get('product_id')), name, category,
+                                             float(event.get('our_price')),
+                                             float(event.get('competitor_price')),
+                                             int(event.get('emitted_ns') or 0)))
+        for text in strings:
+            data = text.encode('utf-8')
+            parts.append(STRING_LENGTH.pack(len(data)))
+            parts.append(data)
+    except (struct.error, AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f"Event cannot be encoded: {str(e)}")
+
+    return b''.join([BATCH_HEADER.pack(BATCH_MAGIC, len(strings), len(records))] + parts + records)
+
+
+def decode_batch(data):
+    """
+    Decode a binary batch
+
+    Returns:
+        list: PriceEvents, in encoding order
+
+    Raises:
+        ValueError: If the data is not an encoded batch
+    """
+    try:
+        magic, string_count, record_count = BATCH_HEADER.unpack_from(data, 0)
+    except struct.error:
+        magic = None
+    if magic != BATCH_MAGIC:
+        raise ValueError("Not an encoded price event batch")
+    offset = BATCH_HEADER.size
+    strings = []
+    for _ in range(string_count):
+        (length,) = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(bytes(data[offset:offset + length]).decode('utf-8'))
+        offset += length
+
+    end = offset + record_count * EVENT_RECORD.size
+    return [PriceEvent(product_id, strings[name], strings[category],
+                       round(our_price, 2), round(competitor_price, 2), emitted_ns)
+            for product_id, name, category, our_price, competitor_price, emitted_ns
+            in EVENT_RECORD.iter_unpack(data[offset:end])]
+
+
+def write_event_batches(f, events, batch_size=4096):
+    """
+    Write events to a binary file as length-prefixed batches
+
+    Returns:
+        int: Number of events written
+    """
+    written = 0
+    batch = []
+    for event in events:
+        batch.append(event)
+        if len(batch) >= batch_size:
+            written += _write_frame(f, batch)
+            batch = []
+    if batch:
+        written += _write_frame(f, batch)
+    return written
+
+
+def _write_frame(f, batch):
+    data = encode_batch(batch)
+    f.write(FRAME_LENGTH.pack(len(data)))
+    f.write(data)
+    return len(batch)
+
+
+def read_event_batches(f):
+    """Yield the events of a binary event file, batch by batch"""
+    while True:
+        header = f.read(FRAME_LENGTH.size)
+        if len(header) < FRAME_LENGTH.size:
+            return
+        (length,) = FRAME_LENGTH.unpack(header)
+        data = f.read(length)
+        if len(data) < length:
+            return
+        yield from decode_batch(data)
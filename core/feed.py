@@ -0,0 +1,274 @@
+"""
+Price Feed Engine - High-rate synthetic and replayed price event sources
+
+Feeds the input queue at a target rate (or as fast as possible) from either
+a seeded synthetic generator over a generated product catalog, or a JSONL /
+CSV / binary (.pev) file replayed with its original or scaled timing.
+
+Usage:
+    python -m core.feed --source synthetic --catalog-size 100000 --count 1000000 --output events.jsonl
+    python -m core.feed --source synthetic --count 1000000 --output events.pev
+    python -m core.feed --source replay --path events.jsonl --rate 20000
+"""
+
+import csv
+import json
+import time
+import random
+import logging
+import argparse
+from datetime import datetime
+from core.events import TIMESTAMP_FORMAT, PriceEvent, read_event_batches, write_event_batches
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Categories used by the generated catalog (a mix of monitored and unmonitored)
+CATALOG_CATEGORIES = ["electronics", "appliances", "smart home", "toys", "garden", "books"]
+CATALOG_NOUNS = ["TV", "Blender", "Thermostat", "Speaker", "Camera", "Router",
+                 "Vacuum", "Lamp", "Drone", "Headphones", "Kettle", "Monitor"]
+
+
+def generate_catalog(size, seed=0, categories=None):
+    """
+    Generate a reproducible product catalog
+
+    Args:
+        size (int): Number of products
+        seed (int): Random seed
+        categories (list): Category names to draw from
+
+    Returns:
+        list: Product dicts with id, name, category and our_price
+    """
+    rng = random.Random(seed)
+    categories = categories or CATALOG_CATEGORIES
+    return [
+        {
+            "id": product_id,
+            "name": f"{rng.choice(CATALOG_NOUNS)} {product_id}",
+            "category": rng.choice(categories),
+            "our_price": round(rng.uniform(5.0, 2000.0), 2),
+        }
+        for product_id in range(1, size + 1)
+    ]
+
+
+def synthetic_events(catalog, seed=0, variation_min=0.8, variation_max=1.1, count=None):
+    """
+    Yield random competitor price events over a catalog
+
+    Yields:
+        tuple: (None, PriceEvent) -- synthetic events carry no original timing
+    """
+    rng = random.Random(seed)
+    size = len(catalog)
+    emitted = 0
+    while count is None or emitted < count:
+        product = catalog[rng.randrange(size)]
+        yield None, PriceEvent(
+            product["id"], product["name"], product["category"], product["our_price"],
+            round(product["our_price"] * rng.uniform(variation_min, variation_max), 2),
+        )
+        emitted += 1
+
+
+def _parse_event_time(record):
+    """
+    Original time of a recorded event in epoch seconds, from its timestamp
+    (epoch seconds or formatted string) or emission time (None if unknown)
+    """
+    value = record.get("timestamp")
+    if value in (None, ''):
+        emitted_ns = record.get("emitted_ns")
+        return int(emitted_ns) / 1e9 if emitted_ns else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.strptime(str(value), TIMESTAMP_FORMAT).timestamp()
+
+
+def _read_records(path):
+    """Yield raw records from a JSONL or CSV file"""
+    with open(path, 'r', newline='') as f:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def replay_events(path):
+    """
+    Yield recorded price events from a JSONL, CSV or binary (.pev) file
+
+    Yields:
+        tuple: (original event time in epoch seconds or None, PriceEvent)
+    """
+    if path.endswith('.pev'):
+        with open(path, 'rb') as f:
+            for event in read_event_batches(f):
+                original_time = event.emitted_ns / 1e9 if event.emitted_ns else None
+                event.emitted_ns = 0
+                yield original_time, event
+        return
+
+    for record in _read_records(path):
+        event = PriceEvent(int(record["product_id"]), record["product_name"], record["category"],
+                           float(record["our_price"]), float(record["competitor_price"]))
+        yield _parse_event_time(record), event
+
+
+class FeedEngine:
+    """
+    Pushes events from a source into a queue with rate control
+
+    Pacing is chosen per run: ``rate`` events/sec if set; otherwise the
+    original spacing of replayed events divided by ``speed`` if set;
+    otherwise as fast as the sink accepts them.
+
+    Args:
+        source: Iterable of (original time, event) tuples
+        sink (Queue): Destination queue
+        rate (float): Target events per second
+        speed (float): Replay speed multiplier for recorded timing
+        history (HistoryStore): Optional store that also records each event
+        event_log (EventLog): Optional durable log that records each event
+    """
+
+    def __init__(self, source, sink, rate=None, speed=None, history=None, event_log=None):
+        self.source = source
+        self.sink = sink
+        self.rate = rate
+        self.speed = speed
+        self.history = history
+        self.event_log = event_log
+        self.stats = {"emitted": 0, "elapsed": 0.0, "achieved_rate": 0.0}
+
+    def run(self, stop_event=None, report_interval=10.0):
+        """
+        Emit events until the source is exhausted or ``stop_event`` is set
+
+        Returns:
+            dict: Final emitted count, elapsed seconds and achieved rate
+        """
+        start = time.perf_counter()
+        next_report = start + report_interval
+        first_time = None
+        emitted = 0
+
+        for original_time, event in self.source:
+            if stop_event is not None and stop_event.is_set():
+                break
+
+            # Work out when this event is due relative to the run start
+            if self.rate:
+                due = start + emitted / self.rate
+            elif self.speed and original_time is not None:
+                if first_time is None:
+                    first_time = original_time
+                due = start + (original_time - first_time) / self.speed
+            else:
+                due = None
+            if due is not None:
+                delay = due - time.perf_counter()
+                if delay > 0.001:
+                    time.sleep(delay)
+
+            event["emitted_ns"] = time.time_ns()
+            if self.history is not None:
+                self.history.append(event)
+            if self.event_log is not None:
+                self.event_log.append_event(event)
+            self.sink.put(event)
+            emitted += 1
+
+            if emitted % 1000 == 0:
+                now = time.perf_counter()
+                self._update_stats(emitted, now - start)
+                if now >= next_report:
+                    next_report = now + report_interval
+                    logger.info(f"Feed emitted {emitted} events ({self.stats['achieved_rate']:.0f} events/sec)")
+
+        self._update_stats(emitted, time.perf_counter() - start)
+        logger.info(f"Feed finished: {emitted} events in {self.stats['elapsed']:.2f}s "
+                    f"({self.stats['achieved_rate']:.0f} events/sec)")
+        return dict(self.stats)
+
+    def _update_stats(self, emitted, elapsed):
+        self.stats["emitted"] = emitted
+        self.stats["elapsed"] = elapsed
+        self.stats["achieved_rate"] = emitted / elapsed if elapsed > 0 else 0.0
+
+
+class _DiscardQueue:
+    """Minimal sink that drops events, for measuring raw source speed"""
+
+    def put(self, item):
+        pass
+
+
+class _JsonlSink:
+    """Sink that writes events as JSON lines"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def put(self, item):
+        self.f.write(json.dumps(dict(item)) + "\n")
+
+
+class _EventFileSink:
+    """Sink that writes events as binary batches"""
+
+    def __init__(self, f, batch_size=4096):
+        self.f = f
+        self.batch_size = batch_size
+        self._batch = []
+
+    def put(self, item):
+        self._batch.append(item)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        write_event_batches(self.f, self._batch, self.batch_size)
+        self._batch = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate, record or replay price event feeds")
+    parser.add_argument("--source", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--path", help="JSONL/CSV/.pev file to replay")
+    parser.add_argument("--catalog-size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--rate", type=float, default=None, help="Target events/sec (default: unlimited)")
+    parser.add_argument("--speed", type=float, default=None, help="Replay speed multiplier for recorded timing")
+    parser.add_argument("--output", help="Write emitted events to this JSONL (or binary .pev) file")
+    args = parser.parse_args()
+
+    if args.source == "replay":
+        if not args.path:
+            parser.error("--path is required for replay")
+        source = replay_events(args.path)
+    else:
+        source = synthetic_events(generate_catalog(args.catalog_size, args.seed), args.seed, count=args.count)
+
+    if args.output and args.output.endswith('.pev'):
+        with open(args.output, 'wb') as f:
+            sink = _EventFileSink(f)
+            FeedEngine(source, sink, rate=args.rate, speed=args.speed).run()
+            sink.flush()
+    elif args.output:
+        with open(args.output, 'w') as f:
+            FeedEngine(source, _JsonlSink(f), rate=args.rate, speed=args.speed).run()
+    else:
+        FeedEngine(source, _DiscardQueue(), rate=args.rate, speed=args.speed).run()
+
+
+if __name__ == "__main__":
+    main()
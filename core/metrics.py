@@ -0,0 +1,289 @@
+"""
+Pipeline Metrics - Counters and latency histograms for every stage
+
+Metrics are kept in a process-wide registry and exposed in the Prometheus
+text format over HTTP, as a periodic file dump, and as a snapshot for the
+dashboard.
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (1 ms .. 2 min)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Latency buckets for in-process work in seconds (1 us .. 10 ms)
+MICRO_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001,
+                 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing counter, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally split by labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed wall time of its block"""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            return {key: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}
+                    for key, s in self._series.items()}
+
+    def quantile(self, series, q):
+        """Estimate a quantile from bucket counts (upper bound of the bucket)"""
+        if not series["count"]:
+            return 0.0
+        target = q * series["count"]
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), series["counts"]):
+            cumulative += count
+            if cumulative >= target:
+                return bound if bound != float('inf') else self.buckets[-1]
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.samples().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+
+
+REGISTRY = []
+
+
+def counter(name, description):
+    """Create and register a counter"""
+    metric = Counter(name, description)
+    REGISTRY.append(metric)
+    return metric
+
+
+def histogram(name, description, buckets=DEFAULT_BUCKETS):
+    """Create and register a histogram"""
+    metric = Histogram(name, description, buckets)
+    REGISTRY.append(metric)
+    return metric
+
+
+# Pipeline metrics
+EVENTS_TOTAL = counter("pricing_events_total", "Price events consumed by the processor")
+EVENTS_COALESCED_TOTAL = counter("pricing_events_coalesced_total", "Events superseded by a newer update for the same product")
+EVENTS_UNCHANGED_TOTAL = counter("pricing_events_unchanged_total", "Events dropped because the competitor price did not change significantly")
+ALERTS_TOTAL = counter("pricing_alerts_total", "Alerts published")
+ALERTS_DEDUPLICATED_TOTAL = counter("pricing_alerts_deduplicated_total", "Alerts not delivered because the product alerted recently")
+ALERT_DELIVERIES_TOTAL = counter("pricing_alert_deliveries_total", "Alert digest deliveries by output and outcome")
+ERRORS_TOTAL = counter("pricing_errors_total", "Processing errors by stage")
+LLM_REQUESTS_TOTAL = counter("pricing_llm_requests_total", "LLM requests by agent")
+LLM_TOKENS_TOTAL = counter("pricing_llm_tokens_total", "LLM tokens used by agent and type")
+LLM_TASK_TOKENS_TOTAL = counter("pricing_llm_task_tokens_total", "Locally counted LLM tokens by task and type")
+LLM_RETRIES_TOTAL = counter("pricing_llm_retries_total", "LLM requests retried by model and reason")
+CLASSIFIER_EVENTS_TOTAL = counter("pricing_classifier_events_total", "Events seen by the local decision classifier by outcome (alert, ignore, low_confidence, unavailable)")
+DEAD_LETTERS_TOTAL = counter("pricing_dead_letters_total", "Events dead-lettered after exhausting retries, by stage")
+QUEUE_WAIT_SECONDS = histogram("pricing_queue_wait_seconds", "Time from emission to dequeue by the processor")
+RULE_SECONDS = histogram("pricing_rule_seconds", "Rule pre-filter time per batch")
+RATE_LIMIT_WAIT_SECONDS = histogram("pricing_rate_limit_wait_seconds", "Time LLM requests waited for rate limit capacity by model")
+LLM_SECONDS = histogram("pricing_llm_seconds", "LLM time per crew run by agent")
+LLM_TASK_SECONDS = histogram("pricing_llm_task_seconds", "Latency of a single LLM request by task")
+CLASSIFIER_SECONDS = histogram("pricing_classifier_seconds", "Local decision classifier time per event", MICRO_BUCKETS)
+CREW_SECONDS = histogram("pricing_crew_seconds", "Wall time of a crew run")
+CREW_OVERHEAD_SECONDS = histogram("pricing_crew_overhead_seconds", "Crew run time not spent in the LLM")
+ALERT_DELIVERY_SECONDS = histogram("pricing_alert_delivery_seconds", "Time to deliver an alert digest, including retries, by output")
+END_TO_END_SECONDS = histogram("pricing_end_to_end_seconds", "Time from emission to alert")
+
+
+def render_prometheus():
+    """Render all registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """
+    Summarize all metrics for display
+
+    Returns:
+        list: One dict per metric series with name, labels and values
+    """
+    rows = []
+    for metric in REGISTRY:
+        for key, sample in sorted(metric.samples().items()):
+            row = {"metric": metric.name, "labels": ",".join(f"{k}={v}" for k, v in key)}
+            if metric.kind == "counter":
+                row.update({"count": sample, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None})
+            else:
+                count = sample["count"]
+                row.update({
+                    "count": count,
+                    "mean_ms": round(sample["sum"] / count * 1000, 1) if count else 0.0,
+                    "p50_ms": round(metric.quantile(sample, 0.50) * 1000, 1),
+                    "p95_ms": round(metric.quantile(sample, 0.95) * 1000, 1),
+                    "p99_ms": round(metric.quantile(sample, 0.99) * 1000, 1),
+                })
+            rows.append(row)
+    return rows
+
+
+def dump_metrics(path):
+    """Write the Prometheus text rendering to a file (atomically replaced)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_metrics_exporter(settings):
+    """
+    Start the metrics HTTP endpoint and/or file dump configured in settings
+
+    Safe to call more than once; only the first call starts anything.
+
+    Args:
+        settings (dict): Application settings (uses the "metrics" section)
+    """
+    global _exporter_started
+    metrics_settings = (settings or {}).get('metrics', {})
+    if not metrics_settings.get('enabled', True):
+        return
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    port = metrics_settings.get('port')
+    if port:
+        try:
+            server = ThreadingHTTPServer((metrics_settings.get('host', '127.0.0.1'), port), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Metrics endpoint listening on http://{server.server_address[0]}:{port}/metrics")
+        except OSError as e:
+            logger.error(f"Failed to start metrics endpoint: {str(e)}")
+
+    dump_path = metrics_settings.get('dump_path')
+    if dump_path:
+        interval = metrics_settings.get('dump_interval', 30.0)
+
+        def dump_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    dump_metrics(dump_path)
+                except Exception as e:
+                    logger.error(f"Failed to dump metrics: {str(e)}")
+
+        threading.Thread(target=dump_loop, name="metrics-dump", daemon=True).start()
+        logger.info(f"Dumping metrics to {dump_path} every {interval}s")
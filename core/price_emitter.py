@@ -5,13 +5,13 @@ Price Emitter module - Simulates competitor price changes
 import time
 import random
 import logging
-import json
-from datetime import datetime
-from config.constants import (
-    INPUT_QUEUE, PRODUCTS,
-    MIN_EMITTER_DELAY, MAX_EMITTER_DELAY,
-    PRICE_VARIATION_MIN, PRICE_VARIATION_MAX
-)
+from core.event_log import open_event_log
+from core.event_store import EVENT_HISTORY
+from core.events import PriceEvent
+from core.feed import FeedEngine, generate_catalog, synthetic_events, replay_events
+from config.constants import INPUT_QUEUE, PRODUCTS
+from config.service import DEFAULT_SIMULATION, current_config, open_config_service
+from config.settings import load_settings
 
 # Set up logging
 logging.basicConfig(level=logging.INFO,
@@ -19,55 +19,106 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 
-def load_settings():
-    """Load application settings from JSON file"""
-    try:
-        with open('config/settings.json', 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Failed to load settings: {str(e)}")
-        return None
+def load_products(settings):
+    """
+    Return the products to simulate
+
+    Uses the catalog file from the "catalog" settings when configured,
+    otherwise the sample PRODUCTS list.
+    """
+    catalog_path = (settings or {}).get('catalog', {}).get('path')
+    if not catalog_path:
+        return PRODUCTS
+    from core.catalog import load_catalog
+    return load_catalog(catalog_path).to_products()
 
 
-def price_emitter():
+def make_feed_source(simulation, products=None):
+    """
+    Build the (original time, event) source for the synthetic or replay feed
+
+    Args:
+        simulation (dict): The "simulation" section of the settings
+        products (list): Catalog to generate from (generated if omitted)
+    """
+    if simulation.get('mode') == 'replay':
+        source = replay_events(simulation['replay_path'])
+        logger.info(f"Replaying price events from {simulation['replay_path']}")
+    else:
+        seed = simulation.get('seed', 0)
+        catalog = products or generate_catalog(simulation.get('catalog_size', 10000), seed)
+        source = synthetic_events(
+            catalog, seed,
+            simulation.get('price_variation_min', DEFAULT_SIMULATION['price_variation_min']),
+            simulation.get('price_variation_max', DEFAULT_SIMULATION['price_variation_max']),
+        )
+        logger.info(f"Generating synthetic price events over {len(catalog)} products")
+    return source
+
+
+def run_feed(simulation, products=None, event_log=None):
+    """
+    Feed the input queue from the high-rate feed engine
+
+    Args:
+        simulation (dict): The "simulation" section of the settings
+        products (list): Catalog to generate from (generated if omitted)
+        event_log (EventLog): Optional durable log for emitted events
+    """
+    source = make_feed_source(simulation, products)
+    engine = FeedEngine(source, INPUT_QUEUE, rate=simulation.get('rate'),
+                        speed=simulation.get('replay_speed'), history=EVENT_HISTORY,
+                        event_log=event_log)
+    engine.run()
+
+
+def price_emitter(settings=None):
     """
     Simulates competitor price changes at random intervals.
     Generates price events and places them in the input queue.
+
+    Args:
+        settings (dict): Settings to use instead of config/settings.json
     """
-    settings = load_settings()
+    settings = load_settings() if settings is None else settings
+    open_config_service(settings)
     if settings and not settings.get('simulation', {}).get('enabled', True):
         logger.info("Price emitter simulation disabled in settings")
         return
 
+    simulation = (settings or {}).get('simulation', {})
+    mode = simulation.get('mode', 'random')
+    products = load_products(settings)
+    event_log = open_event_log(settings)
+    if mode in ('synthetic', 'replay'):
+        run_feed(simulation, products if products is not PRODUCTS else None, event_log)
+        return
+
     logger.info("Starting price emitter simulation")
 
     while True:
         try:
             # Choose a random product
-            product = random.choice(PRODUCTS)
+            product = random.choice(products)
 
-            # Generate a competitor price with some variation
-            competitor_price = product["our_price"] * random.uniform(
-                PRICE_VARIATION_MIN,
-                PRICE_VARIATION_MAX
-            )
+            # Generate a competitor price with some variation (the ranges are
+            # re-read from the current configuration on every event)
+            config = current_config()
+            competitor_price = product["our_price"] * random.uniform(*config.price_variation)
 
             # Create the price event
-            event = {
-                "product_id": product["id"],
-                "product_name": product["name"],
-                "category": product["category"],
-                "our_price": product["our_price"],
-                "competitor_price": round(competitor_price, 2),
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-            # Add to the queue
+            event = PriceEvent(product["id"], product["name"], product["category"],
+                               product["our_price"], round(competitor_price, 2), time.time_ns())
+
+            # Record for the dashboard and durably, then hand off to the processor
+            EVENT_HISTORY.append(event)
+            if event_log is not None:
+                event_log.append_event(event)
             INPUT_QUEUE.put(event)
             logger.debug(f"Added pricing event to queue: {event['product_name']}")
 
             # Wait for a random interval before the next event
-            time.sleep(random.uniform(MIN_EMITTER_DELAY, MAX_EMITTER_DELAY))
+            time.sleep(random.uniform(*config.emitter_delay))
 
         except Exception as e:
             logger.error(f"Price emitter error: {str(e)}")
@@ -0,0 +1,257 @@
+"""
+Price History - Bounded per-product competitor price series
+
+Keeps the most recent competitor prices of each product in a fixed-size
+ring buffer and maintains rolling statistics incrementally, in O(1) per
+update: window minimum (monotonic deque), mean and variance (sliding
+Welford update) and an EWMA. Each observation yields a signal telling
+whether the price is a new low for the window and whether it moved
+significantly since the last price passed on for analysis, so that the
+pipeline can drop no-change events and give the analyst a compact
+history summary. Once ``max_products`` products are tracked the least
+recently seen one is evicted, so memory is bounded per SKU and overall.
+"""
+
+import math
+import logging
+import threading
+from array import array
+from collections import OrderedDict, deque
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class PriceSeries:
+    """
+    Rolling competitor price statistics of one product
+
+    Args:
+        window (int): Number of recent prices kept
+        ewma_alpha (float): Weight of the newest price in the EWMA
+    """
+
+    __slots__ = ('window', 'ewma_alpha', 'prices', 'count', 'seq', 'mean', 'm2', 'ewma',
+                 '_min_seqs', 'last_price', 'reference_price', 'reference_our_price')
+
+    def __init__(self, window=32, ewma_alpha=0.2):
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.prices = array('d', bytes(8 * window))
+        self.count = 0
+        self.seq = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = None
+        # Sequence numbers of the window's candidate minima, prices increasing
+        self._min_seqs = deque()
+        self.last_price = None
+        # Last price (and our price) that was passed on for analysis
+        self.reference_price = None
+        self.reference_our_price = None
+
+    @property
+    def low(self):
+        """Lowest price in the window (None before the first price)"""
+        if not self._min_seqs:
+            return None
+        return self.prices[self._min_seqs[0] % self.window]
+
+    @property
+    def stddev(self):
+        """Standard deviation of the prices in the window"""
+        return math.sqrt(max(self.m2, 0.0) / self.count) if self.count else 0.0
+
+    @property
+    def volatility(self):
+        """Standard deviation relative to the window mean"""
+        return self.stddev / self.mean if self.mean else 0.0
+
+    def add(self, price):
+        """Add a price, evicting the oldest one once the window is full"""
+        slot = self.seq % self.window
+        if self.count < self.window:
+            self.count += 1
+            delta = price - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (price - self.mean)
+        else:
+            old = self.prices[slot]
+            old_mean = self.mean
+            self.mean += (price - old) / self.window
+            self.m2 += (price - old) * (price - self.mean + old - old_mean)
+        self.prices[slot] = price
+
+        min_seqs = self._min_seqs
+        if min_seqs and min_seqs[0] <= self.seq - self.window:
+            min_seqs.popleft()
+        while min_seqs and self.prices[min_seqs[-1] % self.window] >= price:
+            min_seqs.pop()
+        min_seqs.append(self.seq)
+        self.seq += 1
+
+        self.ewma = price if self.ewma is None else self.ewma + self.ewma_alpha * (price - self.ewma)
+        self.last_price = price
+
+    def summary(self):
+        """One-line summary of the window for prompts"""
+        if not self.count:
+            return "no earlier prices"
+        plural = "s" if self.count > 1 else ""
+        return (f"last {self.count} price{plural}: low ${self.low:.2f}, mean ${self.mean:.2f}, "
+                f"EWMA ${self.ewma:.2f}, volatility {self.volatility * 100:.1f}%")
+
+
+class PriceSignal:
+    """
+    Outcome of observing one price
+
+    Attributes:
+        first (bool): First price seen for the product
+        new_low (bool): Lower than every earlier price in the window
+        change (float): Change since the reference price, as a fraction
+            (None for the first price)
+        significant (bool): Worth analyzing: first price, new low, our price
+            changed, or a change of more than the configured threshold
+        summary (str): History before this price, for prompts
+        volatility (float): Relative standard deviation of the window
+            before this price
+    """
+
+    __slots__ = ('first', 'new_low', 'change', 'significant', 'summary', 'volatility')
+
+    def __init__(self, first, new_low, change, significant, summary, volatility=0.0):
+        self.first = first
+        self.new_low = new_low
+        self.change = change
+        self.significant = significant
+        self.summary = summary
+        self.volatility = volatility
+
+    def features(self):
+        """Numeric signals as a dict (for the decision classifier)"""
+        return {"first": self.first, "new_low": self.new_low, "change": self.change,
+                "volatility": self.volatility}
+
+    def describe(self):
+        """History summary plus the change and new-low signals, for prompts"""
+        notes = [self.summary]
+        if self.change is not None:
+            notes.append(f"{self.change * 100:+.1f}% since last analyzed")
+        if self.new_low:
+            notes.append("new low")
+        return "; ".join(notes)
+
+
+class PriceHistory:
+    """
+    Thread-safe per-product price series with LRU eviction
+
+    Args:
+        window (int): Prices kept per product
+        ewma_alpha (float): Weight of the newest price in the EWMA
+        change_threshold (float): Relative change since the reference price
+            above which a price counts as significant
+        max_products (int): Products tracked before the least recently seen
+            one is evicted
+        suppress_unchanged (bool): Whether the pipeline should drop events
+            that are not significant
+    """
+
+    def __init__(self, window=32, ewma_alpha=0.2, change_threshold=0.005, max_products=100000,
+                 suppress_unchanged=True):
+        self.window = max(1, int(window))
+        self.ewma_alpha = ewma_alpha
+        self.change_threshold = change_threshold
+        self.max_products = max(1, int(max_products))
+        self.suppress_unchanged = suppress_unchanged
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"observed": 0, "significant": 0, "unchanged": 0, "new_lows": 0, "evictions": 0}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._series)
+
+    def observe(self, event):
+        """
+        Add an event's competitor price to its product's series
+
+        Events without a usable price are always significant and leave the
+        series unchanged.
+
+        Returns:
+            PriceSignal: Signals computed against the history before the event
+        """
+        try:
+            price = float(event.get('competitor_price'))
+        except (TypeError, ValueError):
+            return PriceSignal(False, False, None, True, "price not comparable")
+        our_price = event.get('our_price')
+        key = event.get('product_id')
+
+        with self._lock:
+            self.stats["observed"] += 1
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = PriceSeries(self.window, self.ewma_alpha)
+                if len(self._series) > self.max_products:
+                    self._series.popitem(last=False)
+                    self.stats["evictions"] += 1
+            else:
+                self._series.move_to_end(key)
+
+            summary = series.summary()
+            volatility = series.volatility
+            first = series.count == 0
+            low = series.low
+            new_low = low is not None and price < low
+            change = None
+            if series.reference_price:
+                change = (price - series.reference_price) / series.reference_price
+            significant = (first or new_low or change is None
+                           or our_price != series.reference_our_price
+                           or abs(change) > self.change_threshold)
+            series.add(price)
+
+            if significant or not self.suppress_unchanged:
+                series.reference_price = price
+                series.reference_our_price = our_price
+            self.stats["significant" if significant else "unchanged"] += 1
+            if new_low:
+                self.stats["new_lows"] += 1
+        return PriceSignal(first, new_low, change, significant, summary, volatility)
+
+    def series(self, product_id):
+        """Rolling statistics of a product as a dict, or None if not tracked"""
+        with self._lock:
+            series = self._series.get(product_id)
+            if series is None:
+                return None
+            return {"count": series.count, "last": series.last_price, "low": series.low,
+                    "mean": series.mean, "ewma": series.ewma, "stddev": series.stddev,
+                    "volatility": series.volatility}
+
+    def get_stats(self):
+        """Counters plus the number of tracked products"""
+        with self._lock:
+            return dict(self.stats, products=len(self._series))
+
+
+def make_price_history(settings):
+    """
+    Build a price history from the "price_history" settings
+
+    Returns:
+        PriceHistory or None: None when the history is disabled
+    """
+    history_settings = (settings or {}).get('price_history', {})
+    if not history_settings.get('enabled', False):
+        return None
+    return PriceHistory(history_settings.get('window', 32),
+                        history_settings.get('ewma_alpha', 0.2),
+                        history_settings.get('change_threshold', 0.005),
+                        history_settings.get('max_products', 100000),
+                        history_settings.get('suppress_unchanged', True))
@@ -0,0 +1,185 @@
+"""
+Rule Engine - Deterministic pre-filter for price events
+
+Decides the clear-cut cases (unmonitored category, price drop well below the
+alert threshold) in plain Python so that only ambiguous or rule-flagged events
+are escalated to the AI agents.
+"""
+
+import math
+import logging
+import threading
+from functools import lru_cache
+from config.service import current_config
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Rule verdicts
+RULE_IGNORE = "IGNORE"
+RULE_ESCALATE = "ESCALATE"
+
+# Short-circuit counters (shared by all processing threads)
+RULE_STATS = {
+    "evaluated": 0,
+    "short_circuited": 0,
+    "escalated": 0,
+    "ignored_category": 0,
+    "ignored_threshold": 0,
+}
+_stats_lock = threading.Lock()
+
+
+@lru_cache(maxsize=32)
+def _category_set(categories):
+    """Build a normalized lookup set for a tuple of categories"""
+    return frozenset(c.strip().lower() for c in categories)
+
+
+def compute_price_drop(our_price, competitor_price):
+    """
+    Compute how far the competitor undercuts our price
+
+    Returns:
+        float or None: Drop as a fraction of our price (negative when the
+        competitor is more expensive), or None if our price is not usable
+    """
+    try:
+        our_price = float(our_price)
+        competitor_price = float(competitor_price)
+    except (TypeError, ValueError):
+        return None
+    if our_price <= 0:
+        return None
+    return (our_price - competitor_price) / our_price
+
+
+def compute_price_drops(events, catalog=None):
+    """
+    Compute price drops for a batch of events in a single pass
+
+    Args:
+        events (list): Event dicts
+        catalog (ProductCatalog): Optional catalog providing our price in one
+            vectorized call (events not in it use their own our_price)
+
+    Returns:
+        list: Drop fraction (or None) for each event, in input order
+    """
+    if catalog is not None:
+        return _catalog_columns(catalog, events, frozenset())[0]
+    return [compute_price_drop(e.get('our_price'), e.get('competitor_price')) for e in events]
+
+
+def _catalog_columns(catalog, events, categories):
+    """
+    Compute drops and category membership for a batch through the catalog
+
+    Our price and category come from the catalog in one vectorized call;
+    events whose product is not in the catalog fall back to their own fields.
+    """
+    product_ids = []
+    competitor_prices = []
+    for e in events:
+        try:
+            product_ids.append(int(e.get('product_id')))
+        except (TypeError, ValueError):
+            product_ids.append(-1)
+        try:
+            competitor_prices.append(float(e.get('competitor_price')))
+        except (TypeError, ValueError):
+            competitor_prices.append(float('nan'))
+
+    result = catalog.evaluate(product_ids, competitor_prices, 0.0, categories)
+    drops = []
+    in_category = []
+    for e, known, drop, monitored in zip(events, result["known"].tolist(),
+                                         result["drop"].tolist(), result["category_mask"].tolist()):
+        if known:
+            drops.append(None if math.isnan(drop) else drop)
+            in_category.append(monitored)
+        else:
+            drops.append(compute_price_drop(e.get('our_price'), e.get('competitor_price')))
+            in_category.append(str(e.get('category', '')).strip().lower() in categories)
+    return drops, in_category
+
+
+def evaluate_events(events, categories=None, threshold=None, margin=None, catalog=None):
+    """
+    Evaluate a batch of price events against the alerting rules
+
+    An event is ignored outright when its category is not monitored or when
+    its price drop is below ``threshold - margin``. Everything else (drops
+    close to or above the threshold, unparseable prices) is escalated.
+
+    Args:
+        events (list): Price event dicts
+        categories (iterable): Monitored categories (defaults to the
+            configured "monitoring.categories")
+        threshold (float): Alert threshold as a fraction (defaults to
+            "monitoring.price_drop_threshold")
+        margin (float): Ambiguity band below the threshold (defaults to
+            "monitoring.rule_ambiguity_margin")
+        catalog (ProductCatalog): Optional catalog providing our price and
+            category for known products, evaluated in one vectorized call
+
+    Returns:
+        list: (verdict, reason) tuple for each event, in input order
+    """
+    config = current_config()
+    categories = config.categories if categories is None else _category_set(tuple(categories))
+    threshold = config.price_drop_threshold if threshold is None else threshold
+    margin = config.rule_margin if margin is None else margin
+    ignore_below = threshold - margin
+
+    if catalog is not None:
+        drops, in_category = _catalog_columns(catalog, events, categories)
+    else:
+        drops = compute_price_drops(events)
+        in_category = [str(e.get('category', '')).strip().lower() in categories for e in events]
+
+    results = []
+    counts = {"ignored_category": 0, "ignored_threshold": 0, "escalated": 0}
+    for monitored, drop in zip(in_category, drops):
+        if not monitored:
+            counts["ignored_category"] += 1
+            results.append((RULE_IGNORE, "category not monitored"))
+        elif drop is None:
+            counts["escalated"] += 1
+            results.append((RULE_ESCALATE, "price data not comparable"))
+        elif drop < ignore_below:
+            counts["ignored_threshold"] += 1
+            results.append((RULE_IGNORE, f"price drop {drop * 100:.1f}% below threshold"))
+        elif drop < threshold:
+            counts["escalated"] += 1
+            results.append((RULE_ESCALATE, f"price drop {drop * 100:.1f}% near threshold"))
+        else:
+            counts["escalated"] += 1
+            results.append((RULE_ESCALATE, f"price drop {drop * 100:.1f}% exceeds threshold"))
+
+    with _stats_lock:
+        RULE_STATS["evaluated"] += len(events)
+        RULE_STATS["escalated"] += counts["escalated"]
+        RULE_STATS["ignored_category"] += counts["ignored_category"]
+        RULE_STATS["ignored_threshold"] += counts["ignored_threshold"]
+        RULE_STATS["short_circuited"] += counts["ignored_category"] + counts["ignored_threshold"]
+
+    return results
+
+
+def evaluate_event(event, categories=None, threshold=None, margin=None, catalog=None):
+    """
+    Evaluate a single price event against the alerting rules
+
+    Returns:
+        tuple: (verdict, reason) where verdict is RULE_IGNORE or RULE_ESCALATE
+    """
+    return evaluate_events([event], categories, threshold, margin, catalog)[0]
+
+
+def get_rule_stats():
+    """Return a snapshot of the rule engine counters"""
+    with _stats_lock:
+        return dict(RULE_STATS)
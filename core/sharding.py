@@ -0,0 +1,536 @@
+"""
+Sharded Processing - Partitions price events across worker processes
+
+A router partitions events by a hash of ``product_id`` (so every product
+stays on one shard and keeps its order) and publishes them through a
+pluggable transport. Each shard process runs the regular event processor on
+its partition and publishes its alerts back through the transport, where
+they are merged into the dashboard's alert history. Consumers acknowledge
+what they have processed (``ack``); durable transports deliver anything
+consumed but not acknowledged again after a restart.
+
+Transports:
+    multiprocessing - multiprocessing queues between local processes
+    file            - append-only JSONL spool files (shared directory)
+    redis           - Redis lists (any Redis-compatible server; needs redis)
+
+Usage:
+    python -m core.sharding run --shards 4
+    python -m core.sharding worker --shard 2 --transport file --path data/shards
+"""
+
+import os
+import copy
+import json
+import time
+import logging
+import argparse
+import threading
+import multiprocessing
+from collections import deque
+from queue import Empty
+from config.constants import INPUT_QUEUE, OUTPUT_QUEUE
+from config.settings import load_settings
+from core.batching import drain_batch
+from core.events import decode_batch, encode_batch
+from core.worker_pool import partition_for
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ("multiprocessing", "file", "redis")
+
+# Seconds between acknowledgments of events a shard has durably logged
+ACK_INTERVAL = 1.0
+
+
+class MultiprocessingTransport:
+    """
+    Partition and alert queues shared with local child processes
+
+    Routed batches travel as one binary-encoded message per partition,
+    which is much cheaper to pickle than a dict per event; consumers
+    decode a batch and hand out its events one at a time.
+
+    Args:
+        shards (int): Number of partitions
+        queue_size (int): Capacity of each queue
+        context: multiprocessing context the child processes are started from
+    """
+
+    def __init__(self, shards, queue_size=10000, context=None):
+        context = context or multiprocessing.get_context()
+        self.shards = shards
+        self._partitions = [context.Queue(queue_size) for _ in range(shards)]
+        self._alerts = context.Queue(queue_size)
+        self._pending = {}
+
+    def publish(self, shard, event):
+        self._partitions[shard].put(event)
+
+    def publish_batch(self, shard, events):
+        try:
+            self._partitions[shard].put(encode_batch(events))
+        except ValueError:
+            # Events the binary format cannot carry go one by one
+            for event in events:
+                self._partitions[shard].put(event)
+
+    def consume(self, shard, timeout):
+        pending = self._pending.get(shard)
+        if pending:
+            return pending.popleft()
+        try:
+            item = self._partitions[shard].get(timeout=timeout)
+        except Empty:
+            return None
+        if not isinstance(item, bytes):
+            return item
+        pending = self._pending[shard] = deque(decode_batch(item))
+        return pending.popleft() if pending else None
+
+    def ack(self, shard):
+        pass
+
+    def publish_alert(self, alert):
+        self._alerts.put(alert)
+
+    def consume_alert(self, timeout):
+        try:
+            return self._alerts.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def ack_alerts(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileTransport:
+    """
+    Append-only JSONL spool files in a shared directory
+
+    Each partition (and the alert stream) is one file. Every line is written
+    with a single append so several producers can share a file; consumers
+    persist the offset up to which they acknowledged lines (``ack``) in a
+    ``.offset`` sidecar, so a restarted consumer resumes after the last
+    acknowledged line and gets the ones it read but never acknowledged
+    again (at-least-once delivery).
+
+    Args:
+        directory (str): Spool directory (shared between nodes if needed)
+        shards (int): Number of partitions
+        poll_interval (float): Seconds between polls of an idle file
+        commit_interval (float): Seconds between commits of acknowledged offsets
+    """
+
+    def __init__(self, directory, shards, poll_interval=0.05, commit_interval=1.0):
+        self.directory = directory
+        self.shards = shards
+        self.poll_interval = poll_interval
+        self.commit_interval = commit_interval
+        os.makedirs(directory, exist_ok=True)
+        self._writers = {}
+        self._readers = {}
+
+    def __getstate__(self):
+        # Open files stay with the process that opened them
+        state = dict(self.__dict__)
+        state['_writers'] = {}
+        state['_readers'] = {}
+        return state
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.jsonl")
+
+    def _append(self, name, *items):
+        fd = self._writers.get(name)
+        if fd is None:
+            fd = self._writers[name] = os.open(self._path(name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(fd, "".join(json.dumps(dict(item)) + "\n" for item in items).encode('utf-8'))
+
+    def _read(self, name, timeout):
+        reader = self._readers.get(name)
+        if reader is None:
+            offset = 0
+            try:
+                with open(self._path(name) + ".offset", 'r') as f:
+                    offset = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                pass
+            reader = self._readers[name] = {"file": None, "offset": offset, "acked": offset,
+                                            "committed": time.monotonic()}
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if reader["file"] is None and os.path.exists(self._path(name)):
+                reader["file"] = open(self._path(name), 'rb')
+                reader["file"].seek(reader["offset"])
+            if reader["file"] is not None:
+                line = reader["file"].readline()
+                if line.endswith(b"\n"):
+                    reader["offset"] += len(line)
+                    return json.loads(line)
+                # Partial line: wait for the writer to finish it
+                reader["file"].seek(reader["offset"])
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _ack(self, name):
+        """Acknowledge every line read so far; committed at most every ``commit_interval``"""
+        reader = self._readers.get(name)
+        if reader is None:
+            return
+        reader["acked"] = reader["offset"]
+        if time.monotonic() - reader["committed"] >= self.commit_interval:
+            self._commit(name)
+
+    def _commit(self, name):
+        reader = self._readers[name]
+        tmp_path = self._path(name) + ".offset.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(reader["acked"]))
+        os.replace(tmp_path, self._path(name) + ".offset")
+        reader["committed"] = time.monotonic()
+
+    def publish(self, shard, event):
+        self._append(f"partition-{shard}", event)
+
+    def publish_batch(self, shard, events):
+        self._append(f"partition-{shard}", *events)
+
+    def consume(self, shard, timeout):
+        return self._read(f"partition-{shard}", timeout)
+
+    def ack(self, shard):
+        self._ack(f"partition-{shard}")
+
+    def publish_alert(self, alert):
+        self._append("alerts", alert)
+
+    def consume_alert(self, timeout):
+        return self._read("alerts", timeout)
+
+    def ack_alerts(self):
+        self._ack("alerts")
+
+    def close(self):
+        # Only acknowledged lines are committed; the rest are delivered again
+        for name, reader in self._readers.items():
+            self._commit(name)
+            if reader["file"] is not None:
+                reader["file"].close()
+        for fd in self._writers.values():
+            os.close(fd)
+        self._readers = {}
+        self._writers = {}
+
+
+class RedisTransport:
+    """
+    Redis lists as partitions (RPUSH / BLPOP)
+
+    Args:
+        url (str): Redis URL
+        shards (int): Number of partitions
+        prefix (str): Key prefix
+    """
+
+    def __init__(self, url, shards, prefix="pricing"):
+        self.url = url
+        self.shards = shards
+        self.prefix = prefix
+        self._client = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_client'] = None
+        return state
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def _pop(self, key, timeout):
+        item = self.client.blpop([key], timeout=max(1, int(round(timeout))))
+        return json.loads(item[1]) if item else None
+
+    def publish(self, shard, event):
+        self.client.rpush(f"{self.prefix}:partition:{shard}", json.dumps(dict(event)))
+
+    def publish_batch(self, shard, events):
+        self.client.rpush(f"{self.prefix}:partition:{shard}", *(json.dumps(dict(event)) for event in events))
+
+    def consume(self, shard, timeout):
+        return self._pop(f"{self.prefix}:partition:{shard}", timeout)
+
+    def ack(self, shard):
+        pass
+
+    def publish_alert(self, alert):
+        self.client.rpush(f"{self.prefix}:alerts", json.dumps(dict(alert)))
+
+    def consume_alert(self, timeout):
+        return self._pop(f"{self.prefix}:alerts", timeout)
+
+    def ack_alerts(self):
+        pass
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+def make_transport(sharding, shards, context=None):
+    """
+    Build the transport configured in the "sharding" settings
+
+    Raises:
+        ValueError: If the transport name is unknown
+    """
+    name = sharding.get('transport', 'multiprocessing')
+    if name == 'multiprocessing':
+        return MultiprocessingTransport(shards, sharding.get('queue_size', 10000), context)
+    if name == 'file':
+        return FileTransport(sharding.get('path', 'data/shards'), shards)
+    if name == 'redis':
+        return RedisTransport(sharding.get('redis_url', 'redis://localhost:6379/0'), shards)
+    raise ValueError(f"Unknown shard transport: {name}")
+
+
+def shard_settings(settings, shard):
+    """
+    Derive a shard's settings: its own event log directory, dead letter
+    file and metrics port, and an equal share of the LLM rate limits
+
+    Alerts are delivered to the alert outputs by the process that merges
+    them, not by the shards.
+    """
+    settings = copy.deepcopy(settings)
+    settings.setdefault('alerts', {})['enabled'] = False
+    event_log = settings.get('event_log', {})
+    if event_log.get('enabled'):
+        event_log['path'] = f"{event_log.get('path', 'data/event_log')}-shard-{shard}"
+    dead_letter = settings.get('dead_letter', {})
+    if dead_letter.get('enabled'):
+        base, ext = os.path.splitext(dead_letter.get('path', 'data/dead_letter.jsonl'))
+        dead_letter['path'] = f"{base}-shard-{shard}{ext}"
+    metrics = settings.get('metrics', {})
+    if metrics.get('port'):
+        metrics['port'] = metrics['port'] + 1 + shard
+
+    # Every shard schedules its own LLM requests; split the budgets between them
+    shards = max(1, int(settings.get('sharding', {}).get('shards') or os.cpu_count() or 1))
+    rate_limits = settings.get('rate_limits', {})
+    for limits in [rate_limits.get('default', {})] + list(rate_limits.get('models', {}).values()):
+        for key in ('requests_per_minute', 'tokens_per_minute'):
+            if limits.get(key):
+                limits[key] = limits[key] / shards
+    return settings
+
+
+def run_shard(shard, transport, settings, stop_event=None):
+    """
+    Process one partition: feed it to the event processor and publish the
+    resulting alerts back through the transport
+
+    Consumed events are acknowledged once they are durably in the shard's
+    event log (which replays undecided events after a restart), or else
+    only when the shard stops after processing them, so a crashed shard
+    never loses events (without the event log it gets every event since
+    its last clean stop again).
+
+    Args:
+        shard (int): Partition number
+        transport: Shard transport
+        settings (dict): Application settings
+        stop_event: Event (threading or multiprocessing) requesting a stop
+    """
+    from core.event_log import open_event_log
+    from core.event_processor import process_event
+
+    settings = shard_settings(settings, shard)
+    poll_timeout = settings.get('processing', {}).get('poll_timeout', 1.0)
+    event_log = open_event_log(settings)
+    stopping = threading.Event()
+    processor_stop = threading.Event()
+
+    def feed():
+        # On stop, keep going until the partition is drained
+        last_ack = time.monotonic()
+        while True:
+            event = transport.consume(shard, poll_timeout)
+            if event is not None:
+                if event_log is not None:
+                    event_log.append_event(event)
+                INPUT_QUEUE.put(event)
+            if event_log is not None and time.monotonic() - last_ack >= ACK_INTERVAL:
+                event_log.flush()
+                transport.ack(shard)
+                last_ack = time.monotonic()
+            if event is None and stopping.is_set():
+                return
+
+    def forward_alerts():
+        while not (processor_stop.is_set() and OUTPUT_QUEUE.empty()):
+            try:
+                alert = OUTPUT_QUEUE.get(timeout=poll_timeout)
+            except Empty:
+                continue
+            transport.publish_alert(alert)
+
+    feeder = threading.Thread(target=feed, name=f"shard-{shard}-feed", daemon=True)
+    forwarder = threading.Thread(target=forward_alerts, name=f"shard-{shard}-alerts", daemon=True)
+    processor = threading.Thread(target=process_event, args=(processor_stop, settings),
+                                 name=f"shard-{shard}-processor")
+    feeder.start()
+    forwarder.start()
+    processor.start()
+    logger.info(f"Shard {shard} started")
+
+    try:
+        while stop_event is None or not stop_event.is_set():
+            time.sleep(poll_timeout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopping.set()
+        feeder.join()
+        processor_stop.set()
+        processor.join()
+        forwarder.join()
+        # Every consumed event has been processed now
+        transport.ack(shard)
+        transport.close()
+        if event_log is not None:
+            event_log.close()
+        logger.info(f"Shard {shard} stopped")
+
+
+def route_events(transport, shards, stop_event=None, batch_size=256, poll_timeout=1.0):
+    """Drain the input queue and publish each batch to the products' partitions"""
+    routed = 0
+    while stop_event is None or not stop_event.is_set():
+        partitions = {}
+        for event in drain_batch(INPUT_QUEUE, batch_size, 0.0, poll_timeout):
+            partitions.setdefault(partition_for(event.get('product_id'), shards), []).append(event)
+        for shard, events in partitions.items():
+            transport.publish_batch(shard, events)
+            routed += len(events)
+    return routed
+
+
+def merge_alerts(transport, stop_event=None, poll_timeout=1.0):
+    """Publish alerts coming back from the shards to this process's history"""
+    from core.event_processor import emit_alert
+
+    while stop_event is None or not stop_event.is_set():
+        alert = transport.consume_alert(poll_timeout)
+        if alert is not None:
+            emit_alert(alert, alert.get('alert_details', ''))
+            transport.ack_alerts()
+
+
+def run_sharded(stop_event=None, settings=None):
+    """
+    Run the emitter and router here and the processors in shard processes
+
+    Shard processes are started locally unless ``sharding.local_workers`` is
+    false, in which case workers on other nodes attach through a file or
+    Redis transport (``python -m core.sharding worker``).
+
+    Args:
+        stop_event (threading.Event): Optional event requesting a stop
+        settings (dict): Settings to use instead of config/settings.json
+    """
+    from core.alert_sinks import open_alert_dispatcher, close_alert_dispatcher
+    from core.price_emitter import price_emitter
+
+    settings = load_settings() if settings is None else settings
+    sharding = settings.get('sharding', {})
+    shards = max(1, int(sharding.get('shards') or os.cpu_count() or 1))
+    poll_timeout = settings.get('processing', {}).get('poll_timeout', 1.0)
+    context = multiprocessing.get_context(sharding.get('start_method', 'spawn'))
+    transport = make_transport(sharding, shards, context)
+
+    shard_stop = context.Event()
+    processes = []
+    if sharding.get('local_workers', True):
+        for shard in range(shards):
+            process = context.Process(target=run_shard, args=(shard, transport, settings, shard_stop),
+                                      name=f"shard-{shard}", daemon=True)
+            process.start()
+            processes.append(process)
+    logger.info(f"Sharded processing over {shards} partitions "
+                f"({len(processes)} local processes, {sharding.get('transport', 'multiprocessing')} transport)")
+
+    # Events are logged durably by the shard that owns them, not here
+    emitter_settings = copy.deepcopy(settings)
+    emitter_settings.setdefault('event_log', {})['enabled'] = False
+    threading.Thread(target=price_emitter, args=(emitter_settings,), daemon=True).start()
+    open_alert_dispatcher(settings)
+    merge_stop = threading.Event()
+    merger = threading.Thread(target=merge_alerts, args=(transport, merge_stop, poll_timeout), daemon=True)
+    merger.start()
+
+    try:
+        route_events(transport, shards, stop_event, poll_timeout=poll_timeout)
+    finally:
+        shard_stop.set()
+        for process in processes:
+            process.join(timeout=30)
+        merge_stop.set()
+        merger.join()
+        transport.close()
+        close_alert_dispatcher()
+
+
+def main():
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Sharded multi-process price event processing")
+    parser.add_argument("mode", choices=["run", "worker"],
+                        help="run: emitter, router and local shards; worker: one shard")
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument("--shard", type=int, default=0, help="Partition served by a worker")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=None)
+    parser.add_argument("--path", default=None, help="Spool directory for the file transport")
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    args = parser.parse_args()
+
+    load_dotenv()
+    settings = copy.deepcopy(load_settings())
+    sharding = settings.setdefault('sharding', {})
+    for key, value in (('shards', args.shards), ('transport', args.transport),
+                       ('path', args.path), ('redis_url', args.redis_url)):
+        if value is not None:
+            sharding[key] = value
+
+    stop_event = threading.Event()
+    if args.duration:
+        timer = threading.Timer(args.duration, stop_event.set)
+        timer.daemon = True
+        timer.start()
+    try:
+        if args.mode == "worker":
+            if sharding.get('transport', 'multiprocessing') == 'multiprocessing':
+                parser.error("worker mode needs the file or redis transport")
+            shards = max(1, int(sharding.get('shards') or os.cpu_count() or 1))
+            run_shard(args.shard, make_transport(sharding, shards), settings, stop_event)
+        else:
+            run_sharded(stop_event, settings)
+    except KeyboardInterrupt:
+        logger.info("Sharded processing interrupted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Startup - Once-per-process initialization kept off the critical path
+
+Streamlit re-executes Main.py on every dashboard rerun while imported
+modules persist, so ``run_once`` keeps the pipeline threads and the
+connectivity checks from being started again on each rerun. Connectivity
+checks run in the background or are answered from a recent successful
+check, and the agent frameworks (CrewAI, LangChain) are imported on a
+background thread so that readiness does not wait for them.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CONNECTIVITY_CHECK_MODES = ("background", "blocking", "off")
+
+_lock = threading.RLock()
+_once = {}
+_status = {"state": "pending", "error": None, "checked_at": None, "cached": False}
+_preload = None
+
+
+def run_once(name, func, *args, **kwargs):
+    """
+    Call ``func`` the first time ``name`` is seen in this process
+
+    Returns:
+        The result of the first call, for this and every later call
+    """
+    with _lock:
+        if name not in _once:
+            _once[name] = func(*args, **kwargs)
+        return _once[name]
+
+
+def get_connectivity_status():
+    """
+    State of the connectivity checks
+
+    Returns:
+        dict: state ("pending", "checking", "ok", "failed" or "skipped"),
+            error, checked_at (epoch seconds) and whether the result came
+            from the check cache
+    """
+    with _lock:
+        return dict(_status)
+
+
+def _set_status(**fields):
+    with _lock:
+        _status.update(fields)
+
+
+def _check_fingerprint(settings):
+    """Identify what a cached check vouches for, without storing the key itself"""
+    api = settings.get('api', {}).get('openai', {})
+    parts = (api.get('health_check_url', ''),
+             os.environ.get('OPENAI_BASE_URL', ''),
+             os.environ.get('OPENAI_API_KEY', ''))
+    return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()
+
+
+def _load_cached_check(path, fingerprint, ttl):
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('fingerprint') != fingerprint:
+        return None
+    if time.time() - cached.get('checked_at', 0) >= ttl:
+        return None
+    return cached
+
+
+def _save_cached_check(path, fingerprint, checked_at):
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"fingerprint": fingerprint, "checked_at": checked_at}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache connectivity check: {str(e)}")
+
+
+def check_connectivity(settings):
+    """
+    Verify network access and the API key unless a recent check succeeded
+
+    Only successful checks are cached (for "startup.check_cache_ttl"
+    seconds), keyed by the API key and endpoint in use.
+
+    Returns:
+        bool: True if connectivity is verified
+
+    Raises:
+        ValueError: If the API key is missing
+        ConnectionError: If a check fails
+    """
+    startup = settings.get('startup', {})
+    ttl = startup.get('check_cache_ttl', 3600)
+    path = startup.get('check_cache_path')
+    fingerprint = _check_fingerprint(settings)
+
+    cached = _load_cached_check(path, fingerprint, ttl) if path and ttl else None
+    if cached is not None:
+        _set_status(state="ok", error=None, checked_at=cached['checked_at'], cached=True)
+        logger.info("Connectivity verified by a recent check")
+        return True
+
+    from core.connectivity import check_network_connection, verify_openai_key
+
+    _set_status(state="checking")
+    try:
+        check_network_connection(settings)
+        verify_openai_key()
+    except Exception as e:
+        _set_status(state="failed", error=str(e), checked_at=time.time(), cached=False)
+        raise
+
+    checked_at = time.time()
+    _set_status(state="ok", error=None, checked_at=checked_at, cached=False)
+    if path and ttl:
+        _save_cached_check(path, fingerprint, checked_at)
+    return True
+
+
+def start_connectivity_checks(settings):
+    """
+    Run the connectivity checks as configured by "startup.connectivity_checks"
+
+    "background" runs them on a daemon thread (failures are reported by
+    ``get_connectivity_status``), "blocking" runs them on the calling thread
+    and "off" skips them.
+
+    Raises:
+        ValueError: If the mode is unknown, or a blocking check finds no API key
+        ConnectionError: If a blocking check fails
+    """
+    mode = settings.get('startup', {}).get('connectivity_checks', 'background')
+    if mode not in CONNECTIVITY_CHECK_MODES:
+        raise ValueError(f"Unknown connectivity check mode: {mode}")
+    if mode == 'off':
+        _set_status(state="skipped")
+        return
+    if mode == 'blocking':
+        check_connectivity(settings)
+        return
+
+    def run():
+        try:
+            check_connectivity(settings)
+        except Exception as e:
+            logger.error(f"Background connectivity check failed: {str(e)}")
+
+    threading.Thread(target=run, name="connectivity-check", daemon=True).start()
+
+
+def _import_agents():
+    start = time.perf_counter()
+    try:
+        import agents.registry  # noqa: F401
+    except Exception as e:
+        logger.error(f"Failed to preload agent frameworks: {str(e)}")
+        return
+    logger.info(f"Agent frameworks loaded in {time.perf_counter() - start:.2f}s")
+
+
+def preload_agents():
+    """
+    Import the agent frameworks on a background thread, once per process
+
+    Returns:
+        threading.Thread: The preload thread
+    """
+    global _preload
+    with _lock:
+        if _preload is None:
+            _preload = threading.Thread(target=_import_agents, name="agent-preload", daemon=True)
+            _preload.start()
+        return _preload
@@ -0,0 +1,190 @@
+"""
+Worker Pool - Concurrent, per-product ordered event analysis
+"""
+
+import time
+import zlib
+import logging
+import threading
+from queue import Queue, Full
+from core.batching import consumer_stats, drain_batch
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Marker placed on a worker queue to ask the worker to exit
+_SHUTDOWN = object()
+
+
+def partition_for(key, partitions):
+    """
+    Map a partition key (e.g. a product id) to a stable partition index
+
+    Uses CRC32 rather than ``hash()`` so the mapping is identical across
+    processes and restarts.
+    """
+    return zlib.crc32(str(key).encode('utf-8')) % partitions
+
+
+class WorkerPool:
+    """
+    Fixed pool of worker threads consuming events in parallel
+
+    Every worker owns a bounded queue. Events are routed by ``product_id`` so
+    all events for a product are handled by the same worker, in submission
+    order. When a worker queue is full, ``submit`` blocks, which pushes
+    back-pressure to the caller instead of growing memory.
+
+    ``handler_factory`` is called once inside each worker thread and must
+    return a callable taking a list of events; this lets each worker own
+    its agents and clients. If it raises, the pool is marked failed and
+    ``submit`` raises instead of blocking on a queue nobody consumes; on
+    shutdown the healthy workers still drain their queues, and the events
+    left in the failed workers' queues are passed to ``on_abandoned(event,
+    error)`` (e.g. to dead-letter them) instead of being dropped silently.
+    """
+
+    def __init__(self, handler_factory, num_workers=4, queue_size=64,
+                 batch_size=1, linger=0.0, poll_timeout=1.0, name="worker", on_abandoned=None):
+        self.handler_factory = handler_factory
+        self.num_workers = max(1, int(num_workers))
+        self.batch_size = max(1, int(batch_size))
+        self.linger = linger
+        self.poll_timeout = poll_timeout
+        self.name = name
+        self.on_abandoned = on_abandoned
+        self._queues = [Queue(maxsize=queue_size) for _ in range(self.num_workers)]
+        self._threads = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.failure = None
+        self._failed = set()
+        # Batch and idle counters are the pool's own, separate from the input consumer's
+        self.stats = {"submitted": 0, "processed": 0, "errors": 0, "batches": 0, "events": 0,
+                      "capacity": 0, "idle_waits": 0, "idle_wall_seconds": 0.0, "idle_cpu_seconds": 0.0}
+
+    def start(self):
+        """Start the worker threads"""
+        for index in range(self.num_workers):
+            thread = threading.Thread(target=self._run, args=(index,),
+                                      name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.num_workers} {self.name} threads")
+        return self
+
+    def submit(self, event, timeout=None):
+        """
+        Route an event to the worker responsible for its product
+
+        Blocks while that worker's queue is full, checking every
+        ``poll_timeout`` seconds that the pool has not failed meanwhile.
+
+        Raises:
+            RuntimeError: If the pool is shutting down or a worker failed
+                to start
+            queue.Full: If ``timeout`` expires before space is available
+        """
+        if self._stopping.is_set():
+            raise RuntimeError("Worker pool is shutting down")
+        index = partition_for(event.get('product_id'), self.num_workers)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.failure is not None:
+                raise RuntimeError(f"{self.name} pool failed: {str(self.failure)}")
+            wait = self.poll_timeout
+            if deadline is not None:
+                wait = max(0.0, min(wait, deadline - time.monotonic()))
+            try:
+                self._queues[index].put(event, timeout=wait)
+                break
+            except Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+        with self._lock:
+            self.stats["submitted"] += 1
+
+    def get_stats(self):
+        """Return the pool's counters with the derived consumer metrics"""
+        with self._lock:
+            return consumer_stats(self.stats)
+
+    def depth(self):
+        """Return the number of events waiting across all worker queues"""
+        return sum(q.qsize() for q in self._queues)
+
+    def shutdown(self, drain=True, timeout=None):
+        """
+        Stop the pool
+
+        Args:
+            drain (bool): Process already queued events before exiting
+            timeout (float): Seconds to wait for each worker to exit
+        """
+        self._stopping.set()
+        for index, q in enumerate(self._queues):
+            with self._lock:
+                failed = index in self._failed
+            if not drain or failed:
+                with q.mutex:
+                    abandoned = [item for item in q.queue if item is not _SHUTDOWN]
+                    q.queue.clear()
+                # A failed worker is not there to drain its queue
+                if failed:
+                    self._abandon(abandoned)
+            try:
+                q.put(_SHUTDOWN, timeout=timeout)
+            except Full:
+                logger.warning(f"{self.name} queue still full at shutdown")
+        for thread in self._threads:
+            thread.join(timeout)
+        logger.info(f"{self.name} pool stopped")
+
+    def _abandon(self, events):
+        """Hand events a failed worker never processed to ``on_abandoned``"""
+        if events:
+            logger.error(f"{len(events)} queued {self.name} events left unprocessed by a failed worker")
+        if self.on_abandoned is None:
+            return
+        for event in events:
+            try:
+                self.on_abandoned(event, self.failure)
+            except Exception as e:
+                logger.error(f"{self.name} failed to hand off an abandoned event: {str(e)}")
+
+    def _run(self, index):
+        """Worker loop: drain batches from the owned queue and handle them"""
+        source = self._queues[index]
+        try:
+            handler = self.handler_factory()
+        except Exception as e:
+            with self._lock:
+                self._failed.add(index)
+                if self.failure is None:
+                    self.failure = e
+            logger.error(f"{self.name}-{index} failed to start with {source.qsize()} queued events: {str(e)}")
+            return
+
+        while True:
+            batch = drain_batch(source, self.batch_size, self.linger, self.poll_timeout,
+                                self.stats, self._lock)
+            if not batch:
+                continue
+
+            stop = any(item is _SHUTDOWN for item in batch)
+            batch = [item for item in batch if item is not _SHUTDOWN]
+
+            if batch:
+                try:
+                    handler(batch)
+                    with self._lock:
+                        self.stats["processed"] += len(batch)
+                except Exception as e:
+                    with self._lock:
+                        self.stats["errors"] += len(batch)
+                    logger.error(f"{self.name}-{index} processing error: {str(e)}")
+
+            if stop:
+                return
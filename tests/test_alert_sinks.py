@@ -0,0 +1,60 @@
+"""
+Tests for the alert dedupe window and digest formatting
+"""
+
+from core.alert_sinks import AlertDeduper, format_digest
+
+
+def alert(product_id, competitor_price, our_price=100.0):
+    return {"product_id": product_id, "product_name": f"P{product_id}", "category": "Electronics",
+            "our_price": our_price, "competitor_price": competitor_price}
+
+
+def test_repeat_within_window_is_dropped():
+    deduper = AlertDeduper(window=60.0)
+    assert deduper.admit(alert(1, 90.0), now=0.0)
+    assert not deduper.admit(alert(1, 90.0), now=10.0)
+    assert not deduper.admit(alert(1, 95.0), now=20.0)
+    assert deduper.admit(alert(2, 90.0), now=20.0)
+
+
+def test_further_drop_is_admitted_and_becomes_the_reference():
+    deduper = AlertDeduper(window=60.0)
+    assert deduper.admit(alert(1, 90.0), now=0.0)
+    assert deduper.admit(alert(1, 85.0), now=5.0)
+    assert not deduper.admit(alert(1, 88.0), now=6.0)
+
+
+def test_window_expiry_readmits():
+    deduper = AlertDeduper(window=60.0)
+    assert deduper.admit(alert(1, 90.0), now=0.0)
+    assert deduper.admit(alert(1, 90.0), now=60.0)
+    assert not deduper.admit(alert(1, 90.0), now=61.0)
+
+
+def test_zero_window_admits_everything():
+    deduper = AlertDeduper(window=0)
+    assert all(deduper.admit(alert(1, 90.0), now=0.0) for _ in range(3))
+
+
+def test_oldest_product_is_forgotten_past_the_limit():
+    deduper = AlertDeduper(window=60.0, max_products=2)
+    for product_id in (1, 2, 3):
+        assert deduper.admit(alert(product_id, 90.0), now=float(product_id))
+    # Product 1 was forgotten when product 3 arrived
+    assert deduper.admit(alert(1, 90.0), now=4.0)
+    assert not deduper.admit(alert(3, 90.0), now=4.0)
+
+
+def test_unparseable_price_never_counts_as_a_drop():
+    deduper = AlertDeduper(window=60.0)
+    assert deduper.admit(alert(1, "n/a"), now=0.0)
+    assert not deduper.admit(alert(1, "n/a"), now=1.0)
+
+
+def test_digest_lists_every_alert():
+    digest = format_digest([alert(1, 90.0), alert(2, 75.0)])
+    lines = digest["text"].splitlines()
+    assert any("P1 (Electronics)" in line and "10.0% below" in line for line in lines)
+    assert any("P2 (Electronics)" in line and "25.0% below" in line for line in lines)
+    assert len(digest["alerts"]) == 2
@@ -0,0 +1,69 @@
+"""
+Tests for the asyncio pipeline runtime: stage errors, rules stage and stopping
+"""
+
+import asyncio
+import threading
+import pytest
+from core import async_pipeline
+from core.async_pipeline import AsyncPipeline, PricingStages, Stage, event_source
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_failing_and_timed_out_items_reach_on_error():
+    failed = []
+
+    async def handler(item):
+        if item == 1:
+            raise ValueError("bad item")
+        if item == 2:
+            await asyncio.sleep(1)
+        return [item]
+
+    async def source():
+        for item in range(4):
+            yield item
+
+    collected = []
+
+    async def collect(item):
+        collected.append(item)
+
+    stage = Stage("work", handler, concurrency=2, timeout=0.05,
+                  on_error=lambda item, error, name: failed.append((item, type(error).__name__, name)))
+    run(AsyncPipeline(source(), [stage, Stage("sink", collect)], channel_size=4).run())
+    assert sorted(collected) == [0, 3]
+    assert sorted(failed) == [(1, "ValueError", "work"), (2, "TimeoutError", "work")]
+    assert stage.stats["errors"] == 2
+
+
+def test_rules_stage_respects_the_prefilter_switch(monkeypatch):
+    stages = PricingStages.__new__(PricingStages)
+    stages.catalog = None
+    event = {"product_id": "1", "category": "Garden", "our_price": 100.0, "competitor_price": 50.0}
+    monkeypatch.setattr(async_pipeline, "commit_decision", lambda *args: None)
+
+    assert run(stages.rules(dict(event))) is None
+
+    off = type("Snapshot", (), {"rule_prefilter": False})()
+    monkeypatch.setattr(async_pipeline, "current_config", lambda: off)
+    assert run(stages.rules(dict(event))) == [event]
+
+
+def test_stop_ends_an_idle_queue_source():
+    stopping = threading.Event()
+    settings = {"simulation": {"enabled": False}}
+
+    async def main():
+        pipeline = AsyncPipeline(event_source(settings, poll_timeout=0.05, stopping=stopping),
+                                 [Stage("sink", lambda item: asyncio.sleep(0))], stopping=stopping)
+        task = asyncio.ensure_future(pipeline.run())
+        await asyncio.sleep(0.1)
+        pipeline.stop(drain=True)
+        await asyncio.wait_for(task, 2.0)
+        return pipeline.get_stats()
+
+    assert run(main())["emitted"] == 0
@@ -0,0 +1,50 @@
+"""
+Tests for the batch analysis prompt formatting and verdict parsing
+"""
+
+import pytest
+from core.batch_analysis import format_batch_events, parse_batch_verdicts, parse_verdict
+
+
+def test_parses_array_inside_prose_and_code_fence():
+    text = 'Here you go:\n```json\n[{"id": 0, "decision": "ALERT"}, {"id": 1, "decision": "ignore"}]\n```'
+    assert parse_batch_verdicts(text, 2) == {0: "ALERT", 1: "IGNORE"}
+
+
+def test_skips_unknown_ids_and_decisions():
+    text = ('[{"id": 0, "decision": "MAYBE"}, {"id": 5, "decision": "ALERT"}, '
+            '{"id": "x", "decision": "ALERT"}, "junk", {"id": "1", "decision": "ALERT"}]')
+    assert parse_batch_verdicts(text, 2) == {1: "ALERT"}
+
+
+@pytest.mark.parametrize("text", ["ALERT for all of them", "[{not json}]", "] before ["])
+def test_unusable_output_raises(text):
+    with pytest.raises(ValueError):
+        parse_batch_verdicts(text, 3)
+
+
+def test_format_identifies_events_by_position():
+    events = [{"product_name": "A", "category": "Electronics", "our_price": 10, "competitor_price": 9},
+              {"product_name": "B", "category": "Appliances", "our_price": 20, "competitor_price": 15,
+               "price_history": "new low"}]
+    lines = format_batch_events(events).splitlines()
+    assert lines[0].startswith("id=0 | Product: A")
+    assert lines[1].startswith("id=1 | Product: B") and lines[1].endswith("History: new low")
+    compact = format_batch_events(events, compact=True).splitlines()
+    assert compact == ["id=0 | A | Electronics | 10 | 9 | -", "id=1 | B | Appliances | 20 | 15 | new low"]
+
+
+@pytest.mark.parametrize("text, decision", [
+    ("ALERT", "ALERT"),
+    ("Final Answer: ignore.", "IGNORE"),
+    ('{"decision": "ALERT"}', "ALERT"),
+    ("IGNORE - the drop is below the threshold", "IGNORE"),
+])
+def test_parse_verdict(text, decision):
+    assert parse_verdict(text) == decision
+
+
+@pytest.mark.parametrize("text", ["", "No decision here", "ALERT or IGNORE?", "ALERTING"])
+def test_parse_verdict_rejects_missing_or_ambiguous(text):
+    with pytest.raises(ValueError):
+        parse_verdict(text)
@@ -0,0 +1,60 @@
+"""
+Tests for the blocking micro-batch consumer
+"""
+
+import threading
+import time
+from queue import Queue
+from core.batching import consumer_stats, drain_batch
+
+
+def new_stats():
+    return {"batches": 0, "events": 0, "capacity": 0, "idle_waits": 0,
+            "idle_wall_seconds": 0.0, "idle_cpu_seconds": 0.0}
+
+
+def test_queued_items_are_taken_up_to_max_size():
+    source = Queue()
+    for i in range(10):
+        source.put(i)
+    stats, lock = new_stats(), threading.Lock()
+    assert drain_batch(source, 4, 0.0, 1.0, stats, lock) == [0, 1, 2, 3]
+    assert drain_batch(source, 8, 0.0, 1.0, stats, lock) == [4, 5, 6, 7, 8, 9]
+    derived = consumer_stats(stats)
+    assert derived["batches"] == 2
+    assert derived["avg_batch_size"] == 5.0
+    assert derived["avg_batch_fill"] == 10 / 12
+
+
+def test_linger_collects_items_arriving_after_the_first():
+    source = Queue()
+    source.put("first")
+    timer = threading.Timer(0.05, source.put, args=("late",))
+    timer.start()
+    start = time.monotonic()
+    batch = drain_batch(source, 8, 0.5, 1.0, new_stats(), threading.Lock())
+    timer.join()
+    # Waits out the linger for a batch that does not fill up
+    assert batch == ["first", "late"]
+    assert 0.4 <= time.monotonic() - start < 2.0
+
+
+def test_full_batch_returns_without_waiting_for_the_linger():
+    source = Queue()
+    for i in range(4):
+        source.put(i)
+    start = time.monotonic()
+    assert drain_batch(source, 4, 5.0, 1.0, new_stats(), threading.Lock()) == [0, 1, 2, 3]
+    assert time.monotonic() - start < 1.0
+
+
+def test_timeout_with_no_items_counts_an_idle_wait():
+    stats = new_stats()
+    start = time.monotonic()
+    assert drain_batch(Queue(), 4, 0.0, 0.05, stats, threading.Lock()) == []
+    assert time.monotonic() - start >= 0.04
+    assert stats["idle_waits"] == 1
+    assert stats["batches"] == 0
+    assert stats["idle_wall_seconds"] >= 0.04
+    # Blocking, not spinning, while idle
+    assert consumer_stats(stats)["idle_cpu_ratio"] < 0.5
@@ -0,0 +1,95 @@
+"""
+Tests for the columnar product catalog and the rules evaluated through it
+"""
+
+import math
+from types import SimpleNamespace
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.catalog import ProductCatalog, load_catalog
+from core.rules import compute_price_drops, evaluate_events
+
+PRODUCTS = [
+    {"id": 30, "name": "TV", "category": "Electronics", "our_price": 500.0},
+    {"id": 10, "name": "Fridge", "category": " Appliances", "our_price": 800.0},
+    {"id": 20, "name": "Speaker", "category": "electronics", "our_price": 100.0},
+    {"id": 40, "name": "Toy", "category": "Toys", "our_price": 20.0},
+]
+
+
+@pytest.fixture
+def catalog():
+    return ProductCatalog.from_products(PRODUCTS)
+
+
+def test_lookup_rows_marks_unknown_ids(catalog):
+    assert catalog.lookup_rows([20, 99, 30, 0, 10]).tolist() == [2, -1, 0, -1, 1]
+    assert catalog.lookup_rows([]).tolist() == []
+
+
+def test_lookup_rows_on_an_empty_catalog():
+    empty = ProductCatalog([], [], [], [])
+    assert len(empty) == 0
+    assert empty.lookup_rows([1, 2]).tolist() == [-1, -1]
+    result = empty.evaluate([1], [90.0], 0.05, ["electronics"])
+    assert result["known"].tolist() == [False]
+    assert math.isnan(result["drop"][0])
+    assert result["threshold_mask"].tolist() == [False]
+
+
+def test_category_codes_are_normalized_but_labels_kept(catalog):
+    assert catalog.category_names.tolist() == ["appliances", "electronics", "toys"]
+    assert catalog.category_codes[0] == catalog.category_codes[2]
+    assert [p["category"] for p in catalog.to_products()] == ["Electronics", "Appliances", "Electronics", "Toys"]
+    assert catalog.category_code_mask([" ELECTRONICS "]).tolist() == [False, True, False]
+
+
+def test_evaluate_masks(catalog):
+    result = catalog.evaluate([30, 20, 40, 99], [450.0, 99.0, 10.0, 1.0], 0.05, ["Electronics"])
+    assert result["drop"][:3].tolist() == pytest.approx([0.1, 0.01, 0.5])
+    assert result["category_mask"].tolist() == [True, True, False, False]
+    assert result["threshold_mask"].tolist() == [True, False, False, False]
+
+
+def test_csv_round_trip(tmp_path, catalog):
+    path = tmp_path / "catalog.csv"
+    path.write_text("id,name,category,our_price\n"
+                    + "".join(f"{p['id']},{p['name']},{p['category']},{p['our_price']}\n" for p in PRODUCTS))
+    assert load_catalog(str(path)).to_products() == catalog.to_products()
+
+
+def make_events():
+    events = []
+    for i, competitor in enumerate([450.0, 99.0, 760.0, 5.0, 498.0, "n/a"]):
+        product = PRODUCTS[i % len(PRODUCTS)]
+        events.append({"product_id": product["id"], "product_name": product["name"],
+                       "category": product["category"], "our_price": product["our_price"],
+                       "competitor_price": competitor})
+    # Not in the catalog: evaluated from its own fields
+    events.append({"product_id": "sku-x", "category": "Smart Home", "our_price": 50.0, "competitor_price": 40.0})
+    events.append({"product_id": 99, "category": "Electronics", "our_price": 50.0, "competitor_price": 49.0})
+    return events
+
+
+def test_evaluate_events_through_the_catalog_matches_plain_rules(catalog):
+    events = make_events()
+    categories = ["electronics", "appliances", "smart home"]
+    plain = evaluate_events(events, categories, 0.05, 0.01)
+    assert evaluate_events(events, categories, 0.05, 0.01, catalog=catalog) == plain
+    assert compute_price_drops(events, catalog) == pytest.approx(compute_price_drops(events))
+
+
+def test_catalog_prices_take_precedence(catalog):
+    # The event carries a stale our_price; the catalog's is used
+    event = {"product_id": 20, "category": "Electronics", "our_price": 200.0, "competitor_price": 90.0}
+    assert compute_price_drops([event], catalog) == pytest.approx([0.1])
+
+
+def test_dashboard_price_differences_use_the_catalog(catalog):
+    dashboard = pytest.importorskip("ui.dashboard")
+    records = [SimpleNamespace(product_id=30, our_price=500.0, competitor_price=450.0, price_diff=10.0),
+               SimpleNamespace(product_id=99, our_price=50.0, competitor_price=40.0, price_diff=20.0)]
+    assert dashboard.price_differences(records) == [10.0, 20.0]
+    assert dashboard.price_differences(records, catalog) == pytest.approx([10.0, 20.0])
@@ -0,0 +1,66 @@
+"""
+Tests for the per-product coalescing window
+"""
+
+import pytest
+from core.coalescing import Coalescer, make_coalescer
+
+
+def make_event(product_id, competitor_price, n):
+    return {"product_id": product_id, "competitor_price": competitor_price, "n": n}
+
+
+def burst(coalescer):
+    for n, (product_id, price) in enumerate([("a", 90.0), ("b", 50.0), ("a", 80.0), ("a", 85.0), ("b", 55.0)]):
+        coalescer.add(make_event(product_id, price, n))
+
+
+def test_latest_policy_keeps_the_newest_event():
+    collapsed = []
+    coalescer = Coalescer(window=60.0, policy="latest", on_collapse=collapsed.append)
+    burst(coalescer)
+    assert coalescer.due() == []
+    released = coalescer.flush()
+    assert [(e["product_id"], e["n"]) for e in released] == [("a", 3), ("b", 4)]
+    assert sorted(e["n"] for e in collapsed) == [0, 1, 2]
+
+
+def test_extreme_policy_keeps_the_lowest_competitor_price():
+    collapsed = []
+    coalescer = Coalescer(window=60.0, policy="extreme", on_collapse=collapsed.append)
+    burst(coalescer)
+    coalescer.add(make_event("c", "n/a", 5))
+    coalescer.add(make_event("c", 10.0, 6))
+    released = coalescer.flush()
+    assert [(e["product_id"], e["competitor_price"]) for e in released] == [("a", 80.0), ("b", 50.0), ("c", 10.0)]
+    assert sorted(e["n"] for e in collapsed) == [0, 3, 4, 5]
+
+
+def test_collapse_stats():
+    coalescer = Coalescer(window=60.0)
+    burst(coalescer)
+    stats = coalescer.get_stats()
+    assert (stats["received"], stats["collapsed"], stats["released"], stats["pending"]) == (5, 3, 0, 2)
+    assert stats["collapse_ratio"] == pytest.approx(0.6)
+    coalescer.flush()
+    stats = coalescer.get_stats()
+    assert (stats["released"], stats["pending"]) == (2, 0)
+
+
+def test_windows_expire_in_order():
+    coalescer = Coalescer(window=1.0)
+    coalescer.add(make_event("a", 90.0, 0))
+    deadline = coalescer.next_deadline()
+    coalescer.add(make_event("b", 90.0, 1))
+    assert coalescer.due(now=deadline - 0.001) == []
+    assert [e["product_id"] for e in coalescer.due(now=deadline)] == ["a"]
+    assert len(coalescer) == 1
+    assert coalescer.next_deadline() >= deadline
+
+
+def test_settings():
+    assert make_coalescer({"coalescing": {"enabled": False}}) is None
+    coalescer = make_coalescer({"coalescing": {"enabled": True, "window_ms": 50, "policy": "extreme"}})
+    assert (coalescer.window, coalescer.policy) == (0.05, "extreme")
+    with pytest.raises(ValueError):
+        Coalescer(policy="oldest")
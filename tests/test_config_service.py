@@ -0,0 +1,112 @@
+"""
+Tests for the config service reload and change keys
+"""
+
+import os
+import sys
+import json
+import subprocess
+import pytest
+from config.service import ConfigService
+
+SETTINGS = {
+    "monitoring": {"categories": ["Electronics"], "price_drop_threshold": 0.05},
+    "alerts": {"outputs": []},
+    "prompts": {"mode": "verbose"},
+}
+
+
+def write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+    # Make sure the mtime differs even on coarse-grained filesystems
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def service(tmp_path):
+    paths = {name: str(tmp_path / name) for name in ("settings.json", "agents.yaml", "prompts.yaml")}
+    write(paths["settings.json"], json.dumps(SETTINGS))
+    write(paths["agents.yaml"], "pricing_analyst:\n  role: Analyst\n")
+    write(paths["prompts.yaml"], "pricing_analysis_template: 'Analyze {product_name}'\n")
+    service = ConfigService(poll_interval=0.1, settings_path=paths["settings.json"],
+                            agents_path=paths["agents.yaml"], prompts_path=paths["prompts.yaml"])
+    service.paths = paths
+    return service
+
+
+def edit_settings(service, **sections):
+    write(service.paths["settings.json"], json.dumps(dict(SETTINGS, **sections)))
+
+
+def test_no_change_no_reload(service):
+    assert service.check() == set()
+    assert service.snapshot.version == 1
+
+
+def test_touch_without_content_change_is_not_a_reload(service):
+    write(service.paths["settings.json"], json.dumps(SETTINGS))
+    assert service.check() == set()
+    assert service.snapshot.version == 1
+
+
+def test_settings_change_keys_name_the_sections(service):
+    edit_settings(service, alerts={"outputs": [{"type": "file"}]})
+    assert service.check() == {"settings.alerts"}
+
+    edit_settings(service, alerts={"outputs": [{"type": "file"}]},
+                  monitoring={"categories": ["Electronics", "Toys"], "price_drop_threshold": 0.1})
+    assert service.check() == {"settings.monitoring"}
+    snapshot = service.snapshot
+    assert snapshot.version == 3
+    assert snapshot.categories == frozenset({"electronics", "toys"})
+    assert snapshot.price_drop_threshold == 0.1
+
+
+def test_yaml_change_keys_are_the_file_kind(service):
+    write(service.paths["prompts.yaml"], "pricing_analysis_template: 'Judge {product_name}'\n")
+    write(service.paths["agents.yaml"], "pricing_analyst:\n  role: Senior Analyst\n")
+    assert service.check() == {"prompts", "agents"}
+
+
+def test_invalid_file_keeps_the_last_good_snapshot(service):
+    before = service.snapshot
+    write(service.paths["settings.json"], "{not json")
+    assert service.check() == set()
+    assert service.snapshot is before
+    assert service.get_stats()["errors"] == 1
+
+
+def test_decision_version_follows_what_decisions_depend_on(service):
+    version = service.snapshot.decision_version
+    edit_settings(service, alerts={"outputs": [{"type": "file"}]})
+    service.check()
+    assert service.snapshot.decision_version == version
+
+    edit_settings(service, alerts={"outputs": [{"type": "file"}]}, prompts={"mode": "compact"})
+    service.check()
+    assert service.snapshot.decision_version != version
+
+
+def test_subscribers_only_see_their_keys(service):
+    calls = {"monitoring": [], "settings": [], "prompts": []}
+    service.subscribe(lambda snapshot, changed: calls["monitoring"].append(changed), "settings.monitoring")
+    service.subscribe(lambda snapshot, changed: calls["settings"].append(changed), "settings")
+    service.subscribe(lambda snapshot, changed: calls["prompts"].append(changed), "prompts")
+
+    edit_settings(service, alerts={"outputs": [{"type": "file"}]})
+    service.check()
+    assert calls == {"monitoring": [], "settings": [{"settings.alerts"}], "prompts": []}
+
+
+def test_snapshot_is_immutable(service):
+    with pytest.raises(AttributeError):
+        service.snapshot.price_drop_threshold = 0.5
+
+
+def test_config_package_does_not_depend_on_core():
+    code = "import sys, config.constants, config.service; print(sorted(m for m in sys.modules if m.split('.')[0] == 'core'))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=os.getcwd()))
+    assert result.stdout.strip() == "[]"
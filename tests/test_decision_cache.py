@@ -0,0 +1,65 @@
+"""
+Tests for the decision cache keys, LRU eviction, TTL and versions
+"""
+
+import time
+from core.decision_cache import DecisionCache
+
+
+def make_event(competitor_price=90.0, product_id="1", **extra):
+    return dict({"product_id": product_id, "category": "Electronics", "our_price": 100.0,
+                 "competitor_price": competitor_price}, **extra)
+
+
+def test_near_identical_price_hits():
+    cache = DecisionCache(config_files=(), price_bucket=0.01)
+    cache.put(make_event(90.0), 0.05, "ALERT", "details")
+    assert cache.get(make_event(90.2), 0.05) == {"decision": "ALERT", "details": "details"}
+    assert cache.get(make_event(85.0), 0.05) is None
+    assert cache.get(make_event(90.0), 0.1) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DecisionCache(config_files=(), max_entries=2)
+    for product_id in ("a", "b"):
+        cache.put(make_event(product_id=product_id), 0.05, "IGNORE")
+    cache.get(make_event(product_id="a"), 0.05)
+    cache.put(make_event(product_id="c"), 0.05, "IGNORE")
+    assert cache.get(make_event(product_id="b"), 0.05) is None
+    assert cache.get(make_event(product_id="a"), 0.05) is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    cache = DecisionCache(config_files=(), ttl_seconds=0.01)
+    cache.put(make_event(), 0.05, "IGNORE")
+    time.sleep(0.02)
+    assert cache.get(make_event(), 0.05) is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_version_change_clears_the_cache():
+    cache = DecisionCache(config_files=())
+    cache.set_version("v1")
+    cache.put(make_event(), 0.05, "IGNORE")
+    cache.set_version("v1")
+    assert cache.get(make_event(), 0.05) is not None
+    cache.set_version("v2")
+    assert cache.get(make_event(), 0.05) is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_unusable_prices_are_not_cached():
+    cache = DecisionCache(config_files=())
+    cache.put(make_event("n/a"), 0.05, "ALERT")
+    assert cache.get_stats()["size"] == 0
+
+
+def test_price_history_context_is_part_of_the_key():
+    cache = DecisionCache(config_files=(), history_bucket=0.05)
+    signal = {"first": False, "new_low": True, "change": -0.10}
+    cache.put(make_event(price_signal=signal), 0.05, "ALERT")
+    assert cache.get(make_event(price_signal=dict(signal, change=-0.11)), 0.05) is not None
+    assert cache.get(make_event(price_signal=dict(signal, new_low=False)), 0.05) is None
+    assert cache.get(make_event(price_signal=dict(signal, change=0.02)), 0.05) is None
+    assert cache.get(make_event(), 0.05) is None
@@ -0,0 +1,98 @@
+"""
+Tests for the decision classifier model: features, training and persistence
+"""
+
+import json
+import random
+from types import SimpleNamespace
+import pytest
+from core import decision_classifier
+from core.decision_classifier import DecisionModel, evaluate_model, extract_features, train_model
+
+CONFIG = SimpleNamespace(price_drop_threshold=0.05, categories=frozenset({"electronics", "appliances"}))
+BASIS = {"price_drop_threshold": 0.05, "categories": ["appliances", "electronics"]}
+
+
+def make_examples(count=400, seed=3):
+    rng = random.Random(seed)
+    examples = []
+    for _ in range(count):
+        competitor_price = rng.uniform(70.0, 100.0)
+        event = {"our_price": 100.0, "competitor_price": competitor_price,
+                 "category": rng.choice(["Electronics", "Appliances"]),
+                 "price_signal": {"change": rng.uniform(-0.1, 0.1), "new_low": rng.random() < 0.2,
+                                  "first": False, "volatility": rng.uniform(0, 0.05)}}
+        features = extract_features(event, CONFIG)
+        examples.append((features, 1 if features["drop"] >= 0.05 else 0))
+    return examples
+
+
+def test_extract_features():
+    features = extract_features({"our_price": 100.0, "competitor_price": 90.0, "category": " Electronics ",
+                                 "price_signal": {"new_low": True, "change": -0.02}}, CONFIG)
+    assert features["drop"] == pytest.approx(0.1)
+    assert features["threshold_gap"] == pytest.approx(0.05)
+    assert features["above_threshold"] == 1.0
+    assert features["new_low"] == 1.0 and features["first_seen"] == 0.0
+    assert features["history_change"] == pytest.approx(-0.02)
+    assert features["category"] == "electronics"
+    assert extract_features({"our_price": 0, "competitor_price": 1}, CONFIG) is None
+
+
+def test_training_learns_the_threshold():
+    pytest.importorskip("numpy")
+    examples = make_examples()
+    model = train_model(examples, BASIS)
+    assert evaluate_model(model, make_examples(seed=4))["accuracy"] >= 0.95
+
+
+def test_round_trip_preserves_predictions(tmp_path):
+    pytest.importorskip("numpy")
+    examples = make_examples(200)
+    model = train_model(examples, BASIS)
+    path = str(tmp_path / "models" / "decision_model.json")
+    model.save(path)
+    loaded = DecisionModel.load(path)
+    for features, _ in examples:
+        assert loaded.predict_proba(features) == pytest.approx(model.predict_proba(features))
+    assert loaded.basis == model.basis
+    assert loaded.matches(CONFIG)
+
+
+def test_model_only_matches_its_training_basis():
+    model = DecisionModel([0.0] * 7, [1.0] * 7, [], [0.0] * 7, 0.0, BASIS)
+    assert model.matches(CONFIG)
+    assert not model.matches(SimpleNamespace(price_drop_threshold=0.1, categories=CONFIG.categories))
+    assert not model.matches(SimpleNamespace(price_drop_threshold=0.05, categories=frozenset({"toys"})))
+
+
+def test_unknown_category_and_format(tmp_path):
+    model = DecisionModel([0.0] * 7, [1.0] * 7, ["electronics"], [0.0] * 7 + [2.0], 0.0, BASIS)
+    features = dict(make_examples(1)[0][0], category="toys")
+    assert model.predict_proba(features) == pytest.approx(0.5)
+
+    data = model.to_dict()
+    data["format"] = 99
+    path = tmp_path / "old_model.json"
+    path.write_text(json.dumps(data))
+    with pytest.raises(ValueError):
+        DecisionModel.load(str(path))
+
+
+def test_classifier_without_event_log_warns(monkeypatch, caplog):
+    monkeypatch.setattr(decision_classifier, "_classifier", object())
+    settings = {"classifier": {"enabled": True}, "event_log": {"enabled": False}}
+    decision_classifier.open_classifier(settings)
+    assert "event log is disabled" in caplog.text
+
+    caplog.clear()
+    settings["event_log"]["enabled"] = True
+    decision_classifier.open_classifier(settings)
+    assert "event log is disabled" not in caplog.text
+
+
+def test_shipped_settings_collect_training_data():
+    with open("config/settings.json") as f:
+        settings = json.load(f)
+    if settings["classifier"]["enabled"]:
+        assert settings["event_log"]["enabled"]
@@ -0,0 +1,96 @@
+"""
+Tests for the event log: torn-tail recovery, pending events and paging
+"""
+
+import os
+from core.event_log import KIND_DECISION, KIND_EVENT, EventLog
+
+
+def make_event(i, product_id=None):
+    return {"product_id": str(i % 5 if product_id is None else product_id), "product_name": f"P{i}",
+            "our_price": 100.0, "competitor_price": 90.0}
+
+
+def active_segment(directory):
+    return os.path.join(directory, sorted(n for n in os.listdir(directory) if n.endswith('.log'))[-1])
+
+
+def test_recovery_truncates_torn_and_corrupt_tail(tmp_path):
+    log = EventLog(str(tmp_path))
+    for i in range(10):
+        log.append_event(make_event(i))
+    log.close()
+    path = active_segment(str(tmp_path))
+    good_size = os.path.getsize(path)
+
+    # A record whose CRC does not match, followed by half a header
+    with open(path, 'ab') as f:
+        f.write((20).to_bytes(4, 'little') + (12345).to_bytes(4, 'little') + b'x' * 20 + b'\x07\x00')
+
+    log = EventLog(str(tmp_path))
+    try:
+        assert os.path.getsize(path) == good_size
+        assert log.count(KIND_EVENT) == 10
+        assert log.append_event(make_event(10)) == 10
+        assert [r["lsn"] for r in log.page(1, 3)] == [10, 9, 8]
+    finally:
+        log.close()
+
+
+def test_recovery_stops_at_a_flipped_payload_byte(tmp_path):
+    log = EventLog(str(tmp_path))
+    for i in range(3):
+        log.append_event(make_event(i))
+    log.close()
+    path = active_segment(str(tmp_path))
+    with open(path, 'r+b') as f:
+        f.seek(os.path.getsize(path) - 2)
+        f.write(b'#')
+
+    log = EventLog(str(tmp_path))
+    try:
+        assert log.count(KIND_EVENT) == 2
+        assert log.append_event(make_event(3)) == 2
+    finally:
+        log.close()
+
+
+def test_pending_events_across_restarts(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=2048)
+    events = [make_event(i) for i in range(40)]
+    for event in events:
+        log.append_event(event)
+    for event in events[::2]:
+        log.append_decision(event, "IGNORE")
+    log.close()
+
+    log = EventLog(str(tmp_path), segment_bytes=2048)
+    pending = log.pending_events()
+    assert [e["lsn"] for e in pending] == [e["lsn"] for e in events[1::2]]
+    for event in pending[:-1]:
+        log.append_decision(event, "ALERT")
+    log.close()
+
+    # The checkpoint skips the committed segments but keeps the remaining event
+    log = EventLog(str(tmp_path), segment_bytes=2048)
+    try:
+        assert [e["lsn"] for e in log.pending_events()] == [pending[-1]["lsn"]]
+    finally:
+        log.close()
+
+
+def test_page_by_product_matches_a_full_scan(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=2048)
+    try:
+        for i in range(60):
+            event = make_event(i)
+            log.append_event(event)
+            if i % 3 == 0:
+                log.append_decision(event, "IGNORE")
+        for kind in (KIND_EVENT, KIND_DECISION):
+            expected = [r["lsn"] for r in log.records(kind) if r["product_id"] == 2][::-1]
+            paged = log.page(1, 4, product_id="2", kind=kind) + log.page(2, 4, product_id="2", kind=kind)
+            assert [r["lsn"] for r in paged] == expected[:8]
+        assert log.page(1, 10, product_id="404") == []
+    finally:
+        log.close()
@@ -0,0 +1,79 @@
+"""
+Tests for the analysis failure paths of the event processor
+"""
+
+import pytest
+from core import event_processor
+from core.dead_letter import DeadLetterQueue
+
+
+class FailingCrew:
+    def kickoff(self, inputs=None):
+        raise RuntimeError("LLM unavailable")
+
+
+class ReplyCrew:
+    def __init__(self, reply):
+        self.reply = reply
+
+    def kickoff(self, inputs=None):
+        return self.reply
+
+
+def make_event(i):
+    return {"product_id": str(i), "product_name": f"P{i}", "category": "Electronics",
+            "our_price": 100.0, "competitor_price": 80.0}
+
+
+@pytest.fixture
+def dead_letters(monkeypatch):
+    queue = DeadLetterQueue(path=None)
+    monkeypatch.setattr(event_processor, "get_dead_letter_queue", lambda: queue)
+    return queue
+
+
+def dead_lettered(queue):
+    return [entry["event"]["product_id"] for entry in queue.entries()]
+
+
+def test_single_pending_event_is_dead_lettered(dead_letters):
+    alerts = event_processor.analyze_batch([make_event(1)], FailingCrew(), FailingCrew(), lambda event: None)
+    assert alerts == 0
+    assert dead_lettered(dead_letters) == ["1"]
+
+
+def test_failed_batch_request_dead_letters_every_event(dead_letters):
+    events = [make_event(i) for i in range(3)]
+    event_processor.analyze_batch(events, FailingCrew(), FailingCrew(), lambda event: None)
+    assert dead_lettered(dead_letters) == ["0", "1", "2"]
+
+
+def test_unparsed_batch_verdicts_fall_back_to_single_events(dead_letters):
+    notified = []
+    events = [make_event(i) for i in range(2)]
+    alerts = event_processor.analyze_batch(events, ReplyCrew('[{"id": 0, "decision": "ALERT"}]'),
+                                           ReplyCrew("IGNORE"), notified.append)
+    assert alerts == 1
+    assert [event["product_id"] for event in notified] == ["0"]
+    assert dead_lettered(dead_letters) == []
+
+
+def test_failing_notify_dead_letters_the_event(dead_letters):
+    def notify(event):
+        raise RuntimeError("notification pool failed")
+
+    event_processor.analyze_batch([make_event(1)], FailingCrew(), ReplyCrew("ALERT"), notify)
+    assert dead_lettered(dead_letters) == ["1"]
+
+
+def test_crew_setup_failure_dead_letters_the_batch(dead_letters, monkeypatch):
+    pytest.importorskip("crewai")
+    import agents.registry as registry
+
+    def broken(*args):
+        raise ValueError("invalid llm")
+
+    monkeypatch.setattr(registry, "get_analysis_crew", broken)
+    handle = event_processor.make_event_handler()
+    handle([make_event(1), make_event(2)])
+    assert dead_lettered(dead_letters) == ["1", "2"]
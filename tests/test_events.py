@@ -0,0 +1,67 @@
+"""
+Tests for the compact price event and its binary batch encoding
+"""
+
+import io
+import pytest
+from core.events import (
+    PriceEvent, decode_batch, encode_batch, read_event_batches, write_event_batches
+)
+from core.sharding import MultiprocessingTransport
+
+
+def make_event(i, **overrides):
+    event = {"product_id": i, "product_name": f"Product {i}", "category": "Smart Home" if i % 2 else "Electronics",
+             "our_price": 100.0 + i, "competitor_price": 89.99 + i, "emitted_ns": 1_700_000_000_000_000_000 + i}
+    event.update(overrides)
+    return event
+
+
+def test_batch_round_trip():
+    events = [make_event(i) for i in range(10)] + [make_event(10, product_name="Télé 4K ✓", emitted_ns=0)]
+    decoded = decode_batch(encode_batch(events))
+    assert [event.to_dict() for event in decoded] == events
+    # Repeated names and categories share one string table entry
+    assert decoded[1].category is decoded[3].category
+
+
+def test_annotations_are_not_encoded():
+    event = PriceEvent.from_dict(dict(make_event(1), lsn=7, timestamp="ignored"))
+    assert event["lsn"] == 7
+    assert "lsn" not in decode_batch(encode_batch([event]))[0]
+
+
+def test_empty_batch():
+    assert decode_batch(encode_batch([])) == []
+
+
+@pytest.mark.parametrize("event", [
+    make_event(1, product_id="sku-1"),
+    make_event(1, product_id=-1),
+    make_event(1, our_price=None),
+    make_event(1, product_name="x" * 70000),
+    make_event(1, category="é" * 40000),
+])
+def test_unencodable_events_raise_value_error(event):
+    with pytest.raises(ValueError):
+        encode_batch([event])
+
+
+def test_oversized_strings_fall_back_to_single_events():
+    transport = MultiprocessingTransport(1, queue_size=4)
+    events = [make_event(1), make_event(2, product_name="x" * 70000)]
+    transport.publish_batch(0, events)
+    assert [dict(transport.consume(0, 1.0)) for _ in events] == events
+
+
+def test_not_a_batch():
+    with pytest.raises(ValueError):
+        decode_batch(b"nope")
+
+
+def test_event_file_round_trip():
+    events = [make_event(i) for i in range(25)]
+    f = io.BytesIO()
+    assert write_event_batches(f, events, batch_size=10) == 25
+    f.seek(0)
+    assert [event.to_dict() for event in read_event_batches(f)] == events
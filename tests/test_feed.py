@@ -0,0 +1,77 @@
+"""
+Tests for the synthetic and replayed price feeds
+"""
+
+import json
+import time
+from queue import Queue
+from core.feed import FeedEngine, generate_catalog, replay_events, synthetic_events
+
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def test_synthetic_feed_is_reproducible():
+    catalog = generate_catalog(50, seed=7)
+    assert catalog == generate_catalog(50, seed=7)
+    assert [p["id"] for p in catalog] == list(range(1, 51))
+
+    first = [event.to_dict() for _, event in synthetic_events(catalog, seed=3, count=100)]
+    second = [event.to_dict() for _, event in synthetic_events(catalog, seed=3, count=100)]
+    assert first == second
+    assert len(first) == 100
+    prices = {p["id"]: p["our_price"] for p in catalog}
+    for event in first:
+        assert 0.8 * prices[event["product_id"]] - 0.01 <= event["competitor_price"] \
+            <= 1.1 * prices[event["product_id"]] + 0.01
+
+
+def test_rate_paces_the_feed():
+    source = synthetic_events(generate_catalog(10), count=20)
+    sink = Queue()
+    stats = FeedEngine(source, sink, rate=100).run()
+    assert stats["emitted"] == 20
+    # 20 events at 100 events/sec: the last one is due after 0.19s
+    assert stats["elapsed"] >= 0.18
+    assert all(event["emitted_ns"] for event in drain(sink))
+
+
+def write_recording(path, gaps):
+    base = 1_700_000_000.0
+    offset = 0.0
+    with open(path, 'w') as f:
+        for i, gap in enumerate(gaps):
+            offset += gap
+            f.write(json.dumps({"product_id": i, "product_name": f"P{i}", "category": "electronics",
+                                "our_price": 100.0, "competitor_price": 90.0, "timestamp": base + offset}) + "\n")
+
+
+def test_replay_keeps_the_recorded_timing(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    write_recording(path, [0.0, 0.1, 0.1, 0.2])
+    assert [original for original, _ in replay_events(path)] == [1_700_000_000.0, 1_700_000_000.1,
+                                                                1_700_000_000.2, 1_700_000_000.4]
+
+    sink = Queue()
+    start = time.perf_counter()
+    stats = FeedEngine(replay_events(path), sink, speed=2.0).run()
+    elapsed = time.perf_counter() - start
+    # 0.4s of recorded time at twice the speed
+    assert 0.18 <= elapsed < 1.0
+    assert stats["emitted"] == 4
+    events = drain(sink)
+    assert [event["product_id"] for event in events] == [0, 1, 2, 3]
+    gaps = [(b["emitted_ns"] - a["emitted_ns"]) / 1e9 for a, b in zip(events, events[1:])]
+    assert gaps[2] > gaps[0]
+
+
+def test_replay_without_pacing_runs_unthrottled(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    write_recording(path, [0.0, 5.0, 5.0])
+    stats = FeedEngine(replay_events(path), Queue()).run()
+    assert stats["emitted"] == 3
+    assert stats["elapsed"] < 1.0
@@ -0,0 +1,36 @@
+"""
+Tests for the pipeline benchmark helpers
+"""
+
+import copy
+import json
+from benchmarks.pipeline_benchmark import compare_to_baseline, isolate_outputs, percentile
+
+
+def data_paths(value, prefix="data/"):
+    """Every string in a settings tree that points into the data directory"""
+    if isinstance(value, dict):
+        return [path for item in value.values() for path in data_paths(item, prefix)]
+    if isinstance(value, list):
+        return [path for item in value for path in data_paths(item, prefix)]
+    return [value] if isinstance(value, str) and value.startswith(prefix) else []
+
+
+def test_benchmark_outputs_stay_out_of_the_data_directory(tmp_path):
+    with open("config/settings.json") as f:
+        settings = json.load(f)
+    settings["metrics"]["dump_path"] = "data/metrics.json"
+    assert data_paths(settings)
+    isolated = isolate_outputs(copy.deepcopy(settings), str(tmp_path))
+    assert data_paths(isolated) == []
+    assert isolated["event_log"]["path"].startswith(str(tmp_path))
+    assert isolated["alerts"]["outputs"]["file"]["path"].startswith(str(tmp_path))
+
+
+def test_percentile_and_baseline():
+    assert percentile([], 50) == 0.0
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    report = {"throughput_eps": 80.0, "latency_ms": {"p50": 10.0, "p95": 20.0, "p99": 40.0}}
+    baseline = {"throughput_eps": 100.0, "latency_ms": {"p50": 10.0, "p95": 20.0, "p99": 30.0}}
+    assert len(compare_to_baseline(report, baseline, 0.1)) == 2
+    assert compare_to_baseline(report, baseline, 0.5) == []
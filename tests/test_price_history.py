@@ -0,0 +1,77 @@
+"""
+Tests for the per-product price history and its sliding window statistics
+"""
+
+import random
+import statistics
+import pytest
+from core.price_history import PriceHistory, PriceSeries
+
+
+def test_sliding_statistics_match_a_recomputation():
+    rng = random.Random(7)
+    series = PriceSeries(window=8, ewma_alpha=0.3)
+    prices = []
+    ewma = None
+    for _ in range(200):
+        price = round(rng.uniform(50, 150), 2)
+        series.add(price)
+        prices.append(price)
+        ewma = price if ewma is None else ewma + 0.3 * (price - ewma)
+        window = prices[-8:]
+        assert series.count == len(window)
+        assert series.low == min(window)
+        assert series.mean == pytest.approx(statistics.fmean(window))
+        assert series.stddev == pytest.approx(statistics.pstdev(window), abs=1e-6)
+        assert series.ewma == pytest.approx(ewma)
+
+
+def test_window_minimum_expires():
+    series = PriceSeries(window=3)
+    for price in (10.0, 20.0, 30.0, 40.0):
+        series.add(price)
+    assert series.low == 20.0
+
+
+def observe(history, competitor_price, our_price=100.0, product_id="1"):
+    return history.observe({"product_id": product_id, "our_price": our_price,
+                            "competitor_price": competitor_price})
+
+
+def test_signals():
+    history = PriceHistory(window=4, change_threshold=0.01)
+    first = observe(history, 90.0)
+    assert first.first and first.significant and first.change is None
+
+    unchanged = observe(history, 90.5)
+    assert not unchanged.significant and not unchanged.new_low
+    assert unchanged.change == pytest.approx(0.5 / 90.0)
+
+    lower = observe(history, 89.8)
+    assert lower.new_low and lower.significant
+
+    moved = observe(history, 95.0)
+    assert moved.significant and moved.change == pytest.approx((95.0 - 89.8) / 89.8)
+
+    repriced = observe(history, 95.0, our_price=120.0)
+    assert repriced.significant
+
+    assert history.get_stats()["unchanged"] == 1
+
+
+def test_reference_price_is_the_last_significant_one():
+    history = PriceHistory(window=8, change_threshold=0.01)
+    observe(history, 100.0)
+    # Small steps never add up past the threshold against the last price,
+    # but they do against the last analyzed one
+    assert not observe(history, 100.6).significant
+    assert observe(history, 101.2).significant
+
+
+def test_least_recently_seen_product_is_evicted():
+    history = PriceHistory(max_products=2)
+    for product_id in ("a", "b", "a", "c"):
+        observe(history, 10.0, product_id=product_id)
+    assert history.series("b") is None
+    assert history.series("a") is not None and history.series("c") is not None
+    assert history.get_stats()["evictions"] == 1
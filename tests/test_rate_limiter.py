@@ -0,0 +1,64 @@
+"""
+Tests for the LLM rate limiter: request cost estimates and retry decisions
+"""
+
+import json
+import httpx
+from langchain_openai import ChatOpenAI
+from agents.rate_limiter import LLMScheduler, RateLimitedTransport, retry_after
+
+COMPLETION = {
+    "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-3.5-turbo",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ALERT"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+}
+
+
+def chat_requests(max_tokens=None):
+    """Send one ChatOpenAI request through the limiter and return the requests it sent"""
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(200, json=COMPLETION)
+
+    scheduler = LLMScheduler({"completion_tokens": 256})
+    transport = RateLimitedTransport(httpx.MockTransport(handler), scheduler)
+    llm = ChatOpenAI(model="gpt-3.5-turbo", api_key="test", max_retries=0,
+                     http_client=httpx.Client(transport=transport))
+    kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+    assert llm.invoke("Competitor dropped the price", **kwargs).content == "ALERT"
+    return scheduler, sent
+
+
+def test_cost_uses_the_completion_cap_of_a_real_payload():
+    scheduler, sent = chat_requests(max_tokens=16)
+    model, tokens = scheduler.request_cost(sent[0])
+    prompt = json.loads(sent[0].content)['messages']
+    assert model == "gpt-3.5-turbo"
+    assert tokens == len(json.dumps(prompt)) // 4 + 16
+
+
+def test_cost_falls_back_to_the_default_completion_tokens():
+    scheduler, sent = chat_requests()
+    _, tokens = scheduler.request_cost(sent[0])
+    prompt = json.loads(sent[0].content)['messages']
+    assert tokens == len(json.dumps(prompt)) // 4 + 256
+
+
+def test_legacy_max_tokens_field_is_still_read():
+    scheduler = LLMScheduler({"completion_tokens": 256})
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions",
+                            json={"model": "m", "prompt": "", "max_tokens": 8})
+    assert scheduler.request_cost(request) == ("m", len('""') // 4 + 8)
+
+
+def test_other_requests_bypass_the_limiter():
+    scheduler = LLMScheduler({})
+    assert scheduler.request_cost(httpx.Request("GET", "https://api.test/v1/models")) == (None, 0)
+
+
+def test_retry_after_headers():
+    assert retry_after(httpx.Response(429, headers={"retry-after-ms": "250"})) == 0.25
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "2"})) == 2.0
+    assert retry_after(httpx.Response(429)) is None
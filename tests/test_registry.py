@@ -0,0 +1,52 @@
+"""
+Tests for the agent registry: crew agents built on the shared LLM client
+"""
+
+import json
+import httpx
+import pytest
+from agents import prompting, registry
+from agents.agent_factory import CrewLLM
+from core.event_processor import run_crew
+
+COMPLETION = {
+    "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-3.5-turbo",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Thought: clear drop\nFinal Answer: ALERT"},
+                 "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 120, "completion_tokens": 8, "total_tokens": 128},
+}
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Route the shared HTTP client to a mock server in verbose (crew) mode"""
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.read()))
+        return httpx.Response(200, json=COMPLETION)
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(prompting, "_prompt_settings", dict(prompting.DEFAULT_PROMPT_SETTINGS, mode="verbose"))
+    monkeypatch.setattr(registry, "_http_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    registry.reset_registry()
+    yield requests
+    registry.reset_registry()
+
+
+def test_crew_agent_uses_the_shared_llm(sent):
+    agent = registry.get_agent("pricing_analyst")
+    assert isinstance(agent.llm, CrewLLM)
+    assert agent.llm is registry.get_crew_llm("gpt-3.5-turbo", 0.3)
+    assert registry.get_agent("pricing_analyst") is agent
+
+
+def test_crew_requests_go_through_the_shared_client_and_are_timed(sent, monkeypatch):
+    observed = {}
+    monkeypatch.setattr("core.event_processor.LLM_SECONDS.observe",
+                        lambda seconds, agent: observed.__setitem__(agent, seconds))
+    crew = registry.get_analysis_crew("Analyze the price of {product_name}")
+    assert run_crew(crew, {"product_name": "TV"}).strip() == "ALERT"
+    assert len(sent) == 1
+    assert "TV" in json.dumps(sent[0]["messages"])
+    assert observed["pricing_analyst"] > 0
@@ -0,0 +1,59 @@
+"""
+Tests for the rule pre-filter thresholds
+"""
+
+import pytest
+from core.rules import RULE_ESCALATE, RULE_IGNORE, compute_price_drop, evaluate_event, evaluate_events
+
+CATEGORIES = ["Electronics", "Smart Home"]
+
+
+def make_event(competitor_price, our_price=100.0, category="Electronics"):
+    return {"product_id": "1", "product_name": "Test", "category": category,
+            "our_price": our_price, "competitor_price": competitor_price}
+
+
+def evaluate(event, threshold=0.05, margin=0.01):
+    return evaluate_event(event, CATEGORIES, threshold, margin)[0]
+
+
+def test_compute_price_drop():
+    assert compute_price_drop(100, 90) == pytest.approx(0.1)
+    assert compute_price_drop(100, 110) == pytest.approx(-0.1)
+    assert compute_price_drop(0, 10) is None
+    assert compute_price_drop("n/a", 10) is None
+
+
+def test_unmonitored_category_is_ignored():
+    assert evaluate(make_event(50.0, category="Garden")) == RULE_IGNORE
+
+
+def test_category_match_is_normalized():
+    assert evaluate(make_event(50.0, category="  smart home ")) == RULE_ESCALATE
+
+
+@pytest.mark.parametrize("competitor_price, verdict", [
+    (99.0, RULE_IGNORE),      # 1% drop, below threshold - margin
+    (105.0, RULE_IGNORE),     # competitor more expensive
+    (95.5, RULE_ESCALATE),    # 4.5% drop, inside the ambiguity band
+    (95.9, RULE_ESCALATE),    # 4.1% drop, just inside the band
+    (95.0, RULE_ESCALATE),    # exactly the threshold
+    (80.0, RULE_ESCALATE),    # well above the threshold
+])
+def test_threshold_band(competitor_price, verdict):
+    assert evaluate(make_event(competitor_price)) == verdict
+
+
+def test_zero_margin_ignores_everything_below_threshold():
+    assert evaluate(make_event(95.5), margin=0.0) == RULE_IGNORE
+
+
+def test_unparseable_prices_are_escalated():
+    assert evaluate(make_event("unknown")) == RULE_ESCALATE
+    assert evaluate(make_event(90.0, our_price=0)) == RULE_ESCALATE
+
+
+def test_batch_keeps_input_order():
+    events = [make_event(50.0), make_event(99.0), make_event(50.0, category="Garden")]
+    verdicts = [verdict for verdict, _ in evaluate_events(events, CATEGORIES, 0.05, 0.01)]
+    assert verdicts == [RULE_ESCALATE, RULE_IGNORE, RULE_IGNORE]
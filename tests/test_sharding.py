@@ -0,0 +1,93 @@
+"""
+Tests for the shard transports and the event router
+"""
+
+import threading
+import pytest
+from config.constants import INPUT_QUEUE
+from core.sharding import FileTransport, MultiprocessingTransport, route_events
+from core.worker_pool import partition_for
+
+
+def make_event(i, product_id=None):
+    return {"product_id": i if product_id is None else product_id, "product_name": f"P{i}",
+            "category": "Electronics", "our_price": 100.0, "competitor_price": 80.0 + i % 10,
+            "emitted_ns": 1_700_000_000_000_000_000 + i}
+
+
+def consume_all(transport, shard, timeout=0.05):
+    events = []
+    while True:
+        event = transport.consume(shard, timeout)
+        if event is None:
+            return events
+        events.append(dict(event))
+
+
+def test_multiprocessing_transport_round_trip():
+    transport = MultiprocessingTransport(2, queue_size=16)
+    events = [make_event(i) for i in range(5)]
+    transport.publish_batch(1, events)
+    # Events the binary format cannot carry still get through
+    transport.publish_batch(1, [make_event(5, product_id="sku-5")])
+    received = consume_all(transport, 1)
+    assert received == events + [make_event(5, product_id="sku-5")]
+    assert consume_all(transport, 0) == []
+
+    transport.publish_alert({"product_id": 1, "alert_details": "drop"})
+    assert transport.consume_alert(1.0) == {"product_id": 1, "alert_details": "drop"}
+    assert transport.consume_alert(0.01) is None
+
+
+def test_file_transport_round_trip(tmp_path):
+    producer = FileTransport(str(tmp_path), 2, poll_interval=0.01)
+    consumer = FileTransport(str(tmp_path), 2, poll_interval=0.01)
+    events = [make_event(i, product_id=f"sku-{i}") for i in range(4)]
+    producer.publish_batch(0, events[:3])
+    producer.publish(0, events[3])
+    producer.publish_alert({"product_id": "sku-1"})
+    assert consume_all(consumer, 0) == events
+    assert consumer.consume_alert(0.05) == {"product_id": "sku-1"}
+    producer.close()
+    consumer.close()
+
+
+def test_file_transport_redelivers_unacknowledged_events(tmp_path):
+    producer = FileTransport(str(tmp_path), 1, poll_interval=0.01)
+    producer.publish_batch(0, [make_event(i) for i in range(3)])
+    producer.close()
+
+    consumer = FileTransport(str(tmp_path), 1, poll_interval=0.01, commit_interval=0.0)
+    assert consumer.consume(0, 0.05)["product_id"] == 0
+    consumer.ack(0)
+    assert consumer.consume(0, 0.05)["product_id"] == 1
+    # Crash before event 1 was processed: only event 0 is committed
+    consumer.close()
+
+    restarted = FileTransport(str(tmp_path), 1, poll_interval=0.01)
+    assert [event["product_id"] for event in consume_all(restarted, 0)] == [1, 2]
+    restarted.close()
+
+
+@pytest.mark.parametrize("shards", [1, 3])
+def test_router_keeps_per_product_order(shards):
+    assert INPUT_QUEUE.empty()
+    transport = MultiprocessingTransport(shards, queue_size=1000)
+    for i in range(300):
+        INPUT_QUEUE.put(make_event(i, product_id=i % 7))
+
+    stop = threading.Event()
+    router = threading.Thread(target=route_events, args=(transport, shards, stop, 16, 0.05))
+    router.start()
+    received = {shard: consume_all(transport, shard, timeout=0.5) for shard in range(shards)}
+    stop.set()
+    router.join()
+
+    sequences = {}
+    for shard, events in received.items():
+        for event in events:
+            assert partition_for(event["product_id"], shards) == shard
+            sequences.setdefault(event["product_id"], []).append(event["emitted_ns"])
+    assert sum(len(sequence) for sequence in sequences.values()) == 300
+    for sequence in sequences.values():
+        assert sequence == sorted(sequence)
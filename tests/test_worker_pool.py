@@ -0,0 +1,83 @@
+"""
+Tests for the worker pool: per-product ordering, failed handlers and stats
+"""
+
+import threading
+import pytest
+from core.batching import get_consumer_stats
+from core.worker_pool import WorkerPool, partition_for
+
+
+def test_partition_is_stable():
+    assert partition_for("sku-1", 8) == partition_for("sku-1", 8)
+    assert {partition_for(i, 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+def test_events_of_a_product_keep_their_order():
+    seen = {}
+    lock = threading.Lock()
+
+    def handler_factory():
+        def handle(batch):
+            with lock:
+                for event in batch:
+                    seen.setdefault(event["product_id"], []).append(event["n"])
+        return handle
+
+    pool = WorkerPool(handler_factory, num_workers=4, queue_size=8, batch_size=3, poll_timeout=0.05).start()
+    for n in range(200):
+        pool.submit({"product_id": n % 7, "n": n})
+    pool.shutdown(drain=True, timeout=5)
+    assert sum(len(ns) for ns in seen.values()) == 200
+    assert all(ns == sorted(ns) for ns in seen.values())
+    assert pool.get_stats()["processed"] == 200
+
+
+def test_failed_handler_factory_makes_submit_raise():
+    def handler_factory():
+        raise ImportError("agent framework missing")
+
+    pool = WorkerPool(handler_factory, num_workers=1, queue_size=1, poll_timeout=0.05).start()
+    with pytest.raises(RuntimeError, match="agent framework missing"):
+        # Would block forever on the full queue without the failure check
+        for n in range(5):
+            pool.submit({"product_id": 1, "n": n})
+    pool.shutdown(drain=True, timeout=1)
+    assert isinstance(pool.failure, ImportError)
+
+
+def test_pool_batches_are_not_counted_as_input_consumer_batches():
+    before = get_consumer_stats()["batches"]
+    pool = WorkerPool(lambda: (lambda batch: None), num_workers=2, poll_timeout=0.05).start()
+    for n in range(20):
+        pool.submit({"product_id": n})
+    pool.shutdown(drain=True, timeout=5)
+    assert get_consumer_stats()["batches"] == before
+    assert pool.get_stats()["batches"] > 0
+
+
+def test_shutdown_drains_healthy_workers_and_hands_off_the_failed_ones():
+    release = threading.Event()
+    processed = []
+    abandoned = []
+
+    def handler_factory():
+        if threading.current_thread().name.endswith("-1"):
+            release.wait(5)
+            raise ImportError("agent framework missing")
+        release.wait(5)
+        return lambda batch: processed.extend(event["product_id"] for event in batch)
+
+    pool = WorkerPool(handler_factory, num_workers=2, queue_size=100, poll_timeout=0.05,
+                      on_abandoned=lambda event, error: abandoned.append((event["product_id"], type(error)))).start()
+    products = list(range(40))
+    for product_id in products:
+        pool.submit({"product_id": product_id})
+    release.set()
+    while pool.failure is None:
+        threading.Event().wait(0.01)
+    pool.shutdown(drain=True, timeout=5)
+
+    failed = [p for p in products if partition_for(p, 2) == 1]
+    assert sorted(processed) == [p for p in products if partition_for(p, 2) == 0]
+    assert abandoned == [(p, ImportError) for p in failed]
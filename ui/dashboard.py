@@ -2,88 +2,264 @@
 Streamlit Dashboard - Real-time monitoring interface
 """
 
-import json
+import time
+from collections import deque
 import streamlit as st
-from config.constants import INPUT_QUEUE, OUTPUT_QUEUE
+from core.event_log import open_event_log
+from core.event_store import EVENT_HISTORY, ALERT_HISTORY
+from core.events import format_timestamp
+from core.metrics import snapshot as metrics_snapshot
+from core.rules import compute_price_drops
+from core.startup import get_connectivity_status
+from config.settings import load_settings
+from config.constants import (
+    EVENT_HISTORY_SIZE, ALERT_HISTORY_SIZE
+)
 
 
-def load_settings():
-    """Load application settings from JSON file"""
-    try:
-        with open('config/settings.json', 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        st.error(f"Failed to load settings: {str(e)}")
-        return {}
+_catalogs = {}
 
 
-def streamlit_app():
+def get_catalog(settings):
+    """Return the configured product catalog (loaded once per path), or None"""
+    path = settings.get('catalog', {}).get('path')
+    if not path:
+        return None
+    if path not in _catalogs:
+        from core.catalog import load_catalog
+        _catalogs[path] = load_catalog(path)
+    return _catalogs[path]
+
+
+def price_differences(records, catalog=None):
     """
-    Real-time monitoring dashboard built with Streamlit
+    Price difference % of a batch of history records
 
-    This function defines the layout and functionality of the
-    Streamlit dashboard for monitoring pricing events and alerts.
+    With a catalog, our price comes from one vectorized ``catalog.evaluate``
+    call for the whole batch; otherwise the difference computed when each
+    record was stored is used.
+
+    Returns:
+        list: Difference in percent (or None) per record
     """
-    settings = load_settings()
-    app_settings = settings.get('application', {})
+    if catalog is None:
+        return [record.price_diff for record in records]
+    drops = compute_price_drops([
+        {"product_id": record.product_id, "our_price": record.our_price,
+         "competitor_price": record.competitor_price}
+        for record in records
+    ], catalog)
+    return [None if drop is None else drop * 100 for drop in drops]
 
-    # Application title and header
-    st.title(app_settings.get('name', "AI Pricing Monitor"))
-    st.write(app_settings.get('description', "Real-time competitor price monitoring with AI-powered analysis"))
 
-    # Settings display
-    with st.expander("System Settings"):
-        st.json(settings)
+def to_row(record, price_diff):
+    """Convert a history record and its price difference % into a table row"""
+    return {
+        "Time": record.timestamp,
+        "Product": record.product_name,
+        "Category": record.category,
+        "Our Price": record.our_price,
+        "Competitor Price": record.competitor_price,
+        "Price Difference %": round(price_diff, 1) if price_diff is not None else None,
+        "Alert Details": record.alert_details or '',
+    }
 
-    # Dashboard layout
+
+def sync_rows(key, store, max_rows, catalog=None):
+    """
+    Append records added to a history store since the last rerun
+
+    Rows and the sequence cursor live in the Streamlit session, so each
+    rerun only converts the records that are new since the previous one,
+    computing their price differences as one batch.
+
+    Returns:
+        deque: Table rows, oldest first
+    """
+    rows_key, cursor_key = f"{key}_rows", f"{key}_cursor"
+    if rows_key not in st.session_state:
+        st.session_state[rows_key] = deque(maxlen=max_rows)
+        st.session_state[cursor_key] = -1
+
+    rows = st.session_state[rows_key]
+    new_records = store.snapshot(since_seq=st.session_state[cursor_key])
+    if new_records:
+        rows.extend(to_row(record, price_diff) for record, price_diff
+                    in zip(new_records, price_differences(new_records, catalog)))
+        st.session_state[cursor_key] = new_records[-1].seq
+    return rows
+
+
+def render_table(key, rows, page_size, columns):
+    """Render rows as a single paginated table, newest first"""
+    pages = max(1, (len(rows) + page_size - 1) // page_size)
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    end = len(rows) - (page - 1) * page_size
+    start = max(0, end - page_size)
+    page_rows = [rows[i] for i in range(end - 1, start - 1, -1)]
+    st.dataframe([{column: row[column] for column in columns} for row in page_rows],
+                 use_container_width=True, hide_index=True)
+    st.caption(f"Page {page} of {pages} ({len(rows)} records)")
+    return page_rows
+
+
+def render_incremental(settings):
+    """
+    Render events and alerts as paginated tables fed from a session cursor
+
+    Work per rerun depends on the number of new records and the page size,
+    not on the total history length.
+    """
+    page_size = max(1, int(settings.get('dashboard', {}).get('page_size', 25)))
+    catalog = get_catalog(settings)
+    events = sync_rows("events", EVENT_HISTORY, EVENT_HISTORY_SIZE, catalog)
+    alerts = sync_rows("alerts", ALERT_HISTORY, ALERT_HISTORY_SIZE, catalog)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("All Price Events")
+        if not events:
+            st.info("No price events detected yet")
+        else:
+            render_table("events", events, page_size,
+                         ["Time", "Product", "Category", "Our Price", "Competitor Price"])
+
+    with col2:
+        st.subheader("Critical Alerts")
+        if not alerts:
+            st.success("No alerts detected")
+        else:
+            page_rows = render_table("alerts", alerts, page_size,
+                                     ["Time", "Product", "Price Difference %", "Our Price", "Competitor Price"])
+
+            # Show the alert details for one alert of the current page
+            with st.expander("View Alert Details"):
+                labels = [f"{row['Time']} - {row['Product']}" for row in page_rows]
+                selected = st.selectbox("Alert", range(len(labels)),
+                                        format_func=lambda i: labels[i], key="alerts_selected")
+                if selected is not None:
+                    st.write(page_rows[selected]["Alert Details"])
+
+    event_log = open_event_log(settings)
+    if event_log is not None:
+        render_event_log(event_log, page_size)
+
+
+def render_event_log(event_log, page_size):
+    """Page through the durable event log without loading it into memory"""
+    with st.expander("Event Log History"):
+        product_filter = st.text_input("Product ID filter", key="event_log_product").strip()
+        total = event_log.count()
+        pages = max(1, (total + page_size - 1) // page_size)
+        page = st.number_input("Log page", min_value=1, max_value=pages, value=1, step=1, key="event_log_page")
+        records = event_log.page(page, page_size, product_id=product_filter or None)
+        st.dataframe([
+            {
+                "LSN": record["lsn"],
+                "Time": record["data"].get("timestamp") or format_timestamp(record["data"].get("emitted_ns")),
+                "Product": record["data"].get("product_name"),
+                "Category": record["data"].get("category"),
+                "Our Price": record["data"].get("our_price"),
+                "Competitor Price": record["data"].get("competitor_price"),
+            }
+            for record in records
+        ], use_container_width=True, hide_index=True)
+        st.caption(f"{total} logged events")
+
+
+def render_full(settings):
+    """Render every retained event and alert as individual widgets"""
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("All Price Events")
 
-        # Display all events from the input queue
-        if INPUT_QUEUE.empty():
+        # Display recent events from the bounded event history
+        events = EVENT_HISTORY.snapshot()
+        if not events:
             st.info("No price events detected yet")
         else:
-            for event in list(INPUT_QUEUE.queue):
+            for event in events:
                 with st.container():
-                    st.write(f"**{event['timestamp']} - {event['product_name']}**")
-                    st.write(f"Category: {event['category']}")
-                    st.write(f"Our Price: ${event['our_price']}")
-                    st.write(f"Competitor Price: ${event['competitor_price']}")
+                    st.write(f"**{event.timestamp} - {event.product_name}**")
+                    st.write(f"Category: {event.category}")
+                    st.write(f"Our Price: ${event.our_price}")
+                    st.write(f"Competitor Price: ${event.competitor_price}")
                     st.divider()
 
     with col2:
         st.subheader("Critical Alerts")
 
-        # Display alerts from the output queue
-        alerts = list(OUTPUT_QUEUE.queue)
+        # Display recent alerts from the bounded alert history
+        alerts = ALERT_HISTORY.snapshot()
         if not alerts:
             st.success("No alerts detected")
         else:
-            for alert in alerts:
-                # Calculate price difference percentage
-                price_diff = ((alert['our_price'] - alert['competitor_price']) / alert['our_price']) * 100
+            for alert, price_diff in zip(alerts, price_differences(alerts, get_catalog(settings))):
+                price_diff = price_diff or 0.0
 
                 # Create an alert box
                 with st.container():
                     if price_diff > 0:
-                        st.error(f"🚨 {alert['product_name']} Alert!")
+                        st.error(f"🚨 {alert.product_name} Alert!")
                     else:
-                        st.warning(f"⚠️ {alert['product_name']} Alert!")
+                        st.warning(f"⚠️ {alert.product_name} Alert!")
 
                     st.write(f"**Price Difference:** {abs(price_diff):.1f}%")
-                    st.write(f"**Category:** {alert['category']}")
-                    st.write(f"**Our Price:** ${alert['our_price']}")
-                    st.write(f"**Competitor Price:** ${alert['competitor_price']}")
+                    st.write(f"**Category:** {alert.category}")
+                    st.write(f"**Our Price:** ${alert.our_price}")
+                    st.write(f"**Competitor Price:** ${alert.competitor_price}")
 
                     # Show the alert details
                     with st.expander("View Alert Details"):
-                        st.write(alert.get('alert_details', ''))
+                        st.write(alert.alert_details or '')
 
                     st.divider()
 
-    # Auto-refresh the dashboard
+
+def streamlit_app():
+    """
+    Real-time monitoring dashboard built with Streamlit
+
+    This function defines the layout and functionality of the
+    Streamlit dashboard for monitoring pricing events and alerts.
+    """
+    render_start = time.monotonic()
+    settings = load_settings()
+    if not settings:
+        st.error("Failed to load settings from config/settings.json")
+    app_settings = settings.get('application', {})
+
+    # Application title and header
+    st.title(app_settings.get('name', "AI Pricing Monitor"))
+    st.write(app_settings.get('description', "Real-time competitor price monitoring with AI-powered analysis"))
+
+    # Connectivity checks run in the background; surface their failures here
+    connectivity = get_connectivity_status()
+    if connectivity['state'] == 'failed':
+        st.warning(f"Connectivity check failed: {connectivity['error']}")
+
+    # Settings display
+    with st.expander("System Settings"):
+        st.json(settings)
+
+    # Per-stage latency and throughput of the processing pipeline
+    with st.expander("Pipeline Metrics"):
+        rows = metrics_snapshot()
+        if rows:
+            st.dataframe(rows, use_container_width=True)
+        else:
+            st.info("No metrics recorded yet")
+
+    # Dashboard layout
+    if settings.get('dashboard', {}).get('render_mode', 'incremental') == 'full':
+        render_full(settings)
+    else:
+        render_incremental(settings)
+
+    # Auto-refresh the dashboard no more often than the refresh interval
     refresh_interval = settings.get('monitoring', {}).get('refresh_interval', 1.0)
-    st.empty()
-    st.experimental_rerun()
\ No newline at end of file
+    time.sleep(max(0.0, refresh_interval - (time.monotonic() - render_start)))
+    rerun = getattr(st, 'rerun', None) or st.experimental_rerun
+    rerun()